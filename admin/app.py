@@ -1,36 +1,82 @@
-from flask import Flask, jsonify
-from admin.src.utils.logger import logger
-from admin.src.extensions import db, migrate, jwt, cors
-from admin.src.config import get_config
+import os
 
-from admin.src.model.AdminsModel import Admin
-from admin.src.model.CustomersModel import Customer
-from admin.src.model.TransactionsModel import Transaction
+import click
+from flask import Flask, jsonify
 
-from admin.src.api.v1.controllers.admin_controllers import admin_bp
-from admin.src.api.v1.controllers.customer_management_controllers import customer_management_bp
 
 def create_app():
+    # Extensions, models and blueprints are imported here rather than at module
+    # level, so that importing this module stays cheap and touches no database.
+    from admin.src.config import get_config
+    from admin.src.extensions import db, migrate, jwt, cors, revocation_cache, revocation_bus, customer_revocation_bus, password_hasher, login_limiter
+    from admin.src.utils.logger import logger
+    from shared.engine import pool_stats
+    from shared.json_provider import FastJSONProvider
+    from admin.src import token_management  # noqa: F401 (registers the JWT callbacks)
+    from admin.src.api.v1.controllers.admin_controllers import admin_bp
+    from admin.src.api.v1.controllers.customer_management_controllers import customer_management_bp
+
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(get_config())
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, version_table='alembic_version_admin')
     jwt.init_app(app)
+    revocation_cache.init_app(app)
+    revocation_bus.init_app(app)
+    customer_revocation_bus.init_app(app, listen=False)
+    password_hasher.init_app(app)
+    login_limiter.init_app(app)
     cors.init_app(app)
 
     app.register_blueprint(admin_bp)
     app.register_blueprint(customer_management_bp)
-    return app
 
-app = create_app()
+    @app.route('/')
+    def index():
+        logger.debug('Enter index')
+        return jsonify({'message': 'Admin API'}), 200
+
+    @app.route('/metrics')
+    def metrics():
+        return jsonify({
+            'revocation_cache': revocation_cache.stats(),
+            'revocation_bus': revocation_bus.stats(),
+            'db_pool': pool_stats(db.engine),
+            'password_hasher': password_hasher.stats(),
+            'login_limiter': login_limiter.stats(),
+        }), 200
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the tables of this service's models that do not exist yet."""
+        db.create_all()
 
-@app.route('/')
-def index():
-    logger.info('Enter index')
-    return jsonify({'message': 'Admin API'}), 200
+    @app.cli.command('setup-db')
+    def setup_db():
+        """Create the schema of a new database, or apply the pending migrations."""
+        from shared.schema import setup_schema
+
+        result = setup_schema(db, os.path.join(os.path.dirname(__file__), 'migrations'), base_table='admins')
+        logger.info('Database schema %s', result)
+
+    @app.cli.command('export-transactions')
+    @click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']), default='csv', show_default=True)
+    @click.option('--customer-id', type=int, help='Only export the transactions of this customer.')
+    @click.option('--since', type=click.DateTime(), help='Only export transactions created at or after this UTC time.')
+    @click.option('--until', type=click.DateTime(), help='Only export transactions created before this UTC time.')
+    @click.option('--status', type=click.Choice(['completed', 'reversed']))
+    @click.option('--output', type=click.File('wb'), default='-', help='The file to write, standard output by default.')
+    def export_transactions(fmt, customer_id, since, until, status, output):
+        """Stream transactions as CSV or NDJSON, in constant memory."""
+        from admin.src.api.v1.services.customer_management_service import CustomerManagementService
+
+        service = CustomerManagementService(db_session=db.session)
+        for chunk in service.encode_transactions(fmt, customer_id=customer_id, since=since, until=until, status=status):
+            output.write(chunk)
+
+    return app
 
-with app.app_context():
-    db.create_all()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    create_app().run(host='0.0.0.0', port=5000, debug=True)
@@ -24,6 +24,7 @@ from werkzeug.exceptions import NotFound, BadRequest
 from marshmallow import ValidationError
 
 from admin.src.utils.errors import AuthenticationError
+from shared.passwords import HasherBusy, TooManyAttempts
 from admin.src.utils.logger import logger
 from admin.src.extensions import db
 from admin.src.api.v1.schemas.admin_schema import RegisterAdminSchema, LoginAdminSchema, UpdateAdminSchema
@@ -44,24 +45,26 @@ def register_admin():
     Response
         JSON response indicating success or validation errors with the appropriate HTTP status.
     """
-    logger.info('Enter register admin')
+    logger.debug('Enter register admin')
     data = request.get_json()
     schema = RegisterAdminSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.error(f'Validation error in register admin: {e.messages}')
+        logger.error('Validation error in register admin: %s', e.messages)
         return jsonify({'error': f'Validation error in register admin: {e.messages}'}), 400
 
     service = AdminService(db_session=db.session)
     try:
         result = service.register_admin(data)
-        logger.info('Exit register admin successfully')
+        logger.debug('Exit register admin successfully')
         return jsonify(result), 201
     except BadRequest as e:
         return jsonify({'error': str(e)}), 408
+    except HasherBusy as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        logger.error(f'Internal server error in register admin: {e}')
+        logger.error('Internal server error in register admin: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -77,26 +80,31 @@ def login_admin():
     Response
         JSON response containing access and refresh tokens or error messages.
     """
-    logger.info('Enter login admin')
+    logger.debug('Enter login admin')
     data = request.get_json()
     schema = LoginAdminSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.error(f'Validation error in login admin: {e.messages}')
+        logger.error('Validation error in login admin: %s', e.messages)
         return jsonify({'error': f'Validation error in login admin: {e.messages}'}), 400
 
     service = AdminService(db_session=db.session)
     try:
         result = service.login_admin(data)
-        logger.info('Exit login admin successfully')
+        logger.debug('Exit login admin successfully')
         return jsonify(result), 200
+    except TooManyAttempts as e:
+        logger.info('Too many login attempts for admin: %s', data.get('identifier'))
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except HasherBusy as e:
+        return jsonify({'error': str(e)}), 503
     except AuthenticationError as e:
         return jsonify({'error': str(e)}), 401
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in login admin: {e}')
+        logger.error('Internal server error in login admin: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -111,17 +119,17 @@ def logout_admin():
     Response
         JSON response indicating success or error with the appropriate HTTP status.
     """
-    logger.info('Enter logout admin')
+    logger.debug('Enter logout admin')
     admin_username = get_jwt_identity()
     service = AdminService(db_session=db.session)
     try:
         result = service.logout_admin(admin_username)
-        logger.info('Exit logout admin successfully')
+        logger.debug('Exit logout admin successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in logout admin: {e}')
+        logger.error('Internal server error in logout admin: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -138,25 +146,25 @@ def update_admin():
     Response
         JSON response indicating success or validation errors with the appropriate HTTP status.
     """
-    logger.info('Enter update admin')
+    logger.debug('Enter update admin')
     data = request.get_json()
     schema = UpdateAdminSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.error(f'Validation error in update admin: {e.messages}')
+        logger.error('Validation error in update admin: %s', e.messages)
         return jsonify({'error': f'Validation error in update admin: {e.messages}'}), 400
 
     admin_username = get_jwt_identity()
     service = AdminService(db_session=db.session)
     try:
         result = service.update_admin(admin_username, data)
-        logger.info('Exit update admin successfully')
+        logger.debug('Exit update admin successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in update admin: {e}')
+        logger.error('Internal server error in update admin: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -171,15 +179,15 @@ def get_admin_info():
     Response
         JSON response containing admin details or an error message.
     """
-    logger.info('Enter get admin info')
+    logger.debug('Enter get admin info')
     admin_username = get_jwt_identity()
     service = AdminService(db_session=db.session)
     try:
         result = service.get_admin_info(admin_username)
-        logger.info('Exit get admin info successfully')
+        logger.debug('Exit get admin info successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in get admin info: {e}')
+        logger.error('Internal server error in get admin info: %s', e)
         return jsonify({'error': str(e)}), 500
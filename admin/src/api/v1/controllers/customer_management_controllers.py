@@ -20,6 +20,7 @@ Routes
 - `/unban_customer` : Unban a customer.
 - `/get_banned_customers` : Retrieve all banned customers.
 - `/get_all_customers` : Retrieve all customers.
+- `/export_transactions` : Export transactions as CSV or NDJSON.
 """
 
 from flask import jsonify, Blueprint, request
@@ -29,11 +30,14 @@ from marshmallow import ValidationError
 
 from admin.src.extensions import db
 from admin.src.utils.logger import logger
+from shared.export import export_response
+from shared.pagination import load_pagination_args, page_response, ndjson_response
 from admin.src.api.v1.schemas.customer_management_schema import (
     UpdateCustomerProfileSchema,
     TopUpCustomerSchema,
     ReverseTransactionSchema,
-    CustomerSchema
+    CustomerSchema,
+    ExportTransactionsSchema,
 )
 from admin.src.api.v1.services.customer_management_service import CustomerManagementService
 
@@ -53,13 +57,13 @@ def top_up_customer():
     Response
         JSON response indicating success or error with the appropriate HTTP status.
     """
-    logger.info('Enter top up customer')
+    logger.debug('Enter top up customer')
     data = request.get_json()
     schema = TopUpCustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in top up customer: {e.messages}')
+        logger.info('Validation error in top up customer: %s', e.messages)
         return jsonify({'error': f'Validation error in top up customer: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
@@ -71,7 +75,7 @@ def top_up_customer():
     except BadRequest as e:
         return jsonify({'error': str(e)}), 408
     except Exception as e:
-        logger.error(f'Internal server error in top up customer: {e}')
+        logger.error('Internal server error in top up customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -88,13 +92,13 @@ def update_customer_profile():
     Response
         JSON response indicating success or error with the appropriate HTTP status.
     """
-    logger.info('Enter update customer profile')
+    logger.debug('Enter update customer profile')
     data = request.get_json()
     schema = UpdateCustomerProfileSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in update customer profile: {e.messages}')
+        logger.info('Validation error in update customer profile: %s', e.messages)
         return jsonify({'error': f'Validation error: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
@@ -104,7 +108,7 @@ def update_customer_profile():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in update customer profile: {e}')
+        logger.error('Internal server error in update customer profile: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -121,13 +125,13 @@ def reverse_transaction():
     Response
         JSON response indicating success or error with the appropriate HTTP status.
     """
-    logger.info('Enter reverse transaction')
+    logger.debug('Enter reverse transaction')
     data = request.get_json()
     schema = ReverseTransactionSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in reverse transaction: {e.messages}')
+        logger.info('Validation error in reverse transaction: %s', e.messages)
         return jsonify({'error': f'Validation error: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
@@ -139,7 +143,7 @@ def reverse_transaction():
     except BadRequest as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logger.error(f'Internal server error in reverse transaction: {e}')
+        logger.error('Internal server error in reverse transaction: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -156,13 +160,13 @@ def get_customer_info():
     Response
         JSON response containing customer details or an error message.
     """
-    logger.info('Enter get customer info')
+    logger.debug('Enter get customer info')
     data = request.get_json()
     schema = CustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in get customer info: {e.messages}')
+        logger.info('Validation error in get customer info: %s', e.messages)
         return jsonify({'error': f'Validation error: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
@@ -172,7 +176,7 @@ def get_customer_info():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in get customer info: {e}')
+        logger.error('Internal server error in get customer info: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -182,30 +186,35 @@ def get_customer_transactions():
     """
     Retrieve a customer's transactions.
 
-    Validates the input data and retrieves the specified customer's transaction history.
+    Validates the input data and retrieves the specified customer's transaction
+    history, one page selected by the `limit` and `after` query parameters, or
+    every transaction as NDJSON with `format=ndjson`.
 
     Returns
     -------
     Response
         JSON response containing the transaction history or an error message.
     """
-    logger.info('Enter get customer transactions')
+    logger.debug('Enter get customer transactions')
     data = request.get_json()
     schema = CustomerSchema()
     try:
         data = schema.load(data)
+        args = load_pagination_args(request.args)
     except ValidationError as e:
-        logger.info(f'Validation error in get customer transactions: {e.messages}')
+        logger.info('Validation error in get customer transactions: %s', e.messages)
         return jsonify({'error': f'Validation error: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
     try:
-        result = service.get_customer_transactions(data)
-        return jsonify(result), 200
+        if args['format'] == 'ndjson':
+            return ndjson_response(service.stream_customer_transactions(data, args['after']))
+        page = service.get_customer_transactions(data, args['limit'], args['after'])
+        return page_response(page.rows, page.next_cursor), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in get customer transactions: {e}')
+        logger.error('Internal server error in get customer transactions: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -222,13 +231,13 @@ def ban_customer():
     Response
         JSON response indicating success or error with the appropriate HTTP status.
     """
-    logger.info('Enter ban customer')
+    logger.debug('Enter ban customer')
     data = request.get_json()
     schema = CustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in ban customer: {e.messages}')
+        logger.info('Validation error in ban customer: %s', e.messages)
         return jsonify({'error': f'Validation error: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
@@ -238,7 +247,7 @@ def ban_customer():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in ban customer: {e}')
+        logger.error('Internal server error in ban customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -255,13 +264,13 @@ def unban_customer():
     Response
         JSON response indicating success or error with the appropriate HTTP status.
     """
-    logger.info('Enter unban customer')
+    logger.debug('Enter unban customer')
     data = request.get_json()
     schema = CustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in unban customer: {e.messages}')
+        logger.info('Validation error in unban customer: %s', e.messages)
         return jsonify({'error': f'Validation error: {e.messages}'}), 400
 
     service = CustomerManagementService(db_session=db.session)
@@ -271,7 +280,7 @@ def unban_customer():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in unban customer: {e}')
+        logger.error('Internal server error in unban customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -281,18 +290,29 @@ def get_banned_customers():
     """
     Retrieve all banned customers.
 
+    Returns one page selected by the `limit` and `after` query parameters, or
+    streams every banned customer as NDJSON with `format=ndjson`.
+
     Returns
     -------
     Response
         JSON response containing a list of banned customers or an error message.
     """
-    logger.info('Enter get banned customers')
+    logger.debug('Enter get banned customers')
+    try:
+        args = load_pagination_args(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in get banned customers: %s', e.messages)
+        return jsonify({'error': f'Validation error: {e.messages}'}), 400
+
     service = CustomerManagementService(db_session=db.session)
     try:
-        result = service.get_all_banned_customers()
-        return jsonify(result), 200
+        if args['format'] == 'ndjson':
+            return ndjson_response(service.stream_all_banned_customers(args['after']))
+        page = service.get_all_banned_customers(args['limit'], args['after'])
+        return page_response(page.rows, page.next_cursor), 200
     except Exception as e:
-        logger.error(f'Internal server error in get banned customers: {e}')
+        logger.error('Internal server error in get banned customers: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -302,16 +322,62 @@ def get_all_customers():
     """
     Retrieve all customers.
 
+    Returns one page selected by the `limit` and `after` query parameters, or
+    streams every customer as NDJSON with `format=ndjson`.
+
     Returns
     -------
     Response
         JSON response containing a list of all customers or an error message.
     """
-    logger.info('Enter get all customers')
+    logger.debug('Enter get all customers')
+    try:
+        args = load_pagination_args(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in get all customers: %s', e.messages)
+        return jsonify({'error': f'Validation error: {e.messages}'}), 400
+
     service = CustomerManagementService(db_session=db.session)
     try:
-        result = service.get_all_customers()
-        return jsonify(result), 200
+        if args['format'] == 'ndjson':
+            return ndjson_response(service.stream_all_customers(args['after']))
+        page = service.get_all_customers(args['limit'], args['after'])
+        return page_response(page.rows, page.next_cursor), 200
+    except Exception as e:
+        logger.error('Internal server error in get all customers: %s', e)
+        return jsonify({'error': str(e)}), 500
+
+
+@customer_management_bp.route('/export_transactions', methods=['GET'])
+@jwt_required()
+def export_transactions():
+    """
+    Export transactions as CSV or NDJSON.
+
+    Streams every transaction, or those matching the `customer_id`, `since`,
+    `until` and `status` query parameters, in id order. The rows are read
+    from a server-side cursor and sent as they are encoded, so memory use
+    does not depend on the number of transactions.
+
+    Returns
+    -------
+    Response
+        A chunked download of the export, or an error message.
+    """
+    logger.debug('Enter export transactions')
+    try:
+        filters = ExportTransactionsSchema().load(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in export transactions: %s', e.messages)
+        return jsonify({'error': f'Validation error: {e.messages}'}), 400
+
+    fmt = filters.pop('format')
+    service = CustomerManagementService(db_session=db.session)
+    try:
+        chunks = service.encode_transactions(fmt, **filters)
+        if fmt == 'ndjson':
+            return export_response(chunks, 'application/x-ndjson', 'transactions.ndjson')
+        return export_response(chunks, 'text/csv', 'transactions.csv')
     except Exception as e:
-        logger.error(f'Internal server error in get all customers: {e}')
+        logger.error('Internal server error in export transactions: %s', e)
         return jsonify({'error': str(e)}), 500
@@ -10,6 +10,7 @@ Schemas
 - `UpdateCustomerProfileSchema`: Validation schema for updating a customer's profile.
 - `CustomerSchema`: Validation schema for identifying a customer.
 - `ReverseTransactionSchema`: Validation schema for reversing a transaction.
+- `ExportTransactionsSchema`: Validation schema for the filters of a transaction export.
 """
 
 from marshmallow import Schema, fields, validate, ValidationError
@@ -85,3 +86,27 @@ class ReverseTransactionSchema(Schema):
         The ID of the transaction to be reversed (required).
     """
     transaction_id = fields.Integer(required=True)
+
+
+class ExportTransactionsSchema(Schema):
+    """
+    Validation schema for the filters of a transaction export.
+
+    Attributes
+    ----------
+    format : str
+        The export format (one of 'csv', 'ndjson'; defaults to 'csv').
+    customer_id : int, optional
+        Only export the transactions of this customer.
+    since : datetime, optional
+        Only export transactions created at or after this time (ISO 8601, UTC if naive).
+    until : datetime, optional
+        Only export transactions created before this time (ISO 8601, UTC if naive).
+    status : str, optional
+        Only export transactions with this status (one of 'completed', 'reversed').
+    """
+    format = fields.String(load_default='csv', validate=validate.OneOf(['csv', 'ndjson']))
+    customer_id = fields.Integer(validate=validate.Range(min=1))
+    since = fields.DateTime()
+    until = fields.DateTime()
+    status = fields.String(validate=validate.OneOf(['completed', 'reversed']))
@@ -5,6 +5,8 @@ from admin.src.model.AdminsModel import Admin
 from admin.src.utils.errors import AuthenticationError
 from admin.src.utils.utils import get_utc_now, format_phone
 from admin.src.utils.logger import logger
+from admin.src.extensions import revocation_cache, revocation_bus, password_hasher, login_limiter
+from shared.identifiers import find_by_identifier
 
 
 class AdminService:
@@ -28,14 +30,14 @@ class AdminService:
         return Admin.query.filter(Admin.id == admin_id).first()
 
     def get_admin(self, identifier):
-        admin = self.get_admin_by_username(identifier) or self.get_admin_by_email(identifier) or self.get_admin_by_phone(identifier) or self.get_admin_by_id(identifier)
+        admin = find_by_identifier(Admin.query, Admin, identifier)
         if not admin:
-            logger.info(f'Admin with identifier {identifier} not found')
+            logger.info('Admin with identifier %s not found', identifier)
             raise NotFound(f'Admin with identifier {identifier} not found')
         return admin
     
     def register_admin(self, data):
-        logger.info('Enter register admin service')
+        logger.debug('Enter register admin service')
         first_name = data.get('first_name')
         last_name = data.get('last_name')
         username = data.get('username')
@@ -46,20 +48,20 @@ class AdminService:
         gender = data.get('gender')
         marital_status = data.get('marital_status')
 
-        logger.info(f'Registering admin with username: {username}, email: {email}, phone: {phone}, age: {age}, gender: {gender}, marital_status: {marital_status}')
+        logger.info('Registering admin with username: %s, email: %s, phone: %s, age: %s, gender: %s, marital_status: %s', username, email, phone, age, gender, marital_status)
 
         if self.get_admin_by_username(username):
-            logger.info(f'Username {username} already exists')
+            logger.info('Username %s already exists', username)
             raise BadRequest(f'Username {username} already exists')
 
         if self.get_admin_by_email(email):
-            logger.info(f'Email {email} already exists')
+            logger.info('Email %s already exists', email)
             raise BadRequest(f'Email {email} already exists')
 
         phone = format_phone(phone)
 
         if self.get_admin_by_phone(phone):
-            logger.info(f'Phone number {phone} already exists')
+            logger.info('Phone number %s already exists', phone)
             raise BadRequest(f'Phone number {phone} already exists')
 
         admin = Admin(first_name=first_name, last_name=last_name, username=username, email=email, phone=phone, age=age, gender=gender, marital_status=marital_status)
@@ -71,37 +73,45 @@ class AdminService:
         
         access_token = create_access_token(identity=str(admin.username))
         refresh_token = create_refresh_token(identity=str(admin.username))
-
-        logger.info(f'Access: {access_token}, Refresh: {refresh_token}')
         return {'access': access_token, 'refresh': refresh_token}
     
     def login_admin(self, data):
-        logger.info('Enter login admin service')
+        logger.debug('Enter login admin service')
         identifier = data.get('identifier')
         password = data.get('password')
 
-        logger.info(f'Logging in admin with identifier: {identifier}')
+        logger.info('Logging in admin with identifier: %s', identifier)
+        login_limiter.attempt(identifier)
         admin = self.get_admin(identifier)
 
         if not admin.check_password(password):
-            logger.info(f'Invalid password for admin with username or email: {identifier}')
+            logger.info('Invalid password for admin with username or email: %s', identifier)
             raise AuthenticationError(f'Invalid password for admin with username or email: {identifier}')
+        login_limiter.reset(identifier)
+
+        if password_hasher.needs_rehash(admin.password):
+            logger.info('Rehashing password of admin %s with %s', admin.username, password_hasher.method)
+            admin.set_password(password)
+            self.db_session.commit()
+            password_hasher.record_rehash()
 
         access_token = create_access_token(identity=admin.username)
         refresh_token = create_refresh_token(identity=admin.username)
-
         return {'access': access_token, 'refresh': refresh_token}
 
     def logout_admin(self, admin_username):
-        logger.info('Enter logout admin service')
+        logger.debug('Enter logout admin service')
         admin = self.get_admin(admin_username)
-        admin.last_logout = get_utc_now()
+        logout_time = get_utc_now()
+        admin.last_logout = logout_time
         self.db_session.commit()
+        revocation_cache.invalidate(admin.username)
+        revocation_bus.publish(admin.username, logout_time.timestamp(), 'active')
         logger.info('Admin logged out successfully')
         return {'message': 'Admin logged out successfully'}
     
     def update_admin(self, admin_username, data):
-        logger.info('Enter update admin service')
+        logger.debug('Enter update admin service')
         admin = self.get_admin(admin_username)
         for key, value in data.items():
             setattr(admin, key, value)
@@ -110,7 +120,7 @@ class AdminService:
         return {'message': 'Admin updated successfully'}
 
     def get_admin_info(self, admin_username):
-        logger.info('Enter get admin info service')
+        logger.debug('Enter get admin info service')
         admin = self.get_admin(admin_username)
         logger.info('Admin info retrieved successfully')
         return admin.to_dict()
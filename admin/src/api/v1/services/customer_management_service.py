@@ -1,8 +1,50 @@
+from datetime import timezone
+from itertools import groupby
+from operator import attrgetter
+
+from flask import current_app
+from sqlalchemy import select, update
 from werkzeug.exceptions import NotFound, BadRequest
 from admin.src.model.CustomersModel import Customer
+from admin.src.model.PurchaseHistoryModel import PurchaseHistory
 from admin.src.model.TransactionsModel import Transaction
+from admin.src.model.TransactionLinesModel import TransactionLine
 
 from admin.src.utils.logger import logger
+from admin.src.extensions import customer_revocation_bus
+from shared.export import iter_csv, iter_ndjson
+from shared.pagination import keyset_page, keyset_stream
+from shared.projection import project
+from shared.routing import read_only
+from shared.revocation_bus import to_timestamp
+
+TRANSACTION_EXPORT_FIELDS = (
+    'transaction_id',
+    'customer_id',
+    'created_at',
+    'status',
+    'lbp_total_price',
+    'usd_total_price',
+    'item_id',
+    'quantity',
+    'unit_price',
+    'currency',
+)
+
+
+def to_naive_utc(value):
+    # Timestamps are stored as naive UTC.
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def transaction_export_rows(transactions):
+    for transaction in transactions:
+        row = {field: transaction[field] for field in ('customer_id', 'created_at', 'status', 'lbp_total_price', 'usd_total_price')}
+        row['transaction_id'] = transaction['id']
+        for line in transaction['lines'] or [{}]:
+            yield dict(row, **line)
 
 
 class CustomerManagementService:
@@ -23,24 +65,17 @@ class CustomerManagementService:
             raise NotFound(f'Transaction with id {transaction_id} not found')
         return transaction
     
-    @staticmethod
-    def get_customer_transactions(customer_id):
-        transaction = Transaction.query.filter(Transaction.customer_id == customer_id).first()
-        if not transaction:
-            raise NotFound(f'Customer with id {customer_id} has no transactions to show')
-        return transaction
-
     def top_up_customer(self, data):
-        logger.info('Enter top up customer service')
+        logger.debug('Enter top up customer service')
         customer_id = data['customer_id']
         amount = data['amount']
         currency = data['currency']
-        logger.info(f'Top up customer service: customer_id: {customer_id}, amount: {amount}, currency: {currency}')
+        logger.info('Top up customer service: customer_id: %s, amount: %s, currency: %s', customer_id, amount, currency)
 
         customer = self.get_customer(customer_id)
         
         if customer.status != 'active':
-            logger.info(f'Customer with id {customer_id} is {customer.status}')
+            logger.info('Customer with id %s is %s', customer_id, customer.status)
             raise BadRequest(f'Customer with id {customer_id} is {customer.status}')
 
         if currency == 'LBP':  
@@ -49,11 +84,11 @@ class CustomerManagementService:
             customer.usd_balance += amount
 
         self.db_session.commit()
-        logger.info(f'Top up customer successfully')
+        logger.info('Top up customer successfully')
         return {'lbp_balance': customer.lbp_balance, 'usd_balance': customer.usd_balance}
     
     def update_customer_profile(self, data):
-        logger.info('Enter update customer profile service')
+        logger.debug('Enter update customer profile service')
 
         # Ensure customer_id is always provided
         customer_id = data.get('customer_id')
@@ -65,22 +100,22 @@ class CustomerManagementService:
 
         # Dynamically update only the fields present in the data
         if 'first_name' in data:
-            logger.info(f'Updating first_name to: {data["first_name"]}')
+            logger.info('Updating first_name to: %s', data["first_name"])
             customer.first_name = data['first_name']
         if 'last_name' in data:
-            logger.info(f'Updating last_name to: {data["last_name"]}')
+            logger.info('Updating last_name to: %s', data["last_name"])
             customer.last_name = data['last_name']
         if 'phone' in data:
-            logger.info(f'Updating phone to: {data["phone"]}')
+            logger.info('Updating phone to: %s', data["phone"])
             customer.phone = data['phone']
         if 'age' in data:
-            logger.info(f'Updating age to: {data["age"]}')
+            logger.info('Updating age to: %s', data["age"])
             customer.age = data['age']
         if 'gender' in data:
-            logger.info(f'Updating gender to: {data["gender"]}')
+            logger.info('Updating gender to: %s', data["gender"])
             customer.gender = data['gender']
         if 'marital_status' in data:
-            logger.info(f'Updating marital_status to: {data["marital_status"]}')
+            logger.info('Updating marital_status to: %s', data["marital_status"])
             customer.marital_status = data['marital_status']
 
         # Commit the updates to the database
@@ -88,50 +123,141 @@ class CustomerManagementService:
         logger.info('Customer profile updated successfully')
         return customer.to_dict()
 
+    def forget_purchases(self, transaction):
+        # Keep purchase_history counting completed transactions only, as the sales reversal does.
+        self.db_session.execute(
+            update(PurchaseHistory)
+            .where(
+                PurchaseHistory.customer_id == transaction.customer_id,
+                PurchaseHistory.item_id.in_(select(TransactionLine.item_id).where(TransactionLine.transaction_id == transaction.id)),
+            )
+            .values(purchase_count=PurchaseHistory.purchase_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+
     def reverse_transaction(self, data):
-        logger.info('Enter reverse transaction service')
+        logger.debug('Enter reverse transaction service')
         transaction_id = data['transaction_id']
         transaction = self.get_transaction(transaction_id)
         
         if transaction.status == 'reversed':
-            logger.info(f'Transaction with id {transaction_id} is already reversed')
+            logger.info('Transaction with id %s is already reversed', transaction_id)
             raise BadRequest(f'Transaction with id {transaction_id} is already reversed')
         
         transaction.status = 'reversed'
+        self.forget_purchases(transaction)
         self.db_session.commit()
-        logger.info(f'Transaction reversed successfully')
+        logger.info('Transaction reversed successfully')
         return {'message': 'Transaction reversed successfully'}
     
     def get_customer_info(self, data):
-        logger.info('Enter get customer info service')
+        logger.debug('Enter get customer info service')
         customer_id = data['customer_id']
         customer = self.get_customer(customer_id)
-        logger.info(f'Get customer info service: customer_id: {customer_id}')
+        logger.info('Get customer info service: customer_id: %s', customer_id)
         return customer.to_dict()
     
-    def get_customer_transactions(self, data):
-        customer_id = data['customer_id']
-        transactions = self.get_customer_transactions(customer_id)
-        return [transaction.to_dict() for transaction in transactions]
+    def get_customer_transactions(self, data, limit, after=None):
+        logger.debug('Enter get customer transactions service')
+        customer = self.get_customer(data['customer_id'])
+        transactions = Transaction.query.filter(Transaction.customer_id == customer.id)
+        return keyset_page(transactions, Transaction.id, limit, after)
+
+    def stream_customer_transactions(self, data, after=None):
+        logger.debug('Enter stream customer transactions service')
+        customer = self.get_customer(data['customer_id'])
+        transactions = Transaction.query.filter(Transaction.customer_id == customer.id)
+        return keyset_stream(transactions, Transaction.id, after)
+
+    @read_only
+    def export_transactions(self, customer_id=None, since=None, until=None, status=None):
+        logger.debug('Enter export transactions service')
+        statement = (
+            select(
+                Transaction.id,
+                Transaction.customer_id,
+                Transaction.lbp_total_price,
+                Transaction.usd_total_price,
+                Transaction.status,
+                Transaction.created_at,
+                TransactionLine.item_id,
+                TransactionLine.quantity,
+                TransactionLine.unit_price,
+                TransactionLine.currency,
+            )
+            .outerjoin(TransactionLine, TransactionLine.transaction_id == Transaction.id)
+            .order_by(Transaction.id, TransactionLine.id)
+        )
+        if customer_id is not None:
+            statement = statement.where(Transaction.customer_id == customer_id)
+        if since is not None:
+            statement = statement.where(Transaction.created_at >= to_naive_utc(since))
+        if until is not None:
+            statement = statement.where(Transaction.created_at < to_naive_utc(until))
+        if status is not None:
+            statement = statement.where(Transaction.status == status)
+
+        # yield_per streams the rows from a server-side cursor, chunk by chunk.
+        chunk_size = current_app.config.get('PAGINATION_STREAM_CHUNK_SIZE', 1000)
+        rows = self.db_session.execute(statement.execution_options(yield_per=chunk_size))
+        exported = 0
+        for _, lines in groupby(rows, key=attrgetter('id')):
+            lines = list(lines)
+            first = lines[0]
+            yield {
+                'id': first.id,
+                'customer_id': first.customer_id,
+                'lines': [
+                    {'item_id': line.item_id, 'quantity': line.quantity, 'unit_price': line.unit_price, 'currency': line.currency}
+                    for line in lines if line.item_id is not None
+                ],
+                'lbp_total_price': first.lbp_total_price,
+                'usd_total_price': first.usd_total_price,
+                'status': first.status,
+                'created_at': first.created_at,
+            }
+            exported += 1
+        logger.info('Transactions exported: %s', exported)
+
+    def encode_transactions(self, fmt, **filters):
+        # CSV has one row per transaction line, NDJSON one transaction with its lines per line.
+        transactions = self.export_transactions(**filters)
+        if fmt == 'ndjson':
+            return iter_ndjson(transactions)
+        return iter_csv(TRANSACTION_EXPORT_FIELDS, transaction_export_rows(transactions))
 
     def ban_customer(self, data):
         customer_id = data['customer_id']
         customer = self.get_customer(customer_id)
         customer.status = 'banned'
+        last_logout = customer.last_logout
         self.db_session.commit()
+        customer_revocation_bus.publish(customer.username, to_timestamp(last_logout), 'banned')
         return {'message': 'Customer banned successfully'}
 
     def unban_customer(self, data):
         customer_id = data['customer_id']
         customer = self.get_customer(customer_id)
         customer.status = 'active'
+        last_logout = customer.last_logout
         self.db_session.commit()
+        customer_revocation_bus.publish(customer.username, to_timestamp(last_logout), 'active')
         return {'message': 'Customer unbanned successfully'}
 
-    def get_all_customers(self):
-        customers = Customer.query.all()
-        return [customer.to_dict() for customer in customers]
+    @read_only
+    def get_all_customers(self, limit, after=None):
+        return keyset_page(project(Customer.query, Customer), Customer.id, limit, after)
+
+    @read_only
+    def stream_all_customers(self, after=None):
+        return keyset_stream(project(Customer.query, Customer), Customer.id, after)
+
+    @read_only
+    def get_all_banned_customers(self, limit, after=None):
+        customers = project(Customer.query.filter(Customer.status == 'banned'), Customer)
+        return keyset_page(customers, Customer.id, limit, after)
 
-    def get_all_banned_customers(self):
-        customers = Customer.query.filter(Customer.status == 'banned').all()
-        return [customer.to_dict() for customer in customers]
+    @read_only
+    def stream_all_banned_customers(self, after=None):
+        customers = project(Customer.query.filter(Customer.status == 'banned'), Customer)
+        return keyset_stream(customers, Customer.id, after)
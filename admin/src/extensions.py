@@ -2,8 +2,17 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
+from shared.passwords import LoginRateLimiter, PasswordHasher
+from shared.revocation_bus import RevocationBus
+from shared.revocation_cache import RevocationCache
+from shared.routing import RoutingSession
 
 jwt = JWTManager()
 cors = CORS()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
+revocation_cache = RevocationCache()
+revocation_bus = RevocationBus('admin_revocations')
+customer_revocation_bus = RevocationBus('customer_revocations')
+password_hasher = PasswordHasher()
+login_limiter = LoginRateLimiter()
@@ -10,8 +10,7 @@ Admin
     A database model for storing admin-related information.
 """
 
-from werkzeug.security import generate_password_hash, check_password_hash
-from admin.src.extensions import db
+from admin.src.extensions import db, password_hasher
 from admin.src.utils.utils import get_utc_now
 
 
@@ -81,7 +80,7 @@ class Admin(db.Model):
         password : str
             The plain-text password to hash.
         """
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
         """
@@ -97,7 +96,7 @@ class Admin(db.Model):
         bool
             `True` if the password matches, `False` otherwise.
         """
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
     def to_dict(self) -> dict:
         """
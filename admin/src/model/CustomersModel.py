@@ -10,8 +10,9 @@ Customer
     A database model for storing customer-related information.
 """
 
-from werkzeug.security import generate_password_hash, check_password_hash
-from admin.src.extensions import db
+from sqlalchemy.orm import deferred
+from admin.src.extensions import db, password_hasher
+from shared.indexes import customer_indexes
 from admin.src.utils.utils import get_utc_now
 
 
@@ -53,6 +54,8 @@ class Customer(db.Model):
         List of items associated with the customer.
     created_at : datetime
         Timestamp of the customer's account creation.
+    dict_fields : tuple of str
+        The fields returned by `to_dict`, in order.
 
     Methods
     -------
@@ -65,6 +68,7 @@ class Customer(db.Model):
     """
 
     __tablename__ = 'customers'
+    __table_args__ = customer_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(255), nullable=False, unique=True)
@@ -80,10 +84,27 @@ class Customer(db.Model):
     usd_balance = db.Column(db.Float, nullable=False, default=0)
     status = db.Column(db.String(255), nullable=False, default='active')
     last_logout = db.Column(db.DateTime, nullable=True)
-    items = db.Column(db.JSON, nullable=False, default=[])
+    # Never returned, so it is only loaded when accessed.
+    items = deferred(db.Column(db.JSON, nullable=False, default=[]))
 
     created_at = db.Column(db.DateTime, default=get_utc_now, nullable=False)
 
+    dict_fields = (
+        'id',
+        'username',
+        'email',
+        'first_name',
+        'last_name',
+        'phone',
+        'age',
+        'gender',
+        'marital_status',
+        'lbp_balance',
+        'usd_balance',
+        'status',
+        'created_at',
+    )
+
     def set_password(self, password: str) -> None:
         """
         Hashes and sets the customer's password.
@@ -93,7 +114,7 @@ class Customer(db.Model):
         password : str
             The plain-text password to hash.
         """
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
         """
@@ -109,7 +130,7 @@ class Customer(db.Model):
         bool
             `True` if the password matches, `False` otherwise.
         """
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
     def to_dict(self) -> dict:
         """
@@ -120,18 +141,4 @@ class Customer(db.Model):
         dict
             A dictionary representation of the customer's attributes.
         """
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'phone': self.phone,
-            'age': self.age,
-            'gender': self.gender,
-            'marital_status': self.marital_status,
-            'lbp_balance': self.lbp_balance,
-            'usd_balance': self.usd_balance,
-            'status': self.status,
-            'created_at': self.created_at
-        }
+        return {field: getattr(self, field) for field in self.dict_fields}
@@ -0,0 +1,37 @@
+"""
+admin.models
+============
+
+This module defines the `PurchaseHistory` class, which records which items each customer has purchased.
+
+The table is kept up to date by the sales service; the admin service only
+updates it when it reverses a transaction.
+
+Classes
+-------
+PurchaseHistory
+    A database model for counting the purchases of an item by a customer.
+"""
+
+from admin.src.extensions import db
+
+
+class PurchaseHistory(db.Model):
+    """
+    A database model recording the purchases of an item by a customer.
+
+    Attributes
+    ----------
+    customer_id : int
+        ID of the customer (part of the primary key).
+    item_id : int
+        ID of the purchased item (part of the primary key).
+    purchase_count : int
+        Number of completed, non-reversed transactions containing the item.
+    """
+
+    __tablename__ = 'purchase_history'
+
+    customer_id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    purchase_count = db.Column(db.Integer, nullable=False, default=0)
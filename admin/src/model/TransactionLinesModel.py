@@ -0,0 +1,66 @@
+"""
+admin.models
+============
+
+This module defines the `TransactionLine` class, which represents one purchased item of a transaction.
+
+Classes
+-------
+TransactionLine
+    A database model for storing the items and quantities of a transaction.
+"""
+
+from admin.src.extensions import db
+from shared.indexes import transaction_line_indexes
+
+
+class TransactionLine(db.Model):
+    """
+    A database model representing one purchased item of a transaction.
+
+    Attributes
+    ----------
+    id : int
+        Unique identifier for the line.
+    transaction_id : int
+        The ID of the transaction the line belongs to.
+    item_id : int
+        The ID of the purchased item.
+    quantity : int
+        The purchased quantity.
+    unit_price : float
+        The item's price per unit at the time of purchase.
+    currency : str
+        The currency of `unit_price`.
+
+    Methods
+    -------
+    to_dict()
+        Converts the line's attributes to a dictionary format.
+    """
+
+    __tablename__ = 'transaction_lines'
+    __table_args__ = transaction_line_indexes()
+
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id', ondelete='CASCADE'), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(255), nullable=False)
+
+    def to_dict(self) -> dict:
+        """
+        Converts the line's attributes to a dictionary format.
+
+        Returns
+        -------
+        dict
+            A dictionary representation of the line's attributes.
+        """
+        return {
+            'item_id': self.item_id,
+            'quantity': self.quantity,
+            'unit_price': self.unit_price,
+            'currency': self.currency
+        }
@@ -11,6 +11,9 @@ Transaction
 """
 
 from admin.src.extensions import db
+from admin.src.model.TransactionLinesModel import TransactionLine
+from admin.src.utils.utils import get_utc_now
+from shared.indexes import transaction_indexes
 
 
 class Transaction(db.Model):
@@ -23,16 +26,16 @@ class Transaction(db.Model):
         Unique identifier for the transaction.
     customer_id : int
         The ID of the customer associated with the transaction.
-    items : JSON
-        A list of items involved in the transaction.
-    items_quantities : JSON
-        A list of quantities corresponding to the items in the transaction.
     lbp_total_price : float
         The total price of the transaction in Lebanese Pounds (LBP).
     usd_total_price : float
         The total price of the transaction in US Dollars (USD).
     status : str
         The status of the transaction (e.g., 'completed').
+    created_at : datetime
+        Timestamp of the transaction's creation.
+    lines : list of TransactionLine
+        The items and quantities purchased in the transaction.
 
     Methods
     -------
@@ -41,14 +44,15 @@ class Transaction(db.Model):
     """
 
     __tablename__ = 'transactions'
+    __table_args__ = transaction_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, nullable=False)
-    items = db.Column(db.JSON, nullable=False, default=[])
-    items_quantities = db.Column(db.JSON, nullable=False, default=[])
     lbp_total_price = db.Column(db.Float, nullable=False)
     usd_total_price = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(255), nullable=False, default='completed')
+    created_at = db.Column(db.DateTime, default=get_utc_now, nullable=False)
+    lines = db.relationship(TransactionLine, lazy='selectin', order_by=TransactionLine.id)
 
     def to_dict(self) -> dict:
         """
@@ -62,9 +66,9 @@ class Transaction(db.Model):
         return {
             'id': self.id,
             'customer_id': self.customer_id,
-            'items': self.items,
-            'items_quantities': self.items_quantities,
+            'lines': [line.to_dict() for line in self.lines],
             'lbp_total_price': self.lbp_total_price,
             'usd_total_price': self.usd_total_price,
-            'status': self.status
+            'status': self.status,
+            'created_at': self.created_at
         }
@@ -1,8 +1,13 @@
+import json
 import pytest
 from flask_jwt_extended import create_access_token
 from admin.app import create_app
 from admin.src.extensions import db
+from datetime import datetime
 from admin.src.model.CustomersModel import Customer
+from admin.src.model.PurchaseHistoryModel import PurchaseHistory
+from admin.src.model.TransactionsModel import Transaction
+from admin.src.model.TransactionLinesModel import TransactionLine
 
 
 @pytest.fixture
@@ -79,3 +84,134 @@ def test_ban_customer(client, auth_headers):
     response = client.put('/admin/customers/ban_customer', json=data, headers=auth_headers)
     assert response.status_code == 200
     assert response.json['message'] == 'Customer banned successfully'
+
+
+def test_get_all_customers_selects_only_returned_columns(app, client, auth_headers):
+    from sqlalchemy import event
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/admin/customers/get_all_customers', headers=auth_headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    assert response.json[0]['username'] == 'testcustomer'
+    assert set(response.json[0]) == set(Customer.dict_fields)
+    selects = [statement for statement in statements if 'FROM customers' in statement]
+    assert selects
+    assert all('password' not in statement and 'items' not in statement for statement in selects)
+
+
+def test_get_all_customers_follows_the_cursor(client, auth_headers):
+    for index in (2, 3):
+        customer = Customer(
+            username=f'customer{index}', email=f'customer{index}@example.com', first_name='Test',
+            last_name='Customer', phone=f'1234567{index}', age=30, gender='male', marital_status='single'
+        )
+        customer.set_password('password123')
+        db.session.add(customer)
+    db.session.commit()
+
+    response = client.get('/admin/customers/get_all_customers', headers=auth_headers)
+    assert [customer['id'] for customer in response.json] == [1, 2, 3]
+    assert 'X-Next-Cursor' not in response.headers
+
+    ids = []
+    url = '/admin/customers/get_all_customers?limit=2'
+    while url:
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        ids += [customer['id'] for customer in response.json]
+        cursor = response.headers.get('X-Next-Cursor')
+        url = cursor and f'/admin/customers/get_all_customers?limit=2&after={cursor}'
+    assert ids == [1, 2, 3]
+
+    response = client.get('/admin/customers/get_all_customers?format=ndjson&after=1', headers=auth_headers)
+    assert [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()] == [2, 3]
+
+
+@pytest.fixture
+def transactions(app, auth_headers):
+    for day, status, lines in ((1, 'completed', [(1, 2), (2, 1)]), (2, 'reversed', [(1, 1)]), (3, 'completed', [])):
+        transaction = Transaction(
+            customer_id=1, lbp_total_price=0, usd_total_price=10.0 * day, status=status,
+            created_at=datetime(2024, 5, day, 12, 30),
+        )
+        db.session.add(transaction)
+        db.session.flush()
+        for item_id, quantity in lines:
+            db.session.add(TransactionLine(transaction_id=transaction.id, item_id=item_id, quantity=quantity, unit_price=5.0, currency='USD'))
+    db.session.commit()
+
+
+def test_reverse_transaction_forgets_the_purchases(client, auth_headers, transactions):
+    db.session.add_all([
+        PurchaseHistory(customer_id=1, item_id=1, purchase_count=1),
+        PurchaseHistory(customer_id=1, item_id=2, purchase_count=1),
+    ])
+    db.session.commit()
+
+    response = client.put('/admin/customers/reverse_transaction', json={'transaction_id': 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert db.session.get(Transaction, 1).status == 'reversed'
+    assert [row.purchase_count for row in PurchaseHistory.query.order_by(PurchaseHistory.item_id)] == [0, 0]
+
+    response = client.put('/admin/customers/reverse_transaction', json={'transaction_id': 1}, headers=auth_headers)
+    assert response.status_code == 400
+    assert [row.purchase_count for row in PurchaseHistory.query.order_by(PurchaseHistory.item_id)] == [0, 0]
+
+
+def test_get_customer_transactions_pages_transactions(client, auth_headers, transactions):
+    response = client.post('/admin/customers/get_customer_transactions?limit=2', json={'customer_id': 1}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [transaction['id'] for transaction in response.json] == [1, 2]
+    assert response.json[0]['lines'] == [
+        {'item_id': 1, 'quantity': 2, 'unit_price': 5.0, 'currency': 'USD'},
+        {'item_id': 2, 'quantity': 1, 'unit_price': 5.0, 'currency': 'USD'},
+    ]
+    assert response.headers['X-Next-Cursor'] == '2'
+
+    response = client.post('/admin/customers/get_customer_transactions?limit=2&after=2', json={'customer_id': 1}, headers=auth_headers)
+    assert [transaction['id'] for transaction in response.json] == [3]
+    assert 'X-Next-Cursor' not in response.headers
+
+    response = client.post('/admin/customers/get_customer_transactions', json={'customer_id': 42}, headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_export_transactions_csv_has_a_row_per_line(client, auth_headers, transactions):
+    response = client.get('/admin/customers/export_transactions', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == 'transaction_id,customer_id,created_at,status,lbp_total_price,usd_total_price,item_id,quantity,unit_price,currency'
+    assert lines[1] == '1,1,2024-05-01T12:30:00+00:00,completed,0.0,10.0,1,2,5.0,USD'
+    assert lines[4] == '3,1,2024-05-03T12:30:00+00:00,completed,0.0,30.0,,,,'
+    assert len(lines) == 5
+
+
+def test_export_transactions_ndjson_filters(client, auth_headers, transactions):
+    query = 'format=ndjson&since=2024-05-01T13:00:00&until=2024-05-03T00:00:00%2B00:00'
+    response = client.get(f'/admin/customers/export_transactions?{query}', headers=auth_headers)
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [(row['id'], row['status'], len(row['lines'])) for row in rows] == [(2, 'reversed', 1)]
+
+    response = client.get('/admin/customers/export_transactions?status=completed&format=ndjson', headers=auth_headers)
+    assert [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()] == [1, 3]
+
+    response = client.get('/admin/customers/export_transactions?format=xml', headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_export_transactions_cli(app, transactions, tmp_path):
+    output = tmp_path / 'transactions.csv'
+    result = app.test_cli_runner().invoke(args=['export-transactions', '--customer-id', '1', '--status', 'reversed', '--output', str(output)])
+    assert result.exit_code == 0, result.output
+    assert output.read_text().splitlines()[1:] == ['2,1,2024-05-02T12:30:00+00:00,reversed,0.0,20.0,1,1,5.0,USD']
+
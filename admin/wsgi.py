@@ -0,0 +1,3 @@
+from admin.app import create_app
+
+app = create_app()
@@ -0,0 +1,126 @@
+"""
+benchmarks.bench_json
+=====================
+
+Measures the time to encode list responses with each JSON provider.
+
+The rows are built with the `to_dict` of the service models, so they have
+the shape and types of the real list endpoints: items as returned by
+``get_all_items``, customers (with their ``created_at`` datetime) as
+returned by ``get_all_customers``, and reviews as returned by
+``get_all_reviews``. Only the encoding is timed. The providers are:
+
+- ``flask``: Flask's default provider, the standard library with sorted keys.
+- ``fast-json``: `FastJSONProvider` with its standard library fallback.
+- ``fast-orjson``: `FastJSONProvider` with orjson, when it is installed.
+
+The figures are the median milliseconds to encode 10,000 rows and the size
+of the encoded document.
+
+Usage
+-----
+    python -m benchmarks.bench_json
+    python -m benchmarks.bench_json --rows 100000 --repeat 10
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from customers.src.model.CustomersModel import Customer
+from reviews.src.model.ReviewsModel import Review
+from sales.src.model.ItemsModel import Item
+from shared.json_provider import FastJSONProvider, orjson
+
+
+def item_rows(count, rng):
+    return [
+        Item(
+            id=n, name=f'Item {n}', category=rng.choice(('food', 'clothes', 'electronics')),
+            price_per_unit=round(rng.uniform(1, 2000), 2), currency=rng.choice(('USD', 'LBP')),
+            quantity=rng.randint(0, 500), description=f'Description of item {n}',
+        ).to_dict()
+        for n in range(1, count + 1)
+    ]
+
+
+def customer_rows(count, rng):
+    start = datetime(2024, 1, 1)
+    return [
+        Customer(
+            id=n, username=f'customer{n}', email=f'customer{n}@example.com', first_name='First',
+            last_name='Last', phone=f'+961 70 {n:06d}', age=rng.randint(18, 80), gender=rng.choice(('male', 'female')),
+            marital_status='single', lbp_balance=rng.randint(0, 10 ** 8), usd_balance=rng.randint(0, 10 ** 5),
+            status='active', created_at=start + timedelta(seconds=rng.randint(0, 10 ** 7), microseconds=rng.randint(0, 999999)),
+        ).to_dict()
+        for n in range(1, count + 1)
+    ]
+
+
+def review_rows(count, rng):
+    return [
+        Review(
+            id=n, customer_id=rng.randint(1, 1000), item_id=rng.randint(1, 500), rating=rng.randint(1, 5),
+            comment='Good value for the price',
+        ).to_dict()
+        for n in range(1, count + 1)
+    ]
+
+
+def providers(app):
+    flask_provider = DefaultJSONProvider(app)
+    fallback = FastJSONProvider(app)
+    fallback.backend = 'json'
+    result = [
+        # The separators of Flask's non-debug responses.
+        ('flask', lambda rows: flask_provider.dumps(rows, separators=(',', ':')).encode()),
+        ('fast-json', fallback.dumps_bytes),
+    ]
+    if orjson is not None:
+        result.append(('fast-orjson', FastJSONProvider(app).dumps_bytes))
+    return result
+
+
+def measure(encode, rows, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        document = encode(rows)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(document)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000, help='rows per list')
+    parser.add_argument('--repeat', type=int, default=5, help='encodings per provider')
+    parser.add_argument('--seed', type=int, default=435)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    lists = [
+        ('items', item_rows(args.rows, rng)),
+        ('customers', customer_rows(args.rows, rng)),
+        ('reviews', review_rows(args.rows, rng)),
+    ]
+    app = Flask(__name__)
+
+    if orjson is None:
+        print('orjson is not installed, only the standard library providers are measured')
+    print(f'{"rows":<10} {"provider":<12} {"ms / 10k rows":>14} {"speedup":>8} {"size (KB)":>10}')
+    for name, rows in lists:
+        baseline = None
+        for provider, encode in providers(app):
+            elapsed, size = measure(encode, rows, args.repeat)
+            per_10k = elapsed * 1000 * 10000 / len(rows)
+            baseline = baseline or per_10k
+            print(f'{name:<10} {provider:<12} {per_10k:>14.2f} {baseline / per_10k:>7.1f}x {size / 1024:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
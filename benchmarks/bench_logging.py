@@ -0,0 +1,124 @@
+"""
+benchmarks.bench_logging
+========================
+
+Compares the request-thread cost of the previous synchronous logging setup
+with the queue pipeline of `shared.logger`.
+
+Each simulated request logs what a typical service call logs: an entry line,
+a line with arguments and an exit line. The scenarios are:
+
+- ``sync``: the previous setup. A `FileHandler` on the request thread at
+  ``DEBUG``, with messages built as f-strings.
+- ``queue-debug``: the queue pipeline at ``DEBUG`` with lazy arguments, so
+  the same lines are written.
+- ``queue-info``: the queue pipeline at the default ``INFO`` level, where the
+  entry and exit lines are discarded before formatting.
+
+The figures are requests per second across `--threads` threads, the p99
+latency of a request on its own thread, and the time the listener needed
+to drain its queue afterwards.
+
+Usage
+-----
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --requests 50000 --threads 16
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from shared.logger import LOG_FORMAT, configure_logging, stop_logging
+
+logger = logging.getLogger('bench_logging')
+
+
+def sync_request(item_id, quantity):
+    logger.debug(f'Enter purchase service')
+    logger.info(f'Item {item_id} has only {quantity} left in stock')
+    logger.debug(f'Exit purchase service')
+
+
+def lazy_request(item_id, quantity):
+    logger.debug('Enter purchase service')
+    logger.info('Item %s has only %s left in stock', item_id, quantity)
+    logger.debug('Exit purchase service')
+
+
+def setup_sync(path):
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    root.addHandler(handler)
+
+    def teardown():
+        root.removeHandler(handler)
+        handler.close()
+    return teardown
+
+
+def setup_queue(path, level):
+    configure_logging(level=level, log_file=path, console=False)
+    return stop_logging
+
+
+def run(request, requests, threads):
+    latencies = [[] for _ in range(threads)]
+    per_thread = requests // threads
+
+    def worker(index):
+        timings = latencies[index]
+        for i in range(per_thread):
+            start = time.perf_counter()
+            request(i, i % 7)
+            timings.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    timings = sorted(t for thread_timings in latencies for t in thread_timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    return per_thread * threads / elapsed, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000, help='simulated requests per scenario')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent request threads')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per scenario')
+    args = parser.parse_args()
+
+    scenarios = [
+        ('sync', sync_request, lambda path: setup_sync(path)),
+        ('queue-debug', lazy_request, lambda path: setup_queue(path, 'DEBUG')),
+        ('queue-info', lazy_request, lambda path: setup_queue(path, 'INFO')),
+    ]
+
+    print(f'{"scenario":<12} {"requests/s":>12} {"p99 (us)":>10} {"drain (ms)":>11}')
+    with tempfile.TemporaryDirectory() as directory:
+        for name, request, setup in scenarios:
+            results = []
+            for attempt in range(args.repeat):
+                teardown = setup(os.path.join(directory, f'{name}-{attempt}.log'))
+                throughput, p99 = run(request, args.requests, args.threads)
+                start = time.perf_counter()
+                teardown()
+                results.append((throughput, p99, time.perf_counter() - start))
+            throughput = statistics.median(r[0] for r in results)
+            p99 = statistics.median(r[1] for r in results)
+            drain = statistics.median(r[2] for r in results)
+            print(f'{name:<12} {throughput:>12.0f} {p99 * 1e6:>10.1f} {drain * 1000:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
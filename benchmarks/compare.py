@@ -0,0 +1,76 @@
+"""
+benchmarks.compare
+==================
+
+Compares two JSON benchmark reports and fails on regressions.
+
+An endpoint regresses when a latency percentile in `--metric` grows, or its
+requests per second shrink, by more than `--threshold` relative to the
+baseline. Endpoints missing from either report are listed but do not fail.
+The exit status is 1 when anything regressed, so CI can gate on it.
+
+Usage
+-----
+    python -m benchmarks.compare baseline.json current.json
+    python -m benchmarks.compare baseline.json current.json --threshold 0.2 --metric p99_ms
+"""
+
+import argparse
+import json
+import sys
+
+HIGHER_IS_BETTER = {'requests_per_second'}
+
+
+def load(path):
+    with open(path) as report:
+        return json.load(report)
+
+
+def compare(baseline, current, metrics, threshold):
+    rows, regressions = [], []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        before = baseline['results'].get(name)
+        after = current['results'].get(name)
+        if before is None or after is None:
+            rows.append((name, None, None, None, None, 'added' if before is None else 'removed'))
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            verdict = 'regressed' if worse > threshold else ''
+            if verdict:
+                regressions.append((name, metric))
+            rows.append((name, metric, old, new, change, verdict))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--metric', action='append', help='metric to compare, may be repeated (p95_ms and requests_per_second by default)')
+    parser.add_argument('--threshold', type=float, default=0.1, help='tolerated relative change')
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    if baseline.get('benchmark') != current.get('benchmark'):
+        parser.error(f'cannot compare a {baseline.get("benchmark")} report with a {current.get("benchmark")} report')
+
+    rows, regressions = compare(baseline, current, args.metric or ['p95_ms', 'requests_per_second'], args.threshold)
+    print(f'{"endpoint":<28} {"metric":<20} {"baseline":>10} {"current":>10} {"change":>8}')
+    for name, metric, old, new, change, verdict in rows:
+        if metric is None:
+            print(f'{name:<28} {verdict}')
+            continue
+        print(f'{name:<28} {metric:<20} {old:>10.2f} {new:>10.2f} {change:>+8.1%} {verdict}')
+    if regressions:
+        print(f'{len(regressions)} regression(s) above {args.threshold:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
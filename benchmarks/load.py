@@ -0,0 +1,241 @@
+"""
+benchmarks.load
+===============
+
+A closed-loop load driver for running services.
+
+`--concurrency` workers send requests for `--duration` seconds. Each worker
+keeps one persistent HTTP connection per service and picks the next
+endpoint at random according to the weights of `--mix`. The driver reports
+requests per second and p50/p95/p99 latency per endpoint.
+
+The services must share a database seeded by `benchmarks.dataset`, for
+example with ``python -m benchmarks.bench_endpoints`` against the same URL,
+so that the ``customer<n>`` and ``admin1`` accounts exist with the dataset
+password. Every worker logs in once before the timed run.
+
+Endpoints
+---------
+customers.login, customers.get_customer_info, inventory.get_items,
+reviews.get_item_reviews, sales.purchase, sales.reverse_purchase,
+admin.get_customer_info
+
+A reversal needs a purchase of the same worker, so it is skipped until that
+worker has made one.
+
+Usage
+-----
+    python -m benchmarks.load --duration 60 --concurrency 32 --json load.json
+    python -m benchmarks.load --mix sales.purchase=3,inventory.get_items=1
+"""
+
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+from benchmarks.dataset import PASSWORD
+from benchmarks.report import build_report, print_table, summarize, write_report
+
+DEFAULT_MIX = {
+    'customers.login': 1,
+    'customers.get_customer_info': 10,
+    'inventory.get_items': 10,
+    'reviews.get_item_reviews': 20,
+    'sales.purchase': 10,
+    'sales.reverse_purchase': 3,
+    'admin.get_customer_info': 5,
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for entry in value.split(','):
+        name, _, weight = entry.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'unknown endpoint {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Client:
+    """Sends JSON requests over one persistent connection per service."""
+
+    def __init__(self, urls, timeout):
+        self.urls = urls
+        self.timeout = timeout
+        self.connections = {}
+
+    def connection(self, service):
+        if service not in self.connections:
+            url = urlsplit(self.urls[service])
+            factory = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+            self.connections[service] = factory(url.hostname, url.port, timeout=self.timeout)
+        return self.connections[service]
+
+    def request(self, service, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(body) if body is not None else None
+        connection = self.connection(service)
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            del self.connections[service]
+            raise
+        return response.status, data
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+
+
+class Schedule:
+    """Releases the workers together once they have all logged in."""
+
+    def __init__(self, workers, duration):
+        self.duration = duration
+        self.start = self.deadline = None
+        self.barrier = threading.Barrier(workers + 1, action=self.begin)
+
+    def begin(self):
+        self.start = time.monotonic()
+        self.deadline = self.start + self.duration
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, args, mix, schedule):
+        super().__init__(daemon=True)
+        self.args = args
+        self.rng = random.Random(args.seed + index)
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.schedule = schedule
+        self.client = Client(args.urls, args.timeout)
+        self.customer_id = index % args.users + 1
+        self.transactions = []
+        self.latencies = {name: [] for name in mix}
+        self.errors = {name: 0 for name in mix}
+
+    def login(self, service, path, identifier):
+        status, data = self.client.request(service, 'POST', path, {'identifier': identifier, 'password': self.args.password})
+        if status != 200:
+            raise RuntimeError(f'login of {identifier} on {service} failed with {status}: {data[:200]!r}')
+        return json.loads(data)['access']
+
+    def call(self, name):
+        item_id = self.rng.randint(1, self.args.items)
+        if name == 'customers.login':
+            body = {'identifier': f'customer{self.customer_id}', 'password': self.args.password}
+            return self.client.request('customers', 'POST', '/customers/login_customer', body)
+        if name == 'customers.get_customer_info':
+            return self.client.request('customers', 'POST', '/customers/get_customer_info', {}, self.customer_token)
+        if name == 'inventory.get_items':
+            return self.client.request('inventory', 'GET', '/inventory/get_items?limit=100', None, self.admin_token)
+        if name == 'reviews.get_item_reviews':
+            return self.client.request('reviews', 'POST', '/reviews/get_item_reviews', {'item_id': item_id}, self.customer_token)
+        if name == 'sales.purchase':
+            body = {'item_ids': [item_id], 'item_quantities': [1]}
+            status, data = self.client.request('sales', 'PUT', '/sales/purchase', body, self.customer_token)
+            if status == 200:
+                self.transactions.append(json.loads(data)['id'])
+            return status, data
+        if name == 'sales.reverse_purchase':
+            body = {'transaction_id': self.transactions.pop()}
+            return self.client.request('sales', 'PUT', '/sales/reverse_purchase', body, self.customer_token)
+        body = {'customer_id': self.rng.randint(1, self.args.users)}
+        return self.client.request('admin', 'POST', '/admin/customers/get_customer_info', body, self.admin_token)
+
+    def run(self):
+        try:
+            self.customer_token = self.login('customers', '/customers/login_customer', f'customer{self.customer_id}')
+            self.admin_token = self.login('admin', '/admin/login_admin', 'admin1')
+        except Exception:
+            self.schedule.barrier.abort()
+            raise
+        try:
+            self.schedule.barrier.wait()
+        except threading.BrokenBarrierError:
+            return
+        try:
+            while time.monotonic() < self.schedule.deadline:
+                name = self.rng.choices(self.names, self.weights)[0]
+                if name == 'sales.reverse_purchase' and not self.transactions:
+                    continue
+                start = time.perf_counter()
+                try:
+                    status, _ = self.call(name)
+                except (OSError, http.client.HTTPException):
+                    status = None
+                self.latencies[name].append(time.perf_counter() - start)
+                if status != 200:
+                    self.errors[name] += 1
+        finally:
+            self.client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--admin-url', default='http://localhost:5000')
+    parser.add_argument('--customers-url', default='http://localhost:5001')
+    parser.add_argument('--inventory-url', default='http://localhost:5002')
+    parser.add_argument('--reviews-url', default='http://localhost:5003')
+    parser.add_argument('--sales-url', default='http://localhost:5009')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent workers')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load')
+    parser.add_argument('--users', type=int, default=100, help='seeded customers the workers log in as')
+    parser.add_argument('--items', type=int, default=500, help='seeded items to pick from')
+    parser.add_argument('--password', default=PASSWORD, help='password of the seeded accounts')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX, help='endpoint weights, e.g. sales.purchase=3,inventory.get_items=1')
+    parser.add_argument('--timeout', type=float, default=30, help='seconds before a request fails')
+    parser.add_argument('--seed', type=int, default=435)
+    parser.add_argument('--json', help='path of the JSON report, or - for standard output')
+    args = parser.parse_args()
+    args.urls = {
+        'admin': args.admin_url,
+        'customers': args.customers_url,
+        'inventory': args.inventory_url,
+        'reviews': args.reviews_url,
+        'sales': args.sales_url,
+    }
+
+    schedule = Schedule(args.concurrency, args.duration)
+    workers = [Worker(index, args, args.mix, schedule) for index in range(args.concurrency)]
+    for worker in workers:
+        worker.start()
+    try:
+        schedule.barrier.wait()
+    except threading.BrokenBarrierError:
+        parser.exit(1, 'A worker could not log in; is the database seeded by benchmarks.dataset?\n')
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - schedule.start
+
+    results = {}
+    for name in args.mix:
+        latencies = [latency for worker in workers for latency in worker.latencies[name]]
+        errors = sum(worker.errors[name] for worker in workers)
+        results[name] = summarize(latencies, elapsed, errors)
+
+    print_table(results)
+    if args.json:
+        parameters = {
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'users': args.users,
+            'items': args.items,
+            'mix': args.mix,
+            'seed': args.seed,
+        }
+        write_report(build_report('load', parameters, results), args.json)
+
+
+if __name__ == '__main__':
+    main()
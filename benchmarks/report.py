@@ -0,0 +1,76 @@
+"""
+benchmarks.report
+=================
+
+Summarizes latency samples and writes benchmark reports.
+
+A report is a JSON object with the benchmark name, its parameters, the
+environment it ran in, and one result per endpoint. Each result holds the
+request count, errors, requests per second and latency percentiles in
+milliseconds. `benchmarks.compare` diffs two reports.
+"""
+
+import json
+import platform
+import statistics
+import sys
+from datetime import datetime, timezone
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered, value):
+    if not ordered:
+        return None
+    index = max(int(round(value / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(latencies, elapsed, errors=0):
+    ordered = sorted(latencies)
+    result = {
+        'requests': len(ordered),
+        'errors': errors,
+        'requests_per_second': len(ordered) / elapsed if elapsed else None,
+        'mean_ms': statistics.fmean(ordered) * 1000 if ordered else None,
+    }
+    for value in PERCENTILES:
+        sample = percentile(ordered, value)
+        result[f'p{value}_ms'] = sample * 1000 if sample is not None else None
+    return result
+
+
+def build_report(benchmark, parameters, results):
+    return {
+        'benchmark': benchmark,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': parameters,
+        'results': results,
+    }
+
+
+def write_report(report, path):
+    if path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w') as output:
+        json.dump(report, output, indent=2)
+
+
+def format_value(value, spec):
+    return format(value, spec) if value is not None else '-'
+
+
+def print_table(results, output=sys.stdout):
+    output.write(f'{"endpoint":<28} {"requests":>9} {"errors":>7} {"req/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}\n')
+    for name, result in results.items():
+        output.write(
+            f'{name:<28} {result["requests"]:>9} {result["errors"]:>7} '
+            f'{format_value(result["requests_per_second"], ">9.1f")} '
+            f'{format_value(result["p50_ms"], ">8.2f")} '
+            f'{format_value(result["p95_ms"], ">8.2f")} '
+            f'{format_value(result["p99_ms"], ">8.2f")}\n'
+        )
@@ -0,0 +1,24 @@
+"""Add customer lookup indexes
+
+Revision ID: 3f1c2a9b7d10
+Revises: 
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9b7d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_customers_status', 'customers', ['status'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_customers_status', table_name='customers', if_exists=True)
@@ -27,6 +27,7 @@ from marshmallow import ValidationError
 from customers.src.extensions import db
 from customers.src.utils.logger import logger
 from customers.src.utils.errors import AuthenticationError
+from shared.passwords import HasherBusy, TooManyAttempts
 
 from customers.src.api.v1.customers_schema import (
     RegisterCustomerSchema,
@@ -51,13 +52,13 @@ def register_customer():
     Response
         JSON response indicating success or error with appropriate HTTP status.
     """
-    logger.info('Enter register customer')
+    logger.debug('Enter register customer')
     data = request.get_json()
     schema = RegisterCustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in register customer: {e.messages}')
+        logger.info('Validation error in register customer: %s', e.messages)
         return jsonify({'error': f'Validation error in register customer: {e.messages}'}), 400
 
     service = CustomerService(db_session=db.session)
@@ -66,8 +67,10 @@ def register_customer():
         return jsonify(result), 201
     except BadRequest as e:
         return jsonify({'error': str(e)}), 400
+    except HasherBusy as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        logger.error(f'Internal server error in register customer: {e}')
+        logger.error('Internal server error in register customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -84,26 +87,31 @@ def login_customer():
     Response
         JSON response with the token or error message.
     """
-    logger.info('Enter login customer')
+    logger.debug('Enter login customer')
     data = request.get_json()
     schema = LoginCustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in login customer: {e.messages}')
+        logger.info('Validation error in login customer: %s', e.messages)
         return jsonify({'error': f'Validation error in login customer: {e.messages}'}), 400
 
     service = CustomerService(db_session=db.session)
     try:
         result = service.login_customer(data)
-        logger.info('Exit login customer successfully')
+        logger.debug('Exit login customer successfully')
         return jsonify(result), 200
+    except TooManyAttempts as e:
+        logger.info('Too many login attempts for customer: %s', data.get('identifier'))
+        return jsonify({'error': str(e)}), 429, {'Retry-After': str(e.retry_after)}
+    except HasherBusy as e:
+        return jsonify({'error': str(e)}), 503
     except AuthenticationError as e:
         return jsonify({'error': str(e)}), 403
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in login customer: {e}')
+        logger.error('Internal server error in login customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -118,7 +126,7 @@ def logout_customer():
     Response
         JSON response indicating success or error.
     """
-    logger.info('Enter logout customer')
+    logger.debug('Enter logout customer')
     customer_username = get_jwt_identity()
     service = CustomerService(db_session=db.session)
     try:
@@ -127,7 +135,7 @@ def logout_customer():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in logout customer: {e}')
+        logger.error('Internal server error in logout customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -142,13 +150,13 @@ def update_customer():
     Response
         JSON response indicating success or error with updated customer details.
     """
-    logger.info('Enter update customer')
+    logger.debug('Enter update customer')
     data = request.get_json()
     schema = UpdateCustomerSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in update customer: {e.messages}')
+        logger.info('Validation error in update customer: %s', e.messages)
         return jsonify({'error': f'Validation error in update customer: {e.messages}'}), 400
 
     customer_username = get_jwt_identity()
@@ -159,7 +167,7 @@ def update_customer():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in update customer: {e}')
+        logger.error('Internal server error in update customer: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -174,15 +182,15 @@ def get_customer_info():
     Response
         JSON response with the customer's details or error message.
     """
-    logger.info('Enter get customer info')
+    logger.debug('Enter get customer info')
     customer_username = get_jwt_identity()
     service = CustomerService(db_session=db.session)
     try:
         result = service.get_customer_info(customer_username)
-        logger.info('Exit get customer info successfully')
+        logger.debug('Exit get customer info successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in get customer info: {e}')
+        logger.error('Internal server error in get customer info: %s', e)
         return jsonify({'error': str(e)}), 500
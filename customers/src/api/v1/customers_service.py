@@ -17,6 +17,8 @@ from customers.src.utils.utils import get_utc_now, format_phone
 from customers.src.model.CustomersModel import Customer
 from customers.src.utils.errors import AuthenticationError
 from customers.src.utils.logger import logger
+from customers.src.extensions import revocation_cache, revocation_bus, password_hasher, login_limiter
+from shared.identifiers import find_by_identifier
 
 
 class CustomerService:
@@ -150,14 +152,9 @@ class CustomerService:
         NotFound
             If no customer is found with the given identifier.
         """
-        customer = (
-            self.get_customer_by_username(identifier) or
-            self.get_customer_by_email(identifier) or
-            self.get_customer_by_phone(identifier) or
-            self.get_customer_by_id(identifier)
-        )
+        customer = find_by_identifier(Customer.query, Customer, identifier)
         if not customer:
-            logger.info(f'Customer with identifier {identifier} not found')
+            logger.info('Customer with identifier %s not found', identifier)
             raise NotFound(f'Customer with identifier {identifier} not found')
         return customer
 
@@ -180,7 +177,7 @@ class CustomerService:
         BadRequest
             If the username, email, or phone number already exists.
         """
-        logger.info('Enter register customer service')
+        logger.debug('Enter register customer service')
         first_name = data.get('first_name')
         last_name = data.get('last_name')
         username = data.get('username')
@@ -191,20 +188,20 @@ class CustomerService:
         gender = data.get('gender')
         marital_status = data.get('marital_status')
 
-        logger.info(f'Register customer service: {first_name}, {last_name}, {username}, {password}, {email}, {phone}, {age}, {gender}, {marital_status}')
+        logger.info('Register customer service: username: %s, email: %s', username, email)
 
         if self.get_customer_by_username(username):
-            logger.info(f'Username {username} already exists')
+            logger.info('Username %s already exists', username)
             raise BadRequest(f'Username {username} already exists')
 
         if self.get_customer_by_email(email):
-            logger.info(f'Email {email} already exists')
+            logger.info('Email %s already exists', email)
             raise BadRequest(f'Email {email} already exists')
 
         phone = format_phone(phone)
 
         if self.get_customer_by_phone(phone):
-            logger.info(f'Phone number {phone} already exists')
+            logger.info('Phone number %s already exists', phone)
             raise BadRequest(f'Phone number {phone} already exists')
 
         customer = Customer(first_name=first_name, last_name=last_name, username=username, email=email, phone=phone, age=age, gender=gender, marital_status=marital_status)
@@ -216,8 +213,6 @@ class CustomerService:
 
         access_token = create_access_token(identity=customer.username)
         refresh_token = create_refresh_token(identity=customer.username)
-
-        logger.info(f'Access: {access_token}, Refresh: {refresh_token}')
         return {'access': access_token, 'refresh': refresh_token}
 
     def login_customer(self, data):
@@ -238,21 +233,29 @@ class CustomerService:
         ------
         AuthenticationError
             If the provided password is incorrect.
+        TooManyAttempts
+            If the identifier used up its login attempts.
         """
-        logger.info('Enter login customer service')
+        logger.debug('Enter login customer service')
         identifier = data.get('identifier')
         password = data.get('password')
 
+        login_limiter.attempt(identifier)
         customer = self.get_customer(identifier)
 
         if not customer.check_password(password):
-            logger.info(f'Invalid password for customer with username or email: {identifier}')
+            logger.info('Invalid password for customer with username or email: %s', identifier)
             raise AuthenticationError(f'Invalid password for customer with username or email: {identifier}')
+        login_limiter.reset(identifier)
+
+        if password_hasher.needs_rehash(customer.password):
+            logger.info('Rehashing password of customer %s with %s', customer.username, password_hasher.method)
+            customer.set_password(password)
+            self.db_session.commit()
+            password_hasher.record_rehash()
 
         access_token = create_access_token(identity=customer.username)
         refresh_token = create_refresh_token(identity=customer.username)
-
-        logger.info(f'Access: {access_token}, Refresh: {refresh_token}')
         return {'access': access_token, 'refresh': refresh_token}
 
     def logout_customer(self, customer_username):
@@ -269,10 +272,14 @@ class CustomerService:
         dict
             A message indicating successful logout.
         """
-        logger.info('Enter logout customer service')
+        logger.debug('Enter logout customer service')
         customer = self.get_customer(customer_username)
-        customer.last_logout = get_utc_now()
+        logout_time = get_utc_now()
+        customer.last_logout = logout_time
+        status = customer.status
         self.db_session.commit()
+        revocation_cache.invalidate(customer.username)
+        revocation_bus.publish(customer.username, logout_time.timestamp(), status)
         logger.info('Customer logged out successfully')
         return {'message': 'Customer logged out successfully'}
 
@@ -292,7 +299,7 @@ class CustomerService:
         dict
             A message indicating successful update.
         """
-        logger.info('Enter update customer service')
+        logger.debug('Enter update customer service')
         customer = self.get_customer(customer_username)
         for key, value in data.items():
             setattr(customer, key, value)
@@ -314,7 +321,7 @@ class CustomerService:
         dict
             A dictionary containing customer details.
         """
-        logger.info('Enter get customer info service')
+        logger.debug('Enter get customer info service')
         customer = self.get_customer(customer_username)
         logger.info('Customer info retrieved successfully')
         return customer.to_dict()
\ No newline at end of file
@@ -1,6 +1,8 @@
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
+from shared.engine import engine_options
+from shared.routing import replica_binds
 
 class Config:
     def __init__(self):
@@ -11,9 +13,31 @@ class Config:
         else:
             self.SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI_TEST', 'sqlite:///:memory:')
         self.SQLALCHEMY_TRACK_MODIFICATIONS = False
+        pool_options = dict(
+            application_name=os.getenv('DB_APPLICATION_NAME', 'customers'),
+            pool_size=int(os.getenv('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+            pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+            pool_pre_ping=os.getenv('DB_POOL_PRE_PING', '1') == '1',
+            statement_timeout=int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0)),
+        )
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options(self.SQLALCHEMY_DATABASE_URI, **pool_options)
+        self.SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+        self.SQLALCHEMY_BINDS = replica_binds(self.SQLALCHEMY_REPLICA_URI, **pool_options)
         self.JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_secret_key')
         self.JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 1800)))
         self.JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 86400)))
+        self.REVOCATION_CACHE_SIZE = int(os.getenv('REVOCATION_CACHE_SIZE', 10000))
+        self.REVOCATION_CACHE_TTL = float(os.getenv('REVOCATION_CACHE_TTL', 30))
+        self.REVOCATION_BACKEND = os.getenv('REVOCATION_BACKEND', 'none')
+        self.REVOCATION_SOCKET_DIR = os.getenv('REVOCATION_SOCKET_DIR')
+        self.PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+        self.PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+        self.PASSWORD_HASH_QUEUE_FACTOR = int(os.getenv('PASSWORD_HASH_QUEUE_FACTOR', 4))
+        self.PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+        self.LOGIN_RATE_LIMIT = int(os.getenv('LOGIN_RATE_LIMIT', 10))
+        self.LOGIN_RATE_WINDOW = float(os.getenv('LOGIN_RATE_WINDOW', 60))
 
 def get_config():
     return Config()
@@ -5,8 +5,9 @@ customers.models
 This module defines the `Customer` class, which represents customer data in the database.
 """
 
-from werkzeug.security import generate_password_hash, check_password_hash
-from customers.src.extensions import db
+from sqlalchemy.orm import deferred
+from customers.src.extensions import db, password_hasher
+from shared.indexes import customer_indexes
 from customers.src.utils.utils import get_utc_now
 
 class Customer(db.Model):
@@ -50,6 +51,7 @@ class Customer(db.Model):
     """
 
     __tablename__ = 'customers'
+    __table_args__ = customer_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(255), nullable=False, unique=True)
@@ -65,7 +67,8 @@ class Customer(db.Model):
     usd_balance = db.Column(db.Float, nullable=False, default=0)
     status = db.Column(db.String(255), nullable=False, default='active')
     last_logout = db.Column(db.DateTime, nullable=True)
-    items = db.Column(db.JSON, nullable=False, default=[])
+    # Never returned, so it is only loaded when accessed.
+    items = deferred(db.Column(db.JSON, nullable=False, default=[]))
 
     created_at = db.Column(db.DateTime, default=get_utc_now, nullable=False)
 
@@ -78,7 +81,7 @@ class Customer(db.Model):
         password : str
             Plain-text password to hash.
         """
-        self.password = generate_password_hash(password)
+        self.password = password_hasher.hash(password)
 
     def check_password(self, password: str) -> bool:
         """
@@ -94,7 +97,7 @@ class Customer(db.Model):
         bool
             `True` if the password matches, `False` otherwise.
         """
-        return check_password_hash(self.password, password)
+        return password_hasher.verify(self.password, password)
 
     def to_dict(self) -> dict:
         """
@@ -1,9 +1,12 @@
 import pytest
 from flask import Flask
 from flask_jwt_extended import create_access_token
-from customers.src.extensions import db
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from customers.src.extensions import db, login_limiter, password_hasher
 from customers.app import create_app
 from customers.src.model.CustomersModel import Customer
+from customers.src.api.v1.customers_service import CustomerService
 
 @pytest.fixture
 def app():
@@ -96,12 +99,112 @@ def test_login_customer_invalid_credentials(client, setup_database):
     assert "Invalid password for customer with username or email: testuser" in response.json["error"]
 
 
+def test_login_customer_is_rate_limited(app, client, setup_database):
+    """Test that repeated logins for one identifier are refused."""
+    app.config["LOGIN_RATE_LIMIT"] = 2
+    login_limiter.init_app(app)
+    data = {"identifier": "testuser", "password": "wrongpassword"}
+    assert client.post("/customers/login_customer", json=data).status_code == 403
+    assert client.post("/customers/login_customer", json=data).status_code == 403
+    response = client.post("/customers/login_customer", json=data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    data["password"] = "password123"
+    assert client.post("/customers/login_customer", json=data).status_code == 429
+
+
+def test_login_customer_rehashes_outdated_password(app, client, setup_database):
+    """Test that a password hashed with other parameters is rehashed on login."""
+    customer = Customer.query.filter_by(username="testuser").first()
+    customer.password = generate_password_hash("password123", method="pbkdf2:sha256:1000")
+    db.session.commit()
+
+    data = {"identifier": "testuser", "password": "password123"}
+    assert client.post("/customers/login_customer", json=data).status_code == 200
+    customer = Customer.query.filter_by(username="testuser").first()
+    assert customer.password.startswith(password_hasher.method + "$")
+    assert password_hasher.stats()["rehashes"] == 1
+    assert client.post("/customers/login_customer", json=data).status_code == 200
+
+
+def test_get_customer_resolves_identifiers_in_one_query(app, setup_database):
+    """Test that a customer is found by any identifier with a single query."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        service = CustomerService(db_session=db.session)
+        customer = service.get_customer("testuser")
+        assert len(statements) == 1
+        assert service.get_customer("testuser@example.com") is customer
+        assert service.get_customer(customer.phone) is customer
+        assert service.get_customer(str(customer.id)) is customer
+        assert len(statements) == 4
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
 def test_logout_customer(client, auth_headers):
     response = client.delete("/customers/logout_customer", headers=auth_headers)
     assert response.status_code == 200
     assert response.json["message"] == "Customer logged out successfully"
 
 
+def test_logout_revokes_existing_token(client, auth_headers):
+    response = client.post("/customers/get_customer_info", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.delete("/customers/logout_customer", headers=auth_headers)
+    assert response.status_code == 200
+
+    response = client.post("/customers/get_customer_info", headers=auth_headers)
+    assert response.status_code == 401
+    assert response.json["message"] == "Token has been revoked"
+
+
+def test_revocation_check_is_cached(client, auth_headers):
+    client.post("/customers/get_customer_info", headers=auth_headers)
+    client.post("/customers/get_customer_info", headers=auth_headers)
+    stats = client.get("/metrics").json["revocation_cache"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_logout_event_revokes_token_from_memory(monkeypatch):
+    monkeypatch.setenv("REVOCATION_BACKEND", "inprocess")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        customer = Customer(
+            username="busyuser",
+            email="busyuser@example.com",
+            first_name="Busy",
+            last_name="User",
+            phone="71000001",
+            age=30,
+            gender="female",
+            marital_status="single",
+        )
+        customer.set_password("password123")
+        db.session.add(customer)
+        db.session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token(identity='busyuser')}"}
+        client = app.test_client()
+
+        assert client.delete("/customers/logout_customer", headers=headers).status_code == 200
+        response = client.post("/customers/get_customer_info", headers=headers)
+        assert response.status_code == 401
+
+        metrics = client.get("/metrics").json
+        assert metrics["revocation_cache"]["misses"] == 0
+        assert metrics["revocation_bus"]["subjects"] == 1
+        db.session.remove()
+        db.drop_all()
+
+
 def test_update_customer(client, auth_headers):
     data = {"first_name": "UpdatedName"}
     response = client.put("/customers/update_customer", json=data, headers=auth_headers)
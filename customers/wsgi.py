@@ -0,0 +1,3 @@
+from customers.app import create_app
+
+app = create_app()
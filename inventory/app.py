@@ -1,37 +1,59 @@
 import os
-import sys
-
-# Dynamically add the project's base directory to PYTHONPATH
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))  # Get the absolute path to the directory containing app.py
-sys.path.append(BASE_DIR)  # Add this directory to sys.path
 
 from flask import Flask, jsonify
-from src.api.v1.inventory_controllers import inventory_bp
-from src.extensions import db, migrate, jwt, cors
-from src.utils.logger import logger
-from src.config import get_config
 
 
 def create_app():
+    # Extensions, models and blueprints are imported here rather than at module
+    # level, so that importing this module stays cheap and touches no database.
+    from inventory.src.config import get_config
+    from inventory.src.extensions import db, migrate, jwt, cors, revocation_cache, revocation_bus
+    from inventory.src.utils.logger import logger
+    from shared.engine import pool_stats
+    from shared.json_provider import FastJSONProvider
+    from inventory.src import token_management  # noqa: F401 (registers the JWT callbacks)
+    from inventory.src.api.v1.inventory_controllers import inventory_bp
+
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(get_config())
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, version_table='alembic_version_inventory')
     jwt.init_app(app)
+    revocation_cache.init_app(app)
+    revocation_bus.init_app(app)
     cors.init_app(app)
 
     app.register_blueprint(inventory_bp)
-    return app
 
-app = create_app()
+    @app.route('/')
+    def index():
+        logger.debug('Enter index')
+        return jsonify({'message': 'Inventory API'}), 200
+
+    @app.route('/metrics')
+    def metrics():
+        return jsonify({
+            'revocation_cache': revocation_cache.stats(),
+            'revocation_bus': revocation_bus.stats(),
+            'db_pool': pool_stats(db.engine),
+        }), 200
 
-@app.route('/')
-def index():
-    logger.info('Enter index')
-    return jsonify({'message': 'Inventory API'}), 200
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the tables of this service's models that do not exist yet."""
+        db.create_all()
+
+    @app.cli.command('setup-db')
+    def setup_db():
+        """Create the schema of a new database, or apply the pending migrations."""
+        from shared.schema import setup_schema
+
+        result = setup_schema(db, os.path.join(os.path.dirname(__file__), 'migrations'), base_table='items')
+        logger.info('Database schema %s', result)
+
+    return app
 
-with app.app_context():
-    db.create_all()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5002, debug=True)
+    create_app().run(host='0.0.0.0', port=5002, debug=True)
@@ -0,0 +1,24 @@
+"""Add item lookup indexes
+
+Revision ID: 8a4e6d2c1b57
+Revises: 
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c1b57'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_items_category', 'items', ['category'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_items_category', table_name='items', if_exists=True)
@@ -0,0 +1,31 @@
+"""Add the catalog_version counter
+
+Revision ID: d4c19e7a3b62
+Revises: 8a4e6d2c1b57
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4c19e7a3b62'
+down_revision = '8a4e6d2c1b57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'catalog_version',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.execute('INSERT INTO catalog_version (id, version) SELECT 1, 1 WHERE NOT EXISTS (SELECT 1 FROM catalog_version)')
+
+
+def downgrade():
+    op.drop_table('catalog_version')
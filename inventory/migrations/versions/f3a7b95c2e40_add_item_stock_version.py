@@ -0,0 +1,32 @@
+"""Add the per-item stock_version
+
+Revision ID: f3a7b95c2e40
+Revises: d4c19e7a3b62
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7b95c2e40'
+down_revision = 'd4c19e7a3b62'
+branch_labels = None
+depends_on = None
+
+
+def item_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('items')}
+
+
+def upgrade():
+    if 'stock_version' not in item_columns():
+        op.add_column('items', sa.Column('stock_version', sa.Integer(), nullable=False, server_default='0'))
+    # Stock changes no longer increment the catalog counter; the unused fields counter goes.
+    op.execute('DELETE FROM catalog_version WHERE id = 2')
+
+
+def downgrade():
+    with op.batch_alter_table('items') as batch_op:
+        batch_op.drop_column('stock_version')
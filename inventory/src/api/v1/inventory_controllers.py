@@ -3,11 +3,14 @@ from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 from werkzeug.exceptions import NotFound, BadRequest
 
-from src.extensions import db
-from src.utils.logger import logger
+from inventory.src.extensions import db
+from inventory.src.utils.logger import logger
+from shared.catalog import conditional_response
+from shared.pagination import load_pagination_args, page_response, ndjson_response
+from shared.uploads import iter_records, upload_format
 
-from src.api.v1.inventory_service import InventoryService
-from src.api.v1.inventory_schema import AddItemSchema, RestockItemSchema, UpdateItemSchema, ItemSchema, CategorySchema
+from inventory.src.api.v1.inventory_service import InventoryService
+from inventory.src.api.v1.inventory_schema import AddItemSchema, RestockItemSchema, UpdateItemSchema, ItemSchema, CategorySchema
 
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
@@ -15,36 +18,36 @@ inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
 @inventory_bp.route('/add_item', methods=['POST'])
 def add_item():
-    logger.info('Enter add item')
+    logger.debug('Enter add item')
     data = request.get_json()
     schema = AddItemSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in add item: {e.messages}')
+        logger.info('Validation error in add item: %s', e.messages)
         return jsonify({'error': f'Validation error in add item: {e.messages}'}), 400
     
     service = InventoryService(db_session=db.session)
     try:
         result = service.add_item(data)
-        logger.info('Exit add item successfully')
+        logger.debug('Exit add item successfully')
         return jsonify(result), 200
     except BadRequest as e:
         return jsonify({'error': str(e)}), 408
     except Exception as e:
-        logger.error(f'Internal server error in add item: {e}')
+        logger.error('Internal server error in add item: %s', e)
         return jsonify({'error': str(e)}), 500
     
 @inventory_bp.route('/restock_item', methods=['POST'])
 @jwt_required()
 def restock_item():
-    logger.info('Enter restock item')
+    logger.debug('Enter restock item')
     data = request.get_json()
     schema = RestockItemSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in restock item: {e.messages}')
+        logger.info('Validation error in restock item: %s', e.messages)
         return jsonify({'error': f'Validation error in restock item: {e.messages}'}), 400
     
     service = InventoryService(db_session=db.session)
@@ -54,19 +57,48 @@ def restock_item():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in restock item: {e}')
+        logger.error('Internal server error in restock item: %s', e)
         return jsonify({'error': str(e)}), 500
 
+def upload_response(action, process):
+    fmt = upload_format(request.mimetype)
+    if not fmt:
+        logger.info('Unsupported upload type in %s: %s', action, request.mimetype)
+        return jsonify({'error': f'Unsupported upload type {request.mimetype}, send text/csv or application/x-ndjson'}), 415
+
+    try:
+        result = process(iter_records(request.stream, fmt))
+        logger.debug('Exit %s successfully', action)
+        # An aborted upload keeps the batches committed before it, so it only fails when none were.
+        return jsonify(result), 400 if 'error' in result and not result['processed'] else 200
+    except Exception as e:
+        logger.error('Internal server error in %s: %s', action, e)
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/import_items', methods=['POST'])
+@jwt_required()
+def import_items():
+    logger.debug('Enter import items')
+    service = InventoryService(db_session=db.session)
+    return upload_response('import items', service.import_items)
+
+@inventory_bp.route('/restock_items', methods=['POST'])
+@jwt_required()
+def restock_items():
+    logger.debug('Enter restock items')
+    service = InventoryService(db_session=db.session)
+    return upload_response('restock items', service.restock_items)
+
 @inventory_bp.route('/update_item', methods=['PUT'])
 @jwt_required()
 def update_item():
-    logger.info('Enter update item')
+    logger.debug('Enter update item')
     data = request.get_json()
     schema = UpdateItemSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in update item: {e.messages}')
+        logger.info('Validation error in update item: %s', e.messages)
         return jsonify({'error': f'Validation error in update item: {e.messages}'}), 400
     
     service = InventoryService(db_session=db.session)
@@ -76,19 +108,19 @@ def update_item():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in update item: {e}')
+        logger.error('Internal server error in update item: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @inventory_bp.route('/delete_item', methods=['DELETE'])
 @jwt_required()
 def delete_item():
-    logger.info('Enter delete item')
+    logger.debug('Enter delete item')
     data = request.get_json()
     schema = ItemSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in delete item: {e.messages}')
+        logger.info('Validation error in delete item: %s', e.messages)
         return jsonify({'error': f'Validation error in delete item: {e.messages}'}), 400
     
     service = InventoryService(db_session=db.session)
@@ -98,56 +130,69 @@ def delete_item():
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in delete item: {e}')
+        logger.error('Internal server error in delete item: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @inventory_bp.route('/get_item', methods=['POST'])
 @jwt_required()
 def get_item():
-    logger.info('Enter get item')
+    logger.debug('Enter get item')
     data = request.get_json()
     schema = ItemSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in get item: {e.messages}')
+        logger.info('Validation error in get item: %s', e.messages)
         return jsonify({'error': f'Validation error in get item: {e.messages}'}), 400
 
     item_id = data.get('item_id')
     name = data.get('name')
     service = InventoryService(db_session=db.session)
     try:
-        result = service.get_item(item_id, name)
-        return jsonify(result.to_dict()), 200  # Convert the result to a dictionary
+        version = service.get_item_version(item_id, name)
+        return conditional_response(version, lambda: (jsonify(service.get_item(item_id, name).to_dict()), 200))
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.error(f'Internal server error in get item: {e}')
+        logger.error('Internal server error in get item: %s', e)
         return jsonify({'error': str(e)}), 500
 
     
+def build_items_response(args):
+    if args['format'] == 'ndjson':
+        return ndjson_response(InventoryService.stream_items(args['after']))
+    page = InventoryService.get_items(args['limit'], args['after'])
+    logger.debug('Exit get items successfully')
+    return page_response({'items': page.rows}, page.next_cursor), 200
+
 @inventory_bp.route('/get_items', methods=['GET'])
 @jwt_required()
 def get_items():
-    logger.info('Enter get items')
+    logger.debug('Enter get items')
     try:
-        result = InventoryService.get_items()
-        logger.info('Exit get items successfully')
-        return jsonify(result), 200
+        args = load_pagination_args(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in get items: %s', e.messages)
+        return jsonify({'error': f'Validation error in get items: {e.messages}'}), 400
+
+    service = InventoryService(db_session=db.session)
+    try:
+        version = service.get_items_version(args['after'], None if args['format'] == 'ndjson' else args['limit'])
+        return conditional_response(version, lambda: build_items_response(args))
     except Exception as e:
-        logger.error(f'Internal server error in get items: {e}')
+        logger.error('Internal server error in get items: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @inventory_bp.route('/get_items_by_category', methods=['POST'])
 @jwt_required()
 def get_items_by_category():
-    logger.info('Enter get items by category')
+    logger.debug('Enter get items by category')
     data = request.get_json()
     schema = CategorySchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in get items by category: {e.messages}')
+        logger.info('Validation error in get items by category: %s', e.messages)
         return jsonify({'error': f'Validation error in get items by category: {e.messages}'}), 400
     
     service = InventoryService(db_session=db.session)
@@ -156,5 +201,5 @@ def get_items_by_category():
         result = service.get_items_by_category(data)
         return jsonify(result), 200
     except Exception as e:
-        logger.error(f'Internal server error in get items by category: {e}')
+        logger.error('Internal server error in get items by category: %s', e)
         return jsonify({'error': str(e)}), 500
@@ -1,7 +1,19 @@
+from flask import current_app
+from sqlalchemy import case, or_, select, update
 from werkzeug.exceptions import NotFound, BadRequest
 
-from src.model.ItemsModel import Item
-from src.utils.logger import logger
+from inventory.src.api.v1.inventory_schema import AddItemSchema, RestockItemSchema
+from inventory.src.model.CatalogVersionModel import CatalogVersion
+from inventory.src.model.ItemsModel import Item
+from inventory.src.utils.logger import logger
+from shared.catalog import bump_catalog_version, catalog_state
+from shared.pagination import keyset_page, keyset_stream
+from shared.projection import project
+from shared.routing import read_only
+from shared.sql import dialect_insert
+from shared.uploads import UploadError, UploadReport, batched, validate_batch
+
+IMPORTED_FIELDS = ('category', 'price_per_unit', 'currency', 'quantity', 'description')
 
 
 class InventoryService:
@@ -16,15 +28,23 @@ class InventoryService:
     def get_item_by_name(name):
         return Item.query.filter_by(name=name).first()
     
+    @read_only
+    def get_item_version(self, item_id, name):
+        return catalog_state(self.db_session, CatalogVersion, Item, or_(Item.id == item_id, Item.name == name))
+
+    @read_only
+    def get_items_version(self, after=None, limit=None):
+        return catalog_state(self.db_session, CatalogVersion, Item, after=after, limit=limit)
+
     def get_item(self, item_id, name):
         item = self.get_item_by_id(item_id) or self.get_item_by_name(name)
         if not item:
-            logger.info(f'Item with identifier {item_id or name} not found')
+            logger.info('Item with identifier %s not found', item_id or name)
             raise NotFound(f'Item with identifier {item_id or name} not found')
         return item
 
     def add_item(self, data):
-        logger.info('Enter add item')
+        logger.debug('Enter add item')
         name = data.get('name')
         category = data.get('category')
         price_per_unit = data.get('price_per_unit')
@@ -33,17 +53,18 @@ class InventoryService:
         description = data.get('description')
 
         if self.get_item_by_name(name):
-            logger.info(f'Item with name {name} already exists')
+            logger.info('Item with name %s already exists', name)
             raise BadRequest(f'Item with name {name} already exists')
 
         item = Item(name=name, category=category, price_per_unit=price_per_unit, currency=currency, quantity=quantity, description=description)
         self.db_session.add(item)
+        bump_catalog_version(self.db_session, CatalogVersion)
         self.db_session.commit()
         logger.info('Item added successfully')
         return {'message': f'Item with id {item.id} added successfully'}
     
     def restock_item(self, data):
-        logger.info('Enter restock item')
+        logger.debug('Enter restock item')
         item_id = data.get('item_id')
         name = data.get('name')
         quantity = data.get('quantity')
@@ -51,12 +72,85 @@ class InventoryService:
         item = self.get_item(item_id, name)
 
         item.quantity += quantity
+        item.stock_version = Item.stock_version + 1
         self.db_session.commit()
         logger.info('Item restocked successfully')
         return {'message': f'Item with id {item.id} restocked successfully'}
     
+    def import_items(self, records):
+        logger.debug('Enter import items')
+        report = UploadReport(current_app.config.get('INVENTORY_IMPORT_MAX_ERRORS', 1000))
+        schema = AddItemSchema()
+        try:
+            for batch in batched(records, current_app.config.get('INVENTORY_IMPORT_BATCH_SIZE', 1000)):
+                valid, errors = validate_batch(schema, report.readable(batch))
+                report.add_errors(errors)
+                if not valid:
+                    continue
+                # A name repeated in the batch keeps its last row, as a later batch would.
+                items = {data['name']: data for _, data in valid}
+                self.upsert_items(list(items.values()))
+                bump_catalog_version(self.db_session, CatalogVersion)
+                self.db_session.commit()
+                report.add_processed(len(valid))
+        except UploadError as e:
+            logger.info('Import items stopped: %s', e)
+            report.abort(str(e))
+        logger.info('Items imported: %s, rejected: %s', report.processed, report.failed)
+        return report.to_dict()
+
+    def upsert_items(self, items):
+        statement = dialect_insert(self.db_session, Item)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Item.name],
+            set_={field: statement.excluded[field] for field in IMPORTED_FIELDS},
+        )
+        self.db_session.execute(statement, items)
+
+    def restock_items(self, records):
+        logger.debug('Enter restock items')
+        report = UploadReport(current_app.config.get('INVENTORY_IMPORT_MAX_ERRORS', 1000))
+        schema = RestockItemSchema()
+        try:
+            for batch in batched(records, current_app.config.get('INVENTORY_IMPORT_BATCH_SIZE', 1000)):
+                valid, errors = validate_batch(schema, report.readable(batch))
+                report.add_errors(errors)
+                if not valid:
+                    continue
+                by_id, by_name = {}, {}
+                keys = []
+                for row, data in valid:
+                    quantities, key = (by_id, data['item_id']) if data.get('item_id') else (by_name, data['name'])
+                    quantities[key] = quantities.get(key, 0) + data['quantity']
+                    keys.append((row, key))
+                found = self.add_stock(Item.id, by_id) | self.add_stock(Item.name, by_name)
+                missing = [(row, key) for row, key in keys if key not in found]
+                report.add_errors({'row': row, 'error': f'Item with identifier {key} not found'} for row, key in missing)
+                self.db_session.commit()
+                report.add_processed(len(valid) - len(missing))
+        except UploadError as e:
+            logger.info('Restock items stopped: %s', e)
+            report.abort(str(e))
+        logger.info('Items restocked: %s, rejected: %s', report.processed, report.failed)
+        return report.to_dict()
+
+    def add_stock(self, column, quantities):
+        if not quantities:
+            return set()
+        # Lock in id order first, so concurrent restocks cannot deadlock each other.
+        self.db_session.execute(select(Item.id).where(column.in_(list(quantities))).order_by(Item.id).with_for_update())
+        added = case(quantities, value=column)
+        result = self.db_session.execute(
+            update(Item)
+            .where(column.in_(list(quantities)))
+            .values(quantity=Item.quantity + added, stock_version=Item.stock_version + 1)
+            .returning(column)
+            .execution_options(synchronize_session=False)
+        )
+        return set(result.scalars())
+
     def update_item(self, data):
-        logger.info('Enter update item')
+        logger.debug('Enter update item')
         item_id = data.get('item_id')
         name = data.get('name')
         item = self.get_item(item_id, name)
@@ -68,43 +162,53 @@ class InventoryService:
         description = data.get('description')
 
         if category:
-            logger.info(f'Updating category for item with id {item.id} to {category}')
+            logger.info('Updating category for item with id %s to %s', item.id, category)
             item.category = category
         if price_per_unit:
-            logger.info(f'Updating price per unit for item with id {item.id} to {price_per_unit}')
+            logger.info('Updating price per unit for item with id %s to %s', item.id, price_per_unit)
             item.price_per_unit = price_per_unit
         if currency:
-            logger.info(f'Updating currency for item with id {item.id} to {currency}')
+            logger.info('Updating currency for item with id %s to %s', item.id, currency)
             item.currency = currency
         if quantity:
-            logger.info(f'Updating quantity for item with id {item.id} to {quantity}')
+            logger.info('Updating quantity for item with id %s to %s', item.id, quantity)
             item.quantity = quantity
         if description:
-            logger.info(f'Updating description for item with id {item.id} to {description}')
+            logger.info('Updating description for item with id %s to %s', item.id, description)
             item.description = description
 
+        bump_catalog_version(self.db_session, CatalogVersion)
         self.db_session.commit()
         logger.info('Item updated successfully')
         return {'message': f'Item with id {item.id} updated successfully'}
 
     def delete_item(self, data):
-        logger.info('Enter delete item service')
+        logger.debug('Enter delete item service')
         item_id = data.get('item_id')
         name = data.get('name')
         item = self.get_item(item_id, name)
         self.db_session.delete(item)
+        bump_catalog_version(self.db_session, CatalogVersion)
         self.db_session.commit()
         logger.info('Item deleted successfully')
         return {'message': f'Item with id {item.id} deleted successfully'}
     
     @staticmethod
-    def get_items():
-        logger.info('Enter get items service')
-        return {'items': [item.to_dict() for item in Item.query.all()]}
+    @read_only
+    def get_items(limit, after=None):
+        logger.debug('Enter get items service')
+        return keyset_page(project(Item.query, Item), Item.id, limit, after)
+
+    @staticmethod
+    @read_only
+    def stream_items(after=None):
+        logger.debug('Enter stream items service')
+        return keyset_stream(project(Item.query, Item), Item.id, after)
 
+    @read_only
     def get_items_by_category(self, data):
-        logger.info('Enter get items by category service')
+        logger.debug('Enter get items by category service')
         category = data.get('category')
-        items = Item.query.filter_by(category=category).all()
+        items = project(Item.query.filter_by(category=category), Item).all()
         logger.info('Items fetched successfully')
-        return {'items': [item.to_dict() for item in items]}
+        return {'items': [item._asdict() for item in items]}
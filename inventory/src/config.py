@@ -1,6 +1,8 @@
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
+from shared.engine import engine_options
+from shared.routing import replica_binds
 
 class Config:
     def __init__(self):
@@ -11,9 +13,30 @@ class Config:
         else:
             self.SQLALCHEMY_DATABASE_URI = os.getenv('SQLALCHEMY_DATABASE_URI_TEST', 'sqlite:///:memory:')
         self.SQLALCHEMY_TRACK_MODIFICATIONS = False
+        pool_options = dict(
+            application_name=os.getenv('DB_APPLICATION_NAME', 'inventory'),
+            pool_size=int(os.getenv('DB_POOL_SIZE', 5)),
+            max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 10)),
+            pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+            pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+            pool_pre_ping=os.getenv('DB_POOL_PRE_PING', '1') == '1',
+            statement_timeout=int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0)),
+        )
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options(self.SQLALCHEMY_DATABASE_URI, **pool_options)
+        self.SQLALCHEMY_REPLICA_URI = os.getenv('SQLALCHEMY_REPLICA_URI')
+        self.SQLALCHEMY_BINDS = replica_binds(self.SQLALCHEMY_REPLICA_URI, **pool_options)
         self.JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your_secret_key')
         self.JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_ACCESS_TOKEN_EXPIRES', 1800)))
         self.JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv('JWT_REFRESH_TOKEN_EXPIRES', 86400)))
+        self.REVOCATION_CACHE_SIZE = int(os.getenv('REVOCATION_CACHE_SIZE', 10000))
+        self.REVOCATION_CACHE_TTL = float(os.getenv('REVOCATION_CACHE_TTL', 30))
+        self.REVOCATION_BACKEND = os.getenv('REVOCATION_BACKEND', 'none')
+        self.REVOCATION_SOCKET_DIR = os.getenv('REVOCATION_SOCKET_DIR')
+        self.PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 0))
+        self.PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 1000))
+        self.PAGINATION_STREAM_CHUNK_SIZE = int(os.getenv('PAGINATION_STREAM_CHUNK_SIZE', 1000))
+        self.INVENTORY_IMPORT_BATCH_SIZE = int(os.getenv('INVENTORY_IMPORT_BATCH_SIZE', 1000))
+        self.INVENTORY_IMPORT_MAX_ERRORS = int(os.getenv('INVENTORY_IMPORT_MAX_ERRORS', 1000))
 
 def get_config():
     return Config()
@@ -1,15 +1,27 @@
 from flask import jsonify
-from src.extensions import jwt
-from src.model.AdminsModel import Admin
+from inventory.src.extensions import db, jwt, revocation_bus, revocation_cache
+from inventory.src.model.AdminsModel import Admin
+from shared.revocation_bus import RevocationState, to_timestamp
 
 
+def load_admin_state(admin_username):
+    admin = db.session.query(Admin.last_logout).filter(Admin.username == admin_username).first()
+    if admin:
+        return RevocationState(to_timestamp(admin.last_logout), 'active')
+    return None
+
+@revocation_bus.bootstrap_loader
+def load_revoked_admins():
+    admins = db.session.query(Admin.username, Admin.last_logout).filter(Admin.last_logout.isnot(None))
+    return [(admin.username, RevocationState(to_timestamp(admin.last_logout), 'active')) for admin in admins]
+
 @jwt.token_in_blocklist_loader
 def is_token_revoked(jwt_header, jwt_payload):
-    admin_username = jwt_payload['sub']
-    admin = Admin.query.filter(Admin.username == admin_username).first()
-    if admin and admin.last_logout:
-        return jwt_payload['iat'] < admin.last_logout.timestamp()
-    return False
+    if revocation_bus.enabled:
+        state = revocation_bus.get(jwt_payload['sub'])
+    else:
+        state = revocation_cache.get_or_load(jwt_payload['sub'], load_admin_state)
+    return state is not None and state.revokes(jwt_payload['iat'])
 
 @jwt.revoked_token_loader
 def revoked_token_callback(jwt_header, jwt_payload):
@@ -1,3 +1,4 @@
+import json
 import pytest
 from flask import Flask
 from inventory.app import create_app
@@ -73,6 +74,74 @@ def test_restock_item(client, setup_database):
     assert "restocked successfully" in response.json["message"]
 
 
+def test_import_items_csv(client, setup_database):
+    """Test importing a CSV feed that adds, updates and rejects rows."""
+    feed = (
+        "name,category,price_per_unit,currency,quantity,description\n"
+        "Table,furniture,200,USD,50,A wooden table\n"
+        "Laptop,electronics,900,USD,7,\"A lighter, faster laptop\"\n"
+        "Lamp,lights,20,USD,5,A desk lamp\n"
+    )
+    headers = {"Authorization": f"Bearer {get_test_token()}", "Content-Type": "text/csv"}
+    response = client.post("/inventory/import_items", data=feed, headers=headers)
+    assert response.status_code == 200
+    assert response.json["processed"] == 2
+    assert response.json["failed"] == 1
+    assert response.json["errors"][0]["row"] == 3
+    assert "category" in response.json["errors"][0]["error"]
+
+    db.session.expire_all()
+    laptop = Item.query.filter_by(name="Laptop").first()
+    assert (laptop.price_per_unit, laptop.quantity, laptop.description) == (900, 7, "A lighter, faster laptop")
+    assert Item.query.filter_by(name="Table").first().quantity == 50
+    assert Item.query.count() == 3
+
+
+def test_restock_items_ndjson(client, setup_database):
+    """Test restocking from an NDJSON feed by id and by name."""
+    feed = "\n".join([
+        json.dumps({"item_id": 1, "quantity": 5}),
+        json.dumps({"name": "Chair", "quantity": 10}),
+        json.dumps({"name": "Laptop", "quantity": 1}),
+        json.dumps({"name": "Sofa", "quantity": 1}),
+        "not json",
+        json.dumps({"quantity": 1}),
+    ])
+    headers = {"Authorization": f"Bearer {get_test_token()}", "Content-Type": "application/x-ndjson"}
+    response = client.post("/inventory/restock_items", data=feed, headers=headers)
+    assert response.status_code == 200
+    assert response.json["processed"] == 3
+    assert [error["row"] for error in response.json["errors"]] == [4, 5, 6]
+
+    db.session.expire_all()
+    assert Item.query.filter_by(name="Laptop").first().quantity == 16
+    assert Item.query.filter_by(name="Chair").first().quantity == 110
+
+
+def test_aborted_upload_reports_the_committed_batches(client, setup_database):
+    """Test that an unreadable body keeps the batches written before it."""
+    client.application.config["INVENTORY_IMPORT_BATCH_SIZE"] = 1
+    headers = {"Authorization": f"Bearer {get_test_token()}", "Content-Type": "application/x-ndjson"}
+    feed = (json.dumps({"item_id": 1, "quantity": 5}) + "\n" + " " * 70000).encode() + b"\xff"
+    response = client.post("/inventory/restock_items", data=feed, headers=headers)
+    assert response.status_code == 200
+    assert response.json["processed"] == 1
+    assert "error" in response.json
+
+    db.session.expire_all()
+    assert db.session.get(Item, 1).quantity == 15
+
+    response = client.post("/inventory/restock_items", data=b"\xff", headers=headers)
+    assert response.status_code == 400
+    assert response.json["processed"] == 0
+
+
+def test_bulk_upload_requires_a_supported_type(client, setup_database):
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.post("/inventory/restock_items", json=[], headers=headers)
+    assert response.status_code == 415
+
+
 def test_update_item(client, setup_database):
     """Test updating an existing item."""
     data = {
@@ -112,6 +181,36 @@ def test_get_items(client, setup_database):
     assert len(response.json["items"]) == 2
 
 
+def test_get_items_keyset_pagination(client, setup_database):
+    """Test walking the items with the next-page cursor."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.get("/inventory/get_items?limit=1", headers=headers)
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json["items"]] == ["Laptop"]
+    cursor = response.headers["X-Next-Cursor"]
+    assert f"after={cursor}" in response.headers["Link"]
+
+    response = client.get(f"/inventory/get_items?limit=1&after={cursor}", headers=headers)
+    assert [item["name"] for item in response.json["items"]] == ["Chair"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_items_invalid_limit(client, setup_database):
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.get("/inventory/get_items?limit=0", headers=headers)
+    assert response.status_code == 400
+
+
+def test_get_items_ndjson_stream(client, setup_database):
+    """Test streaming the items as newline-delimited JSON."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.get("/inventory/get_items?format=ndjson&after=1", headers=headers)
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Chair"]
+
+
 def test_get_items_by_category(client, setup_database):
     """Test fetching items by category."""
     data = {"category": "furniture"}
@@ -120,3 +219,51 @@ def test_get_items_by_category(client, setup_database):
     assert response.status_code == 200
     assert len(response.json["items"]) == 1
     assert response.json["items"][0]["name"] == "Chair"
+
+
+def test_get_items_conditional_get(client, setup_database):
+    """Test that unchanged items are answered with 304 until the catalog changes."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.get("/inventory/get_items", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    response = client.get("/inventory/get_items", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+    response = client.get("/inventory/get_items?limit=1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    client.post("/inventory/restock_item", json={"name": "Chair", "quantity": 5}, headers=headers)
+    response = client.get("/inventory/get_items", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_get_item_conditional_get(client, setup_database):
+    """Test that the ETag of an item depends on the requested item."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    etag = client.post("/inventory/get_item", json={"name": "Laptop"}, headers=headers).headers["ETag"]
+    response = client.post("/inventory/get_item", json={"name": "Laptop"}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.post("/inventory/get_item", json={"name": "Chair"}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json["name"] == "Chair"
+
+
+def test_metrics_report_pool_usage(tmp_path, monkeypatch):
+    """The metrics endpoint reports the connection pool of a file database."""
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI_TEST", f"sqlite:///{tmp_path / 'inventory.db'}")
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        response = app.test_client().get("/metrics")
+        db.engine.dispose()
+    assert response.status_code == 200
+    pool = response.json["db_pool"]
+    assert pool["pool_size"] == 2
+    assert pool["checked_out"] == 0
+    assert pool["checkouts"] >= 1
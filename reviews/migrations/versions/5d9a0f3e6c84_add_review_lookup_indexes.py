@@ -0,0 +1,77 @@
+"""Add review lookup indexes
+
+Revision ID: 5d9a0f3e6c84
+Revises: 
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a0f3e6c84'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+# Reviews removed to build the unique index are kept here, so they can be
+# inspected and are put back by the downgrade.
+ARCHIVE_TABLE = 'reviews_removed_duplicates'
+
+DUPLICATES = (
+    'SELECT id, customer_id, item_id, rating, comment FROM reviews WHERE id NOT IN '
+    '(SELECT MAX(id) FROM reviews GROUP BY customer_id, item_id)'
+)
+
+
+def archive_duplicates():
+    """Move all but the newest review of every (customer, item) pair to the archive table."""
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text(DUPLICATES)).fetchall()
+    if not duplicates:
+        return
+
+    op.create_table(
+        ARCHIVE_TABLE,
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Integer(), nullable=False),
+        sa.Column('comment', sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.execute(f'INSERT INTO {ARCHIVE_TABLE} (id, customer_id, item_id, rating, comment) {DUPLICATES}')
+    op.execute(f'DELETE FROM reviews WHERE id IN (SELECT id FROM {ARCHIVE_TABLE})')
+
+    logger.warning(
+        'Moved %s duplicate reviews to %s, keeping the newest review of every (customer, item) pair',
+        len(duplicates), ARCHIVE_TABLE,
+    )
+    for review in duplicates:
+        logger.warning(
+            'Removed review %s of item %s by customer %s: rating %s, comment %r',
+            review.id, review.item_id, review.customer_id, review.rating, review.comment,
+        )
+
+
+def upgrade():
+    archive_duplicates()
+    op.create_index('uq_reviews_customer_id_item_id', 'reviews', ['customer_id', 'item_id'], unique=True, if_not_exists=True)
+    op.create_index('ix_reviews_item_id', 'reviews', ['item_id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_reviews_item_id', table_name='reviews', if_exists=True)
+    op.drop_index('uq_reviews_customer_id_item_id', table_name='reviews', if_exists=True)
+    if sa.inspect(op.get_bind()).has_table(ARCHIVE_TABLE):
+        op.execute(
+            f'INSERT INTO reviews (id, customer_id, item_id, rating, comment) '
+            f'SELECT id, customer_id, item_id, rating, comment FROM {ARCHIVE_TABLE}'
+        )
+        op.drop_table(ARCHIVE_TABLE)
@@ -0,0 +1,51 @@
+"""Add item_rating_stats built from existing reviews
+
+Revision ID: a61e4c8d2f73
+Revises: 5d9a0f3e6c84
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a61e4c8d2f73'
+down_revision = '5d9a0f3e6c84'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'item_rating_stats',
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), nullable=False),
+        sa.Column('stars_1', sa.Integer(), nullable=False),
+        sa.Column('stars_2', sa.Integer(), nullable=False),
+        sa.Column('stars_3', sa.Integer(), nullable=False),
+        sa.Column('stars_4', sa.Integer(), nullable=False),
+        sa.Column('stars_5', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('item_id'),
+        if_not_exists=True,
+    )
+    op.execute('DELETE FROM item_rating_stats')
+    op.execute("""
+        INSERT INTO item_rating_stats
+            (item_id, review_count, rating_sum, stars_1, stars_2, stars_3, stars_4, stars_5)
+        SELECT item_id,
+               COUNT(*),
+               SUM(rating),
+               SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END)
+        FROM reviews
+        GROUP BY item_id
+    """)
+
+
+def downgrade():
+    op.drop_table('item_rating_stats')
@@ -16,6 +16,7 @@ Routes
 - `/delete_review` : Delete an existing review.
 - `/get_customer_reviews` : Retrieve reviews made by a specific customer.
 - `/get_item_reviews` : Retrieve reviews for a specific item.
+- `/get_item_rating_stats` : Retrieve the aggregated ratings of a specific item.
 - `/get_all_reviews` : Retrieve all reviews.
 """
 
@@ -23,10 +24,11 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from marshmallow import ValidationError
-from werkzeug.exceptions import NotFound
+from werkzeug.exceptions import NotFound, BadRequest, Conflict
 
 from reviews.src.extensions import db
 from reviews.src.utils.logger import logger
+from shared.pagination import load_pagination_args, page_response, ndjson_response
 
 from reviews.src.api.v1.reviews_service import ReviewsService
 from reviews.src.api.v1.reviews_schema import AddReviewSchema, UpdateReviewSchema, GetCustomerReviewsSchema, ReviewSchema
@@ -48,25 +50,29 @@ def add_review():
     Response
         JSON response indicating success or an error message with the appropriate HTTP status.
     """
-    logger.info('Enter add review')
+    logger.debug('Enter add review')
     data = request.get_json()
     schema = AddReviewSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in add review: {e.messages}')
+        logger.info('Validation error in add review: %s', e.messages)
         return jsonify({'error': f'Validation error in add review: {e.messages}'}), 400
 
     customer_username = get_jwt_identity()
     service = ReviewsService(db_session=db.session)
     try:
         result = service.add_review(data, customer_username)
-        logger.info('Exit add review successfully')
+        logger.debug('Exit add review successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except Conflict as e:
+        return jsonify({'error': str(e)}), 409
     except Exception as e:
-        logger.info(f'Internal server error in add review: {e}')
+        logger.info('Internal server error in add review: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -83,25 +89,25 @@ def update_review():
     Response
         JSON response indicating success or an error message with the appropriate HTTP status.
     """
-    logger.info('Enter update review')
+    logger.debug('Enter update review')
     data = request.get_json()
     schema = UpdateReviewSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in update review: {e.messages}')
+        logger.info('Validation error in update review: %s', e.messages)
         return jsonify({'error': f'Validation error in update review: {e.messages}'}), 400
 
     customer_username = get_jwt_identity()
     service = ReviewsService(db_session=db.session)
     try:
         result = service.update_review(data, customer_username)
-        logger.info('Exit update review successfully')
+        logger.debug('Exit update review successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.info(f'Internal server error in update review: {e}')
+        logger.info('Internal server error in update review: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -118,25 +124,25 @@ def delete_review():
     Response
         JSON response indicating success or an error message with the appropriate HTTP status.
     """
-    logger.info('Enter delete review')
+    logger.debug('Enter delete review')
     data = request.get_json()
     schema = ReviewSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in delete review: {e.messages}')
+        logger.info('Validation error in delete review: %s', e.messages)
         return jsonify({'error': f'Validation error in delete review: {e.messages}'}), 400
 
     customer_username = get_jwt_identity()
     service = ReviewsService(db_session=db.session)
     try:
         result = service.delete_review(data, customer_username)
-        logger.info('Exit delete review successfully')
+        logger.debug('Exit delete review successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.info(f'Internal server error in delete review: {e}')
+        logger.info('Internal server error in delete review: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -153,24 +159,24 @@ def get_customer_reviews():
     Response
         JSON response containing reviews or an error message with the appropriate HTTP status.
     """
-    logger.info('Enter get customer reviews')
+    logger.debug('Enter get customer reviews')
     data = request.get_json()
     schema = GetCustomerReviewsSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in get customer reviews: {e.messages}')
+        logger.info('Validation error in get customer reviews: %s', e.messages)
         return jsonify({'error': f'Validation error in get customer reviews: {e.messages}'}), 400
 
     service = ReviewsService(db_session=db.session)
     try:
         result = service.get_customer_reviews(data)
-        logger.info('Exit get customer reviews successfully')
+        logger.debug('Exit get customer reviews successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.info(f'Internal server error in get customer reviews: {e}')
+        logger.info('Internal server error in get customer reviews: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -187,24 +193,59 @@ def get_item_reviews():
     Response
         JSON response containing reviews or an error message with the appropriate HTTP status.
     """
-    logger.info('Enter get item reviews')
+    logger.debug('Enter get item reviews')
     data = request.get_json()
     schema = ReviewSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in get item reviews: {e.messages}')
+        logger.info('Validation error in get item reviews: %s', e.messages)
         return jsonify({'error': f'Validation error in get item reviews: {e.messages}'}), 400
 
     service = ReviewsService(db_session=db.session)
     try:
         result = service.get_item_reviews(data)
-        logger.info('Exit get item reviews successfully')
+        logger.debug('Exit get item reviews successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.info(f'Internal server error in get item reviews: {e}')
+        logger.info('Internal server error in get item reviews: %s', e)
+        return jsonify({'error': str(e)}), 500
+
+
+@reviews_bp.route('/get_item_rating_stats', methods=['POST'])
+@jwt_required()
+def get_item_rating_stats():
+    """
+    Retrieve the aggregated ratings of a specific item.
+
+    Validates the input data and returns the review count, average rating and
+    star histogram of the item from its pre-aggregated statistics.
+
+    Returns
+    -------
+    Response
+        JSON response containing the rating statistics or an error message with the appropriate HTTP status.
+    """
+    logger.debug('Enter get item rating stats')
+    data = request.get_json()
+    schema = ReviewSchema()
+    try:
+        data = schema.load(data)
+    except ValidationError as e:
+        logger.info('Validation error in get item rating stats: %s', e.messages)
+        return jsonify({'error': f'Validation error in get item rating stats: {e.messages}'}), 400
+
+    service = ReviewsService(db_session=db.session)
+    try:
+        result = service.get_item_rating_stats(data)
+        logger.debug('Exit get item rating stats successfully')
+        return jsonify(result), 200
+    except NotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.info('Internal server error in get item rating stats: %s', e)
         return jsonify({'error': str(e)}), 500
 
 
@@ -214,18 +255,27 @@ def get_all_reviews():
     """
     Retrieve all reviews.
 
-    Fetches all reviews available in the database.
+    Fetches one page of reviews selected by the `limit` and `after` query
+    parameters, or streams all of them as NDJSON with `format=ndjson`.
 
     Returns
     -------
     Response
-        JSON response containing all reviews or an error message with the appropriate HTTP status.
+        JSON response containing the reviews or an error message with the appropriate HTTP status.
     """
-    logger.info('Enter get all reviews')
+    logger.debug('Enter get all reviews')
     try:
-        result = ReviewsService.get_all_reviews()
-        logger.info('Exit get all reviews successfully')
-        return jsonify(result), 200
+        args = load_pagination_args(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in get all reviews: %s', e.messages)
+        return jsonify({'error': f'Validation error in get all reviews: {e.messages}'}), 400
+
+    try:
+        if args['format'] == 'ndjson':
+            return ndjson_response(ReviewsService.stream_all_reviews(args['after']))
+        page = ReviewsService.get_all_reviews(args['limit'], args['after'])
+        logger.debug('Exit get all reviews successfully')
+        return page_response(page.rows, page.next_cursor), 200
     except Exception as e:
-        logger.info(f'Internal server error in get all reviews: {e}')
+        logger.info('Internal server error in get all reviews: %s', e)
         return jsonify({'error': str(e)}), 500
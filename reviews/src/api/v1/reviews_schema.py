@@ -25,7 +25,7 @@ class AddReviewSchema(Schema):
         The ID of the item being reviewed.
     name : str, optional
         The name of the item being reviewed.
-    rating : float
+    rating : int
         The rating given to the item (required, between 1 and 5).
     comment : str
         The review comment (required).
@@ -37,7 +37,7 @@ class AddReviewSchema(Schema):
     """
     item_id = fields.Integer(validate=validate.Range(min=1))
     name = fields.String(validate=validate.Length(min=1))
-    rating = fields.Float(required=True, validate=validate.Range(min=1, max=5))
+    rating = fields.Integer(required=True, strict=True, validate=validate.Range(min=1, max=5))
     comment = fields.String(required=True, validate=validate.Length(min=1))
 
     @validates_schema
@@ -66,7 +66,7 @@ class UpdateReviewSchema(Schema):
         The ID of the item being reviewed.
     name : str, optional
         The name of the item being reviewed.
-    rating : float, optional
+    rating : int, optional
         The updated rating (between 1 and 5).
     comment : str, optional
         The updated review comment.
@@ -78,7 +78,7 @@ class UpdateReviewSchema(Schema):
     """
     item_id = fields.Integer(validate=validate.Range(min=1))
     name = fields.String(validate=validate.Length(min=1))
-    rating = fields.Float(validate=validate.Range(min=1, max=5))
+    rating = fields.Integer(strict=True, validate=validate.Range(min=1, max=5))
     comment = fields.String(validate=validate.Length(min=1))
 
     @validates_schema
@@ -10,13 +10,21 @@ ReviewsService
     A service class for managing reviews.
 """
 
-from werkzeug.exceptions import NotFound, BadRequest
+from sqlalchemy import exists
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import NotFound, BadRequest, Conflict
 
 from reviews.src.model.CustomersModel import Customer
 from reviews.src.model.ReviewsModel import Review
 from reviews.src.model.ItemsModel import Item
+from reviews.src.model.PurchaseHistoryModel import PurchaseHistory
+from reviews.src.model.ItemRatingStatsModel import ItemRatingStats, STARS
 
 from reviews.src.utils.logger import logger
+from shared.pagination import keyset_page, keyset_stream
+from shared.projection import project
+from shared.routing import read_only
+from shared.sql import dialect_insert
 
 
 class ReviewsService:
@@ -33,8 +41,12 @@ class ReviewsService:
         Fetches a customer by username or email.
     get_item(item_id, name)
         Fetches an item by its ID or name.
-    get_review(customer_username, item_id)
-        Fetches a review by the customer username and item ID.
+    has_purchased(customer_id, item_id)
+        Checks whether a customer has a completed purchase of an item.
+    get_review(customer_id, item_id)
+        Fetches a review by the customer ID and item ID.
+    adjust_rating_stats(item_id, added=None, removed=None)
+        Applies a review change to the item's pre-aggregated ratings.
     add_review(data, customer_username)
         Adds a review for an item by a customer.
     update_review(data, customer_username)
@@ -45,8 +57,12 @@ class ReviewsService:
         Fetches all reviews made by a specific customer.
     get_item_reviews(data)
         Fetches all reviews for a specific item.
-    get_all_reviews()
-        Fetches all reviews in the system.
+    get_item_rating_stats(data)
+        Fetches the pre-aggregated ratings of a specific item.
+    get_all_reviews(limit, after=None)
+        Fetches one page of all reviews in the system.
+    stream_all_reviews(after=None)
+        Lazily yields all reviews in the system.
     """
 
     def __init__(self, db_session):
@@ -118,7 +134,7 @@ class ReviewsService:
         """
         customer = Customer.query.filter_by(username=username).first() or Customer.query.filter_by(email=email).first()
         if not customer:
-            logger.info(f'Customer with username {username} or email {email} not found')
+            logger.info('Customer with username %s or email %s not found', username, email)
             raise NotFound(f'Customer with username {username} or email {email} not found')
         return customer
 
@@ -145,18 +161,62 @@ class ReviewsService:
         """
         item = self.get_item_by_id(item_id) or self.get_item_by_name(name)
         if not item:
-            logger.info(f'Item with id or name {item_id or name} not found')
+            logger.info('Item with id or name %s not found', item_id or name)
             raise NotFound(f'Item with id or name {item_id or name} not found')
         return item
 
-    def get_review(self, customer_username, item_id):
+    def has_purchased(self, customer_id, item_id):
         """
-        Fetches a review by customer username and item ID.
+        Checks whether a customer has a completed purchase of an item.
 
         Parameters
         ----------
-        customer_username : str
-            The username of the customer who wrote the review.
+        customer_id : int
+            The ID of the customer.
+        item_id : int
+            The ID of the item.
+
+        Returns
+        -------
+        bool
+            `True` if the customer purchased the item and did not reverse every such purchase.
+        """
+        return self.db_session.query(
+            exists().where(
+                PurchaseHistory.customer_id == customer_id,
+                PurchaseHistory.item_id == item_id,
+                PurchaseHistory.purchase_count > 0,
+            )
+        ).scalar()
+
+    def has_reviewed(self, customer_id, item_id):
+        """
+        Checks whether a customer already reviewed an item.
+
+        Parameters
+        ----------
+        customer_id : int
+            The ID of the customer.
+        item_id : int
+            The ID of the item.
+
+        Returns
+        -------
+        bool
+            `True` if the customer has a review of the item.
+        """
+        return self.db_session.query(
+            exists().where(Review.customer_id == customer_id, Review.item_id == item_id)
+        ).scalar()
+
+    def get_review(self, customer_id, item_id):
+        """
+        Fetches a review by customer ID and item ID.
+
+        Parameters
+        ----------
+        customer_id : int
+            The ID of the customer who wrote the review.
         item_id : int
             The ID of the item being reviewed.
 
@@ -170,12 +230,43 @@ class ReviewsService:
         NotFound
             If no review is found.
         """
-        review = Review.query.filter_by(customer_username=customer_username, item_id=item_id).first()
+        review = Review.query.filter_by(customer_id=customer_id, item_id=item_id).first()
         if not review:
-            logger.info(f'Review for item {review.item.name} by customer {review.customer.username} not found')
-            raise NotFound(f'Review for item {review.item.name} by customer {review.customer.username} not found')
+            logger.info('Review for item %s by customer %s not found', item_id, customer_id)
+            raise NotFound(f'Review for item {item_id} by customer {customer_id} not found')
         return review
 
+    def adjust_rating_stats(self, item_id, added=None, removed=None):
+        """
+        Applies a review change to the item's pre-aggregated ratings.
+
+        The statistics row is created by the first review of the item and is
+        updated with relative increments, so concurrent reviews of the same
+        item do not overwrite each other.
+
+        Parameters
+        ----------
+        item_id : int
+            The ID of the reviewed item.
+        added : int, optional
+            The rating of a new review, or the new rating of an updated review.
+        removed : int, optional
+            The rating of a deleted review, or the old rating of an updated review.
+        """
+        deltas = {
+            'review_count': (added is not None) - (removed is not None),
+            'rating_sum': (added or 0) - (removed or 0),
+        }
+        for stars in STARS:
+            deltas[f'stars_{stars}'] = (added == stars) - (removed == stars)
+
+        statement = dialect_insert(self.db_session, ItemRatingStats).values(item_id=item_id, **deltas)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ItemRatingStats.item_id],
+            set_={column: getattr(ItemRatingStats, column) + statement.excluded[column] for column in deltas},
+        )
+        self.db_session.execute(statement)
+
     def add_review(self, data, customer_username):
         """
         Adds a review for an item by a customer.
@@ -191,6 +282,11 @@ class ReviewsService:
         -------
         dict
             The newly created review's details.
+
+        Raises
+        ------
+        Conflict
+            If the customer already reviewed the item.
         """
         item_id = data.get('item_id')
         name = data.get('name')
@@ -200,10 +296,14 @@ class ReviewsService:
         customer = self.get_customer(customer_username)
         item = self.get_item(item_id, name)
 
-        if item.to_dict() not in customer.items:
-            logger.info(f'Customer {customer.username} has not purchased item {item.name}')
+        if not self.has_purchased(customer.id, item.id):
+            logger.info('Customer %s has not purchased item %s', customer.username, item.name)
             raise BadRequest(f'Customer {customer.username} has not purchased item {item.name}')
 
+        if self.has_reviewed(customer.id, item.id):
+            logger.info('Customer %s already reviewed item %s', customer.username, item.name)
+            raise Conflict(f'Customer {customer.username} already reviewed item {item.name}, update the review instead')
+
         review = Review(
             customer_id=customer.id,
             item_id=item.id,
@@ -211,7 +311,15 @@ class ReviewsService:
             comment=comment
         )
 
-        self.db_session.add(review)
+        try:
+            self.db_session.add(review)
+            self.db_session.flush()
+        except IntegrityError:
+            # A concurrent request added the review after the check above.
+            self.db_session.rollback()
+            logger.info('Customer %s already reviewed item %s', customer.username, item.name)
+            raise Conflict(f'Customer {customer.username} already reviewed item {item.name}, update the review instead')
+        self.adjust_rating_stats(item.id, added=rating)
         self.db_session.commit()
 
         return review.to_dict()
@@ -241,7 +349,8 @@ class ReviewsService:
         item = self.get_item(item_id, name)
         review = self.get_review(customer.id, item.id)
 
-        if rating:
+        if rating and rating != review.rating:
+            self.adjust_rating_stats(item.id, added=rating, removed=review.rating)
             review.rating = rating
         if comment:
             review.comment = comment
@@ -273,9 +382,11 @@ class ReviewsService:
         review = self.get_review(customer.id, item.id)
 
         self.db_session.delete(review)
+        self.adjust_rating_stats(item.id, removed=review.rating)
         self.db_session.commit()
         return {'message': f'Review for item {item.name} by customer {customer.username} deleted successfully'}
 
+    @read_only
     def get_customer_reviews(self, data):
         """
         Fetches all reviews made by a specific customer.
@@ -294,9 +405,10 @@ class ReviewsService:
         customer_email = data.get('customer_email')
 
         customer = self.get_customer(customer_username, customer_email)
-        reviews = Review.query.filter_by(customer_id=customer.id).all()
-        return [review.to_dict() for review in reviews]
+        reviews = project(Review.query.filter_by(customer_id=customer.id), Review).all()
+        return [review._asdict() for review in reviews]
 
+    @read_only
     def get_item_reviews(self, data):
         """
         Fetches all reviews for a specific item.
@@ -314,17 +426,64 @@ class ReviewsService:
         item_name = data.get('item_name')
         item_id = data.get('item_id')
         item = self.get_item(item_id, item_name)
-        reviews = Review.query.filter_by(item_id=item.id).all()
-        return [review.to_dict() for review in reviews]
+        reviews = project(Review.query.filter_by(item_id=item.id), Review).all()
+        return [review._asdict() for review in reviews]
+
+    @read_only
+    def get_item_rating_stats(self, data):
+        """
+        Fetches the pre-aggregated ratings of a specific item.
+
+        Parameters
+        ----------
+        data : dict
+            The item identification data.
+
+        Returns
+        -------
+        dict
+            The review count, average rating and star histogram of the item.
+        """
+        item = self.get_item(data.get('item_id'), data.get('name'))
+        stats = self.db_session.get(ItemRatingStats, item.id)
+        if not stats:
+            stats = ItemRatingStats(item_id=item.id, review_count=0, rating_sum=0, **{f'stars_{stars}': 0 for stars in STARS})
+        return stats.to_dict()
 
     @staticmethod
-    def get_all_reviews():
+    @read_only
+    def get_all_reviews(limit, after=None):
         """
-        Fetches all reviews in the system.
+        Fetches one page of all reviews in the system.
+
+        Parameters
+        ----------
+        limit : int or None
+            The maximum number of reviews to return, or `None` for all.
+        after : int, optional
+            Only reviews with a greater ID are returned.
 
         Returns
         -------
-        list of dict
-            A list of all reviews.
+        Page
+            The reviews and the cursor of the next page.
+        """
+        return keyset_page(project(Review.query, Review), Review.id, limit, after)
+
+    @staticmethod
+    @read_only
+    def stream_all_reviews(after=None):
+        """
+        Lazily yields all reviews in the system.
+
+        Parameters
+        ----------
+        after : int, optional
+            Only reviews with a greater ID are returned.
+
+        Returns
+        -------
+        generator of dict
+            The reviews, fetched in chunks from a server-side cursor.
         """
-        return [review.to_dict() for review in Review.query.all()]
+        return keyset_stream(project(Review.query, Review), Review.id, after)
@@ -0,0 +1,67 @@
+"""
+reviews.models.item_rating_stats
+================================
+
+This module defines the `ItemRatingStats` class, which holds the pre-aggregated ratings of an item.
+
+Classes
+-------
+ItemRatingStats
+    A database model for the review count, rating sum and star histogram of an item.
+"""
+
+from reviews.src.extensions import db
+
+STARS = (1, 2, 3, 4, 5)
+
+
+class ItemRatingStats(db.Model):
+    """
+    A database model holding the pre-aggregated ratings of an item.
+
+    The row is adjusted in the same transaction as every review insert,
+    rating change and delete, so reading it never scans the reviews.
+
+    Attributes
+    ----------
+    item_id : int
+        ID of the item (primary key).
+    review_count : int
+        Number of reviews of the item.
+    rating_sum : int
+        Sum of the ratings of the item.
+    stars_1, stars_2, stars_3, stars_4, stars_5 : int
+        Number of reviews with each rating.
+
+    Methods
+    -------
+    to_dict()
+        Converts the statistics to a dictionary format.
+    """
+
+    __tablename__ = 'item_rating_stats'
+
+    item_id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self) -> dict:
+        """
+        Converts the statistics to a dictionary format.
+
+        Returns
+        -------
+        dict
+            The review count, average rating and star histogram of the item.
+        """
+        return {
+            'item_id': self.item_id,
+            'review_count': self.review_count,
+            'average_rating': self.rating_sum / self.review_count if self.review_count else None,
+            'histogram': {str(stars): getattr(self, f'stars_{stars}') for stars in STARS},
+        }
@@ -11,6 +11,7 @@ Item
 """
 
 from reviews.src.extensions import db
+from shared.indexes import item_indexes
 
 
 class Item(db.Model):
@@ -33,6 +34,8 @@ class Item(db.Model):
         Quantity of the item available in inventory (required).
     description : str
         Description of the item (required).
+    stock_version : int
+        Incremented by every stock change, to tag catalog responses.
 
     Methods
     -------
@@ -41,6 +44,7 @@ class Item(db.Model):
     """
 
     __tablename__ = 'items'
+    __table_args__ = item_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, unique=True)
@@ -49,6 +53,7 @@ class Item(db.Model):
     currency = db.Column(db.String(255), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     description = db.Column(db.String(255), nullable=False)
+    stock_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     def to_dict(self) -> dict:
         """
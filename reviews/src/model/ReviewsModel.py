@@ -11,6 +11,7 @@ Review
 """
 
 from reviews.src.extensions import db
+from shared.indexes import review_indexes
 
 
 class Review(db.Model):
@@ -29,6 +30,8 @@ class Review(db.Model):
         Rating given to the item (required).
     comment : str, optional
         Additional comments provided by the customer.
+    dict_fields : tuple of str
+        The fields returned by `to_dict`, in order.
 
     Methods
     -------
@@ -37,6 +40,7 @@ class Review(db.Model):
     """
 
     __tablename__ = 'reviews'
+    __table_args__ = review_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, nullable=False)
@@ -44,6 +48,8 @@ class Review(db.Model):
     rating = db.Column(db.Integer, nullable=False)
     comment = db.Column(db.String(255), nullable=True)
 
+    dict_fields = ('id', 'customer_id', 'item_id', 'rating', 'comment')
+
     def to_dict(self) -> dict:
         """
         Converts the review's attributes to a dictionary format.
@@ -53,10 +59,4 @@ class Review(db.Model):
         dict
             A dictionary representation of the review's attributes.
         """
-        return {
-            'id': self.id,
-            'customer_id': self.customer_id,
-            'item_id': self.item_id,
-            'rating': self.rating,
-            'comment': self.comment,
-        }
+        return {field: getattr(self, field) for field in self.dict_fields}
@@ -1,13 +1,4 @@
-import logging
+from shared.logger import get_logger
 
 
-logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('app.log')
-        ]
-    )
-
-logger = logging.getLogger('Ecomerce_Application')
+logger = get_logger()
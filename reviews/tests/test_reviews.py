@@ -0,0 +1,180 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from reviews.app import create_app
+from reviews.src.extensions import db
+from reviews.src.model.CustomersModel import Customer
+from reviews.src.model.ItemsModel import Item
+from reviews.src.model.PurchaseHistoryModel import PurchaseHistory
+
+
+@pytest.fixture
+def app():
+    """Create a Flask application for testing."""
+    app = create_app()
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    """Create a test client for the app."""
+    return app.test_client()
+
+
+@pytest.fixture
+def setup_database(app):
+    """Populate the database with two customers who purchased a test item."""
+    for index in (1, 2):
+        customer = Customer(
+            username=f"reviewer{index}",
+            email=f"reviewer{index}@example.com",
+            first_name="Test",
+            last_name="Reviewer",
+            phone=f"7100000{index}",
+            age=25,
+            gender="male",
+            marital_status="single",
+        )
+        customer.set_password("password123")
+        db.session.add(customer)
+    db.session.add(Item(
+        name="Laptop",
+        category="electronics",
+        price_per_unit=1000,
+        currency="USD",
+        quantity=10,
+        description="A powerful laptop",
+    ))
+    db.session.add(PurchaseHistory(customer_id=1, item_id=1, purchase_count=1))
+    db.session.add(PurchaseHistory(customer_id=2, item_id=1, purchase_count=1))
+    db.session.commit()
+
+
+def auth_headers(username):
+    """Generate authentication headers for a test customer."""
+    return {"Authorization": f"Bearer {create_access_token(identity=username)}"}
+
+
+def get_stats(client):
+    response = client.post("/reviews/get_item_rating_stats", json={"item_id": 1}, headers=auth_headers("reviewer1"))
+    assert response.status_code == 200
+    return response.json
+
+
+def test_rating_stats_without_reviews(client, setup_database):
+    stats = get_stats(client)
+    assert stats["review_count"] == 0
+    assert stats["average_rating"] is None
+    assert stats["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
+
+
+def test_add_review_requires_purchase(client, setup_database):
+    data = {"item_id": 1, "rating": 5, "comment": "Great"}
+    db.session.delete(db.session.get(PurchaseHistory, (2, 1)))
+    db.session.commit()
+    response = client.put("/reviews/add_review", json=data, headers=auth_headers("reviewer2"))
+    assert response.status_code == 400
+    assert "has not purchased" in response.json["error"]
+
+
+def test_rating_stats_follow_add_update_delete(client, setup_database):
+    data = {"item_id": 1, "rating": 5, "comment": "Great"}
+    assert client.put("/reviews/add_review", json=data, headers=auth_headers("reviewer1")).status_code == 200
+    data = {"item_id": 1, "rating": 2, "comment": "Meh"}
+    assert client.put("/reviews/add_review", json=data, headers=auth_headers("reviewer2")).status_code == 200
+
+    stats = get_stats(client)
+    assert stats["review_count"] == 2
+    assert stats["average_rating"] == 3.5
+    assert stats["histogram"] == {"1": 0, "2": 1, "3": 0, "4": 0, "5": 1}
+
+    data = {"item_id": 1, "rating": 4}
+    assert client.put("/reviews/update_review", json=data, headers=auth_headers("reviewer2")).status_code == 200
+    stats = get_stats(client)
+    assert stats["average_rating"] == 4.5
+    assert stats["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 1}
+
+    response = client.delete("/reviews/delete_review", json={"item_id": 1}, headers=auth_headers("reviewer1"))
+    assert response.status_code == 200
+    stats = get_stats(client)
+    assert stats["review_count"] == 1
+    assert stats["average_rating"] == 4
+    assert stats["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 1, "5": 0}
+
+
+def test_rating_stats_unknown_item(client, setup_database):
+    response = client.post("/reviews/get_item_rating_stats", json={"item_id": 42}, headers=auth_headers("reviewer1"))
+    assert response.status_code == 404
+
+
+def test_get_all_reviews_follows_the_cursor(client, setup_database):
+    from reviews.src.model.ReviewsModel import Review
+
+    for index in range(1, 4):
+        db.session.add(Review(customer_id=1, item_id=index, rating=index, comment=f"Review {index}"))
+    db.session.commit()
+    headers = auth_headers("reviewer1")
+
+    response = client.get("/reviews/get_all_reviews", headers=headers)
+    assert [review["id"] for review in response.json] == [1, 2, 3]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("/reviews/get_all_reviews?limit=2", headers=headers)
+    assert [review["id"] for review in response.json] == [1, 2]
+    cursor = response.headers["X-Next-Cursor"]
+    assert response.headers["Link"].endswith(f'after={cursor}>; rel="next"')
+    response = client.get(f"/reviews/get_all_reviews?limit=2&after={cursor}", headers=headers)
+    assert [review["id"] for review in response.json] == [3]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_add_review_twice_is_a_conflict(client, setup_database, monkeypatch):
+    from reviews.src.api.v1.reviews_service import ReviewsService
+
+    data = {"item_id": 1, "rating": 5, "comment": "Great"}
+    assert client.put("/reviews/add_review", json=data, headers=auth_headers("reviewer1")).status_code == 200
+    response = client.put("/reviews/add_review", json=data, headers=auth_headers("reviewer1"))
+    assert response.status_code == 409
+    assert "already reviewed" in response.json["error"]
+
+    # A concurrent request that passed the check is stopped by the unique index.
+    monkeypatch.setattr(ReviewsService, "has_reviewed", lambda self, customer_id, item_id: False)
+    response = client.put("/reviews/add_review", json=data, headers=auth_headers("reviewer1"))
+    assert response.status_code == 409
+    assert "UNIQUE" not in response.json["error"]
+    assert get_stats(client)["review_count"] == 1
+
+
+def test_review_index_migration_archives_duplicates(tmp_path, monkeypatch):
+    """The unique index migration keeps the newest review per pair and archives the others."""
+    import os
+    from sqlalchemy import inspect, text
+    from flask_migrate import downgrade
+
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI_TEST", f"sqlite:///{tmp_path / 'reviews.db'}")
+    app = create_app()
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "CREATE TABLE reviews (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL,"
+                " item_id INTEGER NOT NULL, rating INTEGER NOT NULL, comment VARCHAR(255))"
+            ))
+            connection.execute(text(
+                "INSERT INTO reviews VALUES (1, 1, 1, 2, 'old'), (2, 1, 1, 5, 'new'), (3, 2, 1, 4, NULL)"
+            ))
+
+        assert app.test_cli_runner().invoke(args=["setup-db"]).exit_code == 0
+        with db.engine.connect() as connection:
+            assert connection.execute(text("SELECT id FROM reviews ORDER BY id")).scalars().all() == [2, 3]
+            assert connection.execute(text("SELECT id, comment FROM reviews_removed_duplicates")).all() == [(1, "old")]
+
+        downgrade(os.path.join(app.root_path, "migrations"), "base")
+        with db.engine.connect() as connection:
+            assert connection.execute(text("SELECT id FROM reviews ORDER BY id")).scalars().all() == [1, 2, 3]
+        assert not inspect(db.engine).has_table("reviews_removed_duplicates")
+        db.session.remove()
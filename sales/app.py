@@ -1,38 +1,61 @@
 import os
-import sys
-
-# Dynamically add the project's base directory to PYTHONPATH
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))  # Get the absolute path to the directory containing app.py
-sys.path.append(BASE_DIR)  # Add this directory to sys.path
 
 from flask import Flask, jsonify
-from src.utils.logger import logger
-from src.api.v1.sales_controllers import sales_bp
-from src.extensions import db, migrate, jwt, cors
-from src.config import get_config
-from src.token_management import is_token_revoked, revoked_token_callback
 
 
 def create_app():
+    # Extensions, models and blueprints are imported here rather than at module
+    # level, so that importing this module stays cheap and touches no database.
+    from sales.src.config import get_config
+    from sales.src.extensions import db, migrate, jwt, cors, revocation_cache, revocation_bus, catalog_cache
+    from sales.src.utils.logger import logger
+    from shared.engine import pool_stats
+    from shared.json_provider import FastJSONProvider
+    from sales.src import token_management  # noqa: F401 (registers the JWT callbacks)
+    from sales.src.api.v1.sales_controllers import sales_bp
+
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     app.config.from_object(get_config())
     db.init_app(app)
-    migrate.init_app(app, db)
+    migrate.init_app(app, db, version_table='alembic_version_sales')
     jwt.init_app(app)
+    revocation_cache.init_app(app)
+    revocation_bus.init_app(app)
+    catalog_cache.init_app(app)
     cors.init_app(app)
 
     app.register_blueprint(sales_bp)
-    return app
 
-app = create_app()
+    @app.route('/')
+    def index():
+        logger.debug('Enter index')
+        return jsonify({'message': 'Sales API'}), 200
+
+    @app.route('/metrics')
+    def metrics():
+        return jsonify({
+            'revocation_cache': revocation_cache.stats(),
+            'revocation_bus': revocation_bus.stats(),
+            'catalog_cache': catalog_cache.stats(),
+            'db_pool': pool_stats(db.engine),
+        }), 200
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create the tables of this service's models that do not exist yet."""
+        db.create_all()
+
+    @app.cli.command('setup-db')
+    def setup_db():
+        """Create the schema of a new database, or apply the pending migrations."""
+        from shared.schema import setup_schema
+
+        result = setup_schema(db, os.path.join(os.path.dirname(__file__), 'migrations'), base_table='transactions')
+        logger.info('Database schema %s', result)
 
-@app.route('/')
-def index():
-    logger.info('Enter index')
-    return jsonify({'message': 'Sales API'}), 200
+    return app
 
-with app.app_context():
-    db.create_all()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5009, debug=True)
+    create_app().run(host='0.0.0.0', port=5009, debug=True)
@@ -0,0 +1,40 @@
+"""Add purchase_history built from completed transactions
+
+Revision ID: 9b3f7c2d5e18
+Revises: e2d84b1f9c06
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3f7c2d5e18'
+down_revision = 'e2d84b1f9c06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'purchase_history',
+        sa.Column('customer_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('purchase_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('customer_id', 'item_id'),
+        if_not_exists=True,
+    )
+    op.execute('DELETE FROM purchase_history')
+    op.execute("""
+        INSERT INTO purchase_history (customer_id, item_id, purchase_count)
+        SELECT t.customer_id, l.item_id, COUNT(DISTINCT t.id)
+        FROM transactions AS t
+        JOIN transaction_lines AS l ON l.transaction_id = t.id
+        WHERE t.status = 'completed'
+        GROUP BY t.customer_id, l.item_id
+    """)
+
+
+def downgrade():
+    op.drop_table('purchase_history')
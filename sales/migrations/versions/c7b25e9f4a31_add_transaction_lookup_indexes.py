@@ -0,0 +1,24 @@
+"""Add transaction lookup indexes
+
+Revision ID: c7b25e9f4a31
+Revises: 
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7b25e9f4a31'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transactions_customer_id', 'transactions', ['customer_id', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_customer_id', table_name='transactions', if_exists=True)
@@ -0,0 +1,150 @@
+"""Normalize transaction items into transaction_lines
+
+Revision ID: e2d84b1f9c06
+Revises: c7b25e9f4a31
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d84b1f9c06'
+down_revision = 'c7b25e9f4a31'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+# Transactions made before created_at existed are dated to the epoch, outside
+# the reversal window, so the migration does not make them reversible again.
+LEGACY_CREATED_AT = '1970-01-01 00:00:00'
+
+transaction_lines = sa.table(
+    'transaction_lines',
+    sa.column('transaction_id', sa.Integer),
+    sa.column('item_id', sa.Integer),
+    sa.column('quantity', sa.Integer),
+    sa.column('unit_price', sa.Float),
+    sa.column('currency', sa.String),
+)
+
+
+def transaction_columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('transactions')}
+
+
+def load_json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def backfill_lines():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("""
+            INSERT INTO transaction_lines (transaction_id, item_id, quantity, unit_price, currency)
+            SELECT t.id,
+                   (item.value ->> 'id')::integer,
+                   (quantity.value #>> '{}')::integer,
+                   (item.value ->> 'price_per_unit')::double precision,
+                   item.value ->> 'currency'
+            FROM transactions AS t
+            CROSS JOIN LATERAL json_array_elements(t.items::json) WITH ORDINALITY AS item(value, position)
+            JOIN LATERAL json_array_elements(t.items_quantities::json) WITH ORDINALITY AS quantity(value, position)
+                ON quantity.position = item.position
+        """)
+        return
+
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text('SELECT id, items, items_quantities FROM transactions WHERE id > :last_id ORDER BY id LIMIT :limit'),
+            {'last_id': last_id, 'limit': BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            return
+        lines = []
+        for transaction_id, items, quantities in rows:
+            for item, quantity in zip(load_json(items) or [], load_json(quantities) or []):
+                lines.append({
+                    'transaction_id': transaction_id,
+                    'item_id': item['id'],
+                    'quantity': quantity,
+                    'unit_price': item['price_per_unit'],
+                    'currency': item['currency'],
+                })
+        if lines:
+            op.bulk_insert(transaction_lines, lines)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    op.create_table(
+        'transaction_lines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('unit_price', sa.Float(), nullable=False),
+        sa.Column('currency', sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_transaction_lines_transaction_id', 'transaction_lines', ['transaction_id'], unique=False, if_not_exists=True)
+
+    columns = transaction_columns()
+    if 'items' in columns:
+        backfill_lines()
+
+    if 'created_at' not in columns:
+        op.add_column('transactions', sa.Column('created_at', sa.DateTime(), nullable=True))
+        op.execute(
+            sa.text('UPDATE transactions SET created_at = :created_at WHERE created_at IS NULL')
+            .bindparams(created_at=LEGACY_CREATED_AT)
+        )
+
+    with op.batch_alter_table('transactions') as batch_op:
+        if 'items' in columns:
+            batch_op.drop_column('items')
+            batch_op.drop_column('items_quantities')
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.add_column(sa.Column('items', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('items_quantities', sa.JSON(), nullable=True))
+
+    # The lines only keep what a reversal needs, so the restored snapshots are partial.
+    bind = op.get_bind()
+    transactions = sa.table(
+        'transactions',
+        sa.column('id', sa.Integer),
+        sa.column('items', sa.JSON),
+        sa.column('items_quantities', sa.JSON),
+    )
+    snapshots = {}
+    for transaction_id, item_id, quantity, unit_price, currency in bind.execute(sa.text(
+        'SELECT transaction_id, item_id, quantity, unit_price, currency FROM transaction_lines ORDER BY transaction_id, id'
+    )):
+        items, quantities = snapshots.setdefault(transaction_id, ([], []))
+        items.append({'id': item_id, 'price_per_unit': unit_price, 'currency': currency})
+        quantities.append(quantity)
+    for transaction_id, (items, quantities) in snapshots.items():
+        bind.execute(
+            transactions.update().where(transactions.c.id == transaction_id).values(items=items, items_quantities=quantities)
+        )
+    op.execute("UPDATE transactions SET items = '[]' WHERE items IS NULL")
+    op.execute("UPDATE transactions SET items_quantities = '[]' WHERE items_quantities IS NULL")
+
+    with op.batch_alter_table('transactions') as batch_op:
+        batch_op.alter_column('items', existing_type=sa.JSON(), nullable=False)
+        batch_op.alter_column('items_quantities', existing_type=sa.JSON(), nullable=False)
+        batch_op.drop_column('created_at')
+
+    op.drop_index('ix_transaction_lines_transaction_id', table_name='transaction_lines')
+    op.drop_table('transaction_lines')
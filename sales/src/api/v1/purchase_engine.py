@@ -0,0 +1,258 @@
+"""
+sales.purchase_engine
+=====================
+
+This module defines the `PurchaseEngine` class, which reserves stock and
+moves customer balances without read-check-write races.
+
+Every write is a conditional atomic `UPDATE` (for example
+``quantity = quantity - :q WHERE quantity >= :q``), so two workers can never
+both take the last unit or spend the same balance. On databases that support
+it, the rows are additionally locked with ``SELECT ... FOR UPDATE`` in a fixed
+order (items by ascending id, then the customer) so concurrent purchases cannot
+deadlock each other. Serialization failures and deadlocks reported by the
+database roll the unit of work back and run it again.
+
+Bulk purchases apply a whole chunk of orders with one ``UPDATE`` per table,
+taking a per-row amount from a ``CASE`` on the primary key. The amounts are
+computed from the locked rows, so a conditional update matching fewer rows
+than expected means the rows changed without being locked (databases without
+``FOR UPDATE``); this raises `ConcurrentUpdate`, which is retried as well.
+
+Classes
+-------
+PurchaseEngine
+    Runs purchase and reversal units of work with ordered locking and retries.
+"""
+
+import random
+import time
+
+from flask import current_app
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+from sales.src.model.CustomersModel import Customer
+from sales.src.model.ItemsModel import Item
+from sales.src.model.PurchaseHistoryModel import PurchaseHistory
+from sales.src.model.TransactionLinesModel import TransactionLine
+from sales.src.model.TransactionsModel import Transaction
+from sales.src.utils.errors import InsufficientStock, InsufficientBalance, ConcurrentUpdate
+from sales.src.utils.logger import logger
+from shared.sql import dialect_insert
+
+# serialization_failure and deadlock_detected
+RETRYABLE_SQLSTATES = {'40001', '40P01'}
+
+
+def is_retryable_error(error):
+    if isinstance(error, ConcurrentUpdate):
+        return True
+    if not isinstance(error, DBAPIError):
+        return False
+    orig = error.orig
+    sqlstate = getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    return isinstance(error, OperationalError) and 'database is locked' in str(orig)
+
+
+class PurchaseEngine:
+    """
+    Runs purchase and reversal units of work with ordered locking and retries.
+
+    `run` retries the whole unit of work up to `PURCHASE_MAX_RETRIES` times,
+    starting at `PURCHASE_RETRY_BACKOFF` seconds and doubling with jitter.
+    """
+
+    def __init__(self, db_session, max_retries=None, retry_backoff=None):
+        self.db_session = db_session
+        if max_retries is None:
+            max_retries = current_app.config.get('PURCHASE_MAX_RETRIES', 5)
+        if retry_backoff is None:
+            retry_backoff = current_app.config.get('PURCHASE_RETRY_BACKOFF', 0.02)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def run(self, operation):
+        attempt = 0
+        while True:
+            try:
+                return operation()
+            except Exception as e:
+                self.db_session.rollback()
+                if not is_retryable_error(e) or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = self.retry_backoff * (2 ** (attempt - 1)) * (1 + random.random())
+                logger.info('Concurrency conflict, retrying attempt %s in %.3fs: %s', attempt, delay, getattr(e, 'orig', e))
+                time.sleep(delay)
+
+    def lock_items(self, item_ids):
+        statement = (
+            select(Item)
+            .where(Item.id.in_(list(item_ids)))
+            .order_by(Item.id)
+            .with_for_update()
+        )
+        return {item.id: item for item in self.db_session.execute(statement).scalars()}
+
+    def reserve_stock(self, quantities):
+        for item_id in sorted(quantities):
+            quantity = quantities[item_id]
+            result = self.db_session.execute(
+                update(Item)
+                .where(Item.id == item_id, Item.quantity >= quantity)
+                .values(quantity=Item.quantity - quantity, stock_version=Item.stock_version + 1)
+            )
+            if result.rowcount != 1:
+                item = self.db_session.get(Item, item_id, populate_existing=True)
+                logger.info('Item %s with name %s has only %s left in stock', item.id, item.name, item.quantity)
+                raise InsufficientStock(f'Item {item.id} with name {item.name} has only {item.quantity} left in stock')
+
+    def lock_customers(self, customer_ids):
+        statement = (
+            select(Customer)
+            .where(Customer.id.in_(list(customer_ids)))
+            .order_by(Customer.id)
+            .with_for_update()
+        )
+        return {customer.id: customer for customer in self.db_session.execute(statement).scalars()}
+
+    def reserve_stock_many(self, quantities):
+        taken = case(quantities, value=Item.id)
+        result = self.db_session.execute(
+            update(Item)
+            .where(Item.id.in_(list(quantities)), Item.quantity >= taken)
+            .values(quantity=Item.quantity - taken, stock_version=Item.stock_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(quantities):
+            raise ConcurrentUpdate('Stock changed while the orders were placed')
+
+    def charge_customers(self, amounts):
+        lbp = case({customer_id: amount[0] for customer_id, amount in amounts.items()}, value=Customer.id)
+        usd = case({customer_id: amount[1] for customer_id, amount in amounts.items()}, value=Customer.id)
+        result = self.db_session.execute(
+            update(Customer)
+            .where(Customer.id.in_(list(amounts)), Customer.lbp_balance >= lbp, Customer.usd_balance >= usd)
+            .values(lbp_balance=Customer.lbp_balance - lbp, usd_balance=Customer.usd_balance - usd)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(amounts):
+            raise ConcurrentUpdate('Balances changed while the orders were placed')
+
+    def add_transactions(self, rows):
+        statement = insert(Transaction).returning(
+            Transaction.id, Transaction.status, Transaction.created_at, sort_by_parameter_order=True
+        )
+        return self.db_session.execute(statement, rows).all()
+
+    def add_lines(self, transaction, lines):
+        self.db_session.execute(
+            insert(TransactionLine),
+            [dict(line, transaction_id=transaction.id) for line in lines],
+        )
+
+    def add_all_lines(self, lines):
+        self.db_session.execute(insert(TransactionLine), lines)
+
+    def restock_transaction(self, transaction):
+        restocked = (
+            select(func.sum(TransactionLine.quantity))
+            .where(TransactionLine.transaction_id == transaction.id, TransactionLine.item_id == Item.id)
+            .scalar_subquery()
+        )
+        self.db_session.execute(
+            update(Item)
+            .where(Item.id.in_(select(TransactionLine.item_id).where(TransactionLine.transaction_id == transaction.id)))
+            .values(quantity=Item.quantity + restocked, stock_version=Item.stock_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    def charge_customer(self, customer, lbp_amount, usd_amount):
+        result = self.db_session.execute(
+            update(Customer)
+            .where(
+                Customer.id == customer.id,
+                Customer.lbp_balance >= lbp_amount,
+                Customer.usd_balance >= usd_amount,
+            )
+            .values(
+                lbp_balance=Customer.lbp_balance - lbp_amount,
+                usd_balance=Customer.usd_balance - usd_amount,
+            )
+        )
+        if result.rowcount != 1:
+            self.db_session.refresh(customer)
+            check_balance(customer, lbp_amount, usd_amount)
+
+    def refund_customer(self, customer, lbp_amount, usd_amount):
+        self.db_session.execute(
+            update(Customer)
+            .where(Customer.id == customer.id)
+            .values(
+                lbp_balance=Customer.lbp_balance + lbp_amount,
+                usd_balance=Customer.usd_balance + usd_amount,
+            )
+        )
+
+    def record_purchases(self, customer, item_ids):
+        statement = dialect_insert(self.db_session, PurchaseHistory)
+        statement = statement.on_conflict_do_update(
+            index_elements=[PurchaseHistory.customer_id, PurchaseHistory.item_id],
+            set_={'purchase_count': PurchaseHistory.purchase_count + 1},
+        )
+        self.db_session.execute(
+            statement,
+            [{'customer_id': customer.id, 'item_id': item_id, 'purchase_count': 1} for item_id in sorted(item_ids)],
+        )
+
+    def record_purchase_counts(self, counts):
+        statement = dialect_insert(self.db_session, PurchaseHistory)
+        statement = statement.on_conflict_do_update(
+            index_elements=[PurchaseHistory.customer_id, PurchaseHistory.item_id],
+            set_={'purchase_count': PurchaseHistory.purchase_count + statement.excluded.purchase_count},
+        )
+        self.db_session.execute(
+            statement,
+            [
+                {'customer_id': customer_id, 'item_id': item_id, 'purchase_count': count}
+                for (customer_id, item_id), count in sorted(counts.items())
+            ],
+        )
+
+    def forget_purchases(self, transaction):
+        self.db_session.execute(
+            update(PurchaseHistory)
+            .where(
+                PurchaseHistory.customer_id == transaction.customer_id,
+                PurchaseHistory.item_id.in_(select(TransactionLine.item_id).where(TransactionLine.transaction_id == transaction.id)),
+            )
+            .values(purchase_count=PurchaseHistory.purchase_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    def mark_reversed(self, transaction):
+        result = self.db_session.execute(
+            update(Transaction)
+            .where(Transaction.id == transaction.id, Transaction.status == 'completed')
+            .values(status='reversed')
+        )
+        return result.rowcount == 1
+
+
+def check_balance(customer, lbp_amount, usd_amount):
+    if customer.lbp_balance < lbp_amount:
+        logger.info('Customer %s has insufficient LBP balance. Required: %s, Available: %s', customer.id, lbp_amount, customer.lbp_balance)
+        raise InsufficientBalance(
+            f'Customer {customer.id} has insufficient LBP balance. '
+            f'Required: {lbp_amount}, Available: {customer.lbp_balance}'
+        )
+
+    if customer.usd_balance < usd_amount:
+        logger.info('Customer %s has insufficient USD balance. Required: %s, Available: %s', customer.id, usd_amount, customer.usd_balance)
+        raise InsufficientBalance(
+            f'Customer {customer.id} has insufficient USD balance. '
+            f'Required: {usd_amount}, Available: {customer.usd_balance}'
+        )
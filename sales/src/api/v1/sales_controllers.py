@@ -3,12 +3,14 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from werkzeug.exceptions import NotFound, BadRequest
 
-from src.extensions import db
-from src.utils.logger import logger
+from sales.src.extensions import db
+from sales.src.utils.logger import logger
+from shared.catalog import conditional_response
+from shared.pagination import load_pagination_args, page_response, ndjson_response
 
-from src.api.v1.sales_schema import PurchaseSchema, ReversePurchaseSchema, ItemSchema
-from src.api.v1.sales_service import SalesService
-from src.utils.errors import InsufficientStock, InsufficientBalance
+from sales.src.api.v1.sales_schema import PurchaseSchema, BulkPurchaseSchema, ReversePurchaseSchema, ItemSchema
+from sales.src.api.v1.sales_service import SalesService
+from sales.src.utils.errors import InsufficientStock, InsufficientBalance
 
 
 sales_bp = Blueprint('sales', __name__, url_prefix='/sales')
@@ -17,20 +19,20 @@ sales_bp = Blueprint('sales', __name__, url_prefix='/sales')
 @sales_bp.route('/purchase', methods=['PUT'])
 @jwt_required()
 def purchase():
-    logger.info('Enter purchase')
+    logger.debug('Enter purchase')
     data = request.get_json()
     schema = PurchaseSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in purchase: {e.messages}')
+        logger.info('Validation error in purchase: %s', e.messages)
         return jsonify({'error': f'Validation error in purchase: {e.messages}'}), 400
 
     customer_username = get_jwt_identity()
     service = SalesService(db_session=db.session)
     try:
         result = service.purchase(data, customer_username)
-        logger.info('Exit purchase successfully')
+        logger.debug('Exit purchase successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
@@ -39,82 +41,133 @@ def purchase():
     except InsufficientBalance as e:
         return jsonify({'error': str(e)}), 410
     except Exception as e:
-        logger.info(f'Internal server error in purchase: {e}')
+        logger.info('Internal server error in purchase: %s', e)
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/bulk_purchase', methods=['PUT'])
+@jwt_required()
+def bulk_purchase():
+    logger.debug('Enter bulk purchase')
+    data = request.get_json()
+    schema = BulkPurchaseSchema()
+    try:
+        data = schema.load(data)
+    except ValidationError as e:
+        logger.info('Validation error in bulk purchase: %s', e.messages)
+        return jsonify({'error': f'Validation error in bulk purchase: {e.messages}'}), 400
+
+    customer_username = get_jwt_identity()
+    service = SalesService(db_session=db.session)
+    try:
+        result = service.bulk_purchase(data, customer_username)
+        logger.debug('Exit bulk purchase successfully')
+        return jsonify(result), 200
+    except BadRequest as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.info('Internal server error in bulk purchase: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @sales_bp.route('/reverse_purchase', methods=['PUT'])
 @jwt_required()
 def reverse_purchase():
-    logger.info('Enter reverse purchase')
+    logger.debug('Enter reverse purchase')
     data = request.get_json()
     schema = ReversePurchaseSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in reverse purchase: {e.messages}')
+        logger.info('Validation error in reverse purchase: %s', e.messages)
         return jsonify({'error': f'Validation error in reverse purchase: {e.messages}'}), 400
 
     customer_username = get_jwt_identity()
     service = SalesService(db_session=db.session)
     try:
         result = service.reverse_purchase(data, customer_username)
-        logger.info('Exit reverse purchase successfully')
+        logger.debug('Exit reverse purchase successfully')
         return jsonify(result), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except BadRequest as e:
         return jsonify({'error': str(e)}), 408
     except Exception as e:
-        logger.info(f'Internal server error in reverse purchase: {e}')
+        logger.info('Internal server error in reverse purchase: %s', e)
         return jsonify({'error': str(e)}), 500
 
 @sales_bp.route('/get_customer_transactions', methods=['GET'])
 @jwt_required()
 def get_customer_transactions():
-    logger.info('Enter get customer transactions')
+    logger.debug('Enter get customer transactions')
+    try:
+        args = load_pagination_args(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in get customer transactions: %s', e.messages)
+        return jsonify({'error': f'Validation error in get customer transactions: {e.messages}'}), 400
+
     customer_username = get_jwt_identity()
     service = SalesService(db_session=db.session)
     try:
-        result = service.get_customer_transactions(customer_username)
-        logger.info('Exit get customer transactions successfully')
-        return jsonify(result), 200
+        if args['format'] == 'ndjson':
+            return ndjson_response(service.stream_customer_transactions(customer_username, args['after']))
+        page = service.get_customer_transactions(customer_username, args['limit'], args['after'])
+        logger.debug('Exit get customer transactions successfully')
+        return page_response(page.rows, page.next_cursor), 200
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
-        logger.info(f'Internal server error in get customer transactions: {e}')
+        logger.info('Internal server error in get customer transactions: %s', e)
         return jsonify({'error': str(e)}), 500
 
+def build_item_response(service, data):
+    result = service.inquire_item(data)
+    logger.debug('Exit inquire item successfully')
+    return jsonify(result), 200
+
 @sales_bp.route('/inquire_item', methods=['POST'])
 @jwt_required()
 def inquire_item():
-    logger.info('Enter inquire item')
+    logger.debug('Enter inquire item')
     data = request.get_json()
     schema = ItemSchema()
     try:
         data = schema.load(data)
     except ValidationError as e:
-        logger.info(f'Validation error in inquire item: {e.messages}')
+        logger.info('Validation error in inquire item: %s', e.messages)
         return jsonify({'error': f'Validation error in inquire item: {e.messages}'}), 400
 
     service = SalesService(db_session=db.session)
     try:
-        result = service.inquire_item(data)
-        logger.info('Exit inquire item successfully')
-        return jsonify(result), 200
+        version = service.get_item_version(data.get('item_id'), data.get('name'))
+        return conditional_response(version, lambda: build_item_response(service, data))
     except NotFound as e:
         return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def build_items_response(service, args):
+    if args['format'] == 'ndjson':
+        return ndjson_response(service.stream_all_items(args['after']))
+    page = service.get_all_items(args['limit'], args['after'])
+    logger.debug('Exit get all items successfully')
+    return page_response(page.rows, page.next_cursor), 200
+
 @sales_bp.route('/get_all_items', methods=['GET'])
 @jwt_required()
 def get_all_items():
-    logger.info('Enter get all items')
+    logger.debug('Enter get all items')
+    try:
+        args = load_pagination_args(request.args)
+    except ValidationError as e:
+        logger.info('Validation error in get all items: %s', e.messages)
+        return jsonify({'error': f'Validation error in get all items: {e.messages}'}), 400
+
     service = SalesService(db_session=db.session)
     try:
-        result = service.get_all_items()
-        logger.info('Exit get all items successfully')
-        return jsonify(result), 200
+        if args['format'] == 'ndjson':
+            version = service.get_items_version(args['after'], cached=False)
+        else:
+            version = service.get_items_version(args['after'], args['limit'])
+        return conditional_response(version, lambda: build_items_response(service, args))
     except Exception as e:
-        logger.info(f'Internal server error in get all items: {e}')
+        logger.info('Internal server error in get all items: %s', e)
         return jsonify({'error': str(e)}), 500
@@ -9,6 +9,19 @@ class PurchaseSchema(Schema):
         if len(data['item_ids']) != len(data['item_quantities']):
             raise ValidationError('The number of item IDs must match the number of quantities.')
 
+class BulkOrderSchema(Schema):
+    customer_username = fields.String(validate=validate.Length(min=1))
+    item_ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1))
+    item_quantities = fields.List(fields.Integer(validate=validate.Range(min=1)), required=True)
+
+    @validates_schema
+    def validate_items_and_quantities(self, data, **kwargs):
+        if len(data['item_ids']) != len(data['item_quantities']):
+            raise ValidationError('The number of item IDs must match the number of quantities.')
+
+class BulkPurchaseSchema(Schema):
+    orders = fields.List(fields.Nested(BulkOrderSchema), required=True, validate=validate.Length(min=1))
+
 class ReversePurchaseSchema(Schema):
     transaction_id = fields.Integer(required=True)
 
@@ -1,35 +1,86 @@
-from datetime import datetime, timedelta
-from src.model.CustomersModel import Customer
-from src.model.ItemsModel import Item
-from src.model.TransactionsModel import Transaction
+from collections import namedtuple
+from datetime import timedelta
+from types import SimpleNamespace
+from flask import current_app
+from sqlalchemy import or_, select
+from sales.src.model.CatalogVersionModel import CatalogVersion
+from sales.src.model.CustomersModel import Customer
+from sales.src.model.ItemsModel import Item
+from sales.src.model.TransactionsModel import Transaction
 from werkzeug.exceptions import NotFound, BadRequest
-from src.utils.errors import InsufficientStock, InsufficientBalance
-from src.utils.logger import logger
+from sales.src.extensions import catalog_cache
+from sales.src.utils.errors import InsufficientStock, InsufficientBalance, ConcurrentUpdate
+from sales.src.utils.logger import logger
+from sales.src.utils.utils import get_utc_now
+from sales.src.api.v1.purchase_engine import PurchaseEngine, check_balance
+from shared.catalog import catalog_state, catalog_version
+from shared.catalog_cache import ItemRecord
+from shared.pagination import Page, keyset_page, keyset_stream
+from shared.projection import project
+from shared.routing import read_only
+
+BulkOrder = namedtuple('BulkOrder', ['index', 'customer_id', 'quantities'])
+
+
+def bulk_failure(index, code, error):
+    return {'index': index, 'status': 'failed', 'code': code, 'error': error}
+
 
 class SalesService:
     def __init__(self, db_session):
         self.db_session = db_session
+        self.purchase_engine = PurchaseEngine(db_session)
+        self.catalog = None
+
+    @read_only
+    def get_catalog(self):
+        # One snapshot per request, so the ETag and the body agree on its version.
+        if self.catalog is None:
+            self.catalog = catalog_cache.get(
+                lambda: catalog_version(self.db_session, CatalogVersion),
+                self.load_catalog,
+            )
+        return self.catalog
+
+    def load_catalog(self):
+        columns = [getattr(Item, field) for field in ItemRecord._fields]
+        return [ItemRecord(*row) for row in self.db_session.execute(select(*columns))]
+
+    def get_stock(self, item_ids):
+        rows = self.db_session.execute(select(Item.id, Item.quantity).where(Item.id.in_(item_ids)))
+        return dict(rows.all())
 
     @staticmethod
-    def get_item_by_id(item_id):
-        return Item.query.filter(Item.id == item_id).first()
-    
-    @staticmethod
-    def get_item_by_name(item_name):
-        return Item.query.filter(Item.name == item_name).first()
+    def item_to_dict(record, quantity):
+        return dict(record._asdict(), quantity=quantity)
 
     def get_item(self, item_id, item_name=None):
-        item = self.get_item_by_id(item_id) or self.get_item_by_name(item_name)
+        item = self.get_catalog().find(item_id, item_name)
         if not item:
-            logger.info(f'Item with id {item_id} or name {item_name} not found')
+            logger.info('Item with id %s or name %s not found', item_id, item_name)
             raise NotFound(f'Item with id {item_id} or name {item_name} not found')
         return item
+
+    def get_items_by_ids(self, item_ids):
+        items_by_id = self.purchase_engine.lock_items(item_ids)
+        for item_id in item_ids:
+            if item_id not in items_by_id:
+                logger.info('Item with id %s or name None not found', item_id)
+                raise NotFound(f'Item with id {item_id} or name None not found')
+        return items_by_id
+
+    @staticmethod
+    def merge_quantities(item_ids, item_quantities):
+        quantities = {}
+        for item_id, quantity in zip(item_ids, item_quantities):
+            quantities[item_id] = quantities.get(item_id, 0) + quantity
+        return quantities
     
     @staticmethod
     def get_customer(customer_username):
         customer = Customer.query.filter(Customer.username == customer_username).first()
         if not customer:
-            logger.info(f'Customer with username {customer_username} not found')
+            logger.info('Customer with username %s not found', customer_username)
             raise NotFound(f'Customer with username {customer_username} not found')
         return customer
     
@@ -37,31 +88,33 @@ class SalesService:
     def get_transaction(transaction_id):
         transaction = Transaction.query.filter(Transaction.id == transaction_id).first()
         if not transaction:
-            logger.info(f'Transaction with id {transaction_id} not found')
+            logger.info('Transaction with id %s not found', transaction_id)
             raise NotFound(f'Transaction with id {transaction_id} not found')
         return transaction
 
     def purchase(self, data, customer_username):
-        logger.info('Enter purchase')
+        logger.debug('Enter purchase')
         item_ids = data.get('item_ids', [])
         item_quantities = data.get('item_quantities', [])
-        logger.info(f'Item ids: {item_ids}')
-        logger.info(f'Item quantities: {item_quantities}')
+        logger.info('Item ids: %s', item_ids)
+        logger.info('Item quantities: %s', item_quantities)
 
+        quantities = self.merge_quantities(item_ids, item_quantities)
+        return self.purchase_engine.run(lambda: self._purchase(customer_username, quantities))
+
+    def _purchase(self, customer_username, quantities):
         customer = self.get_customer(customer_username)
+        items_by_id = self.get_items_by_ids(list(quantities))
 
-        items = []
-        items_quantities = []
+        lines = []
         total_lbp_price = 0
         total_usd_price = 0
 
-        for index in range(len(item_ids)):
-            item_id = item_ids[index]
-            quantity = item_quantities[index]
-            item = self.get_item(item_id)
+        for item_id, quantity in quantities.items():
+            item = items_by_id[item_id]
 
             if item.quantity < quantity:
-                logger.info(f'Item {item.id} with name {item.name} has only {item.quantity} left in stock')
+                logger.info('Item %s with name %s has only %s left in stock', item.id, item.name, item.quantity)
                 raise InsufficientStock(f'Item {item.id} with name {item.name} has only {item.quantity} left in stock')
             
             if item.currency == 'LBP':
@@ -69,88 +122,272 @@ class SalesService:
             else: 
                 total_usd_price += item.price_per_unit * quantity
 
-            items.append(item)
-            items_quantities.append(quantity)
-
-        if customer.lbp_balance < total_lbp_price:
-            logger.info(f'Customer {customer.id} has insufficient LBP balance. Required: {total_lbp_price}, Available: {customer.lbp_balance}')
-            raise InsufficientBalance(
-                f'Customer {customer.id} has insufficient LBP balance. '
-                f'Required: {total_lbp_price}, Available: {customer.lbp_balance}'
-            )
-
-        if customer.usd_balance < total_usd_price:
-            logger.info(f'Customer {customer.id} has insufficient USD balance. Required: {total_usd_price}, Available: {customer.usd_balance}')
-            raise InsufficientBalance(
-                f'Customer {customer.id} has insufficient USD balance. '
-                f'Required: {total_usd_price}, Available: {customer.usd_balance}'
-            )
+            lines.append({
+                'item_id': item.id,
+                'quantity': quantity,
+                'unit_price': item.price_per_unit,
+                'currency': item.currency,
+            })
 
-        customer.lbp_balance -= total_lbp_price
-        customer.usd_balance -= total_usd_price
+        check_balance(customer, total_lbp_price, total_usd_price)
 
-        for item, quantity in zip(items, items_quantities):
-            item.quantity -= quantity
+        self.purchase_engine.reserve_stock(quantities)
+        self.purchase_engine.charge_customer(customer, total_lbp_price, total_usd_price)
 
         transaction = Transaction(
             customer_id=customer.id,
-            items=[item.to_dict() for item in items],
-            items_quantities=items_quantities,
             lbp_total_price=total_lbp_price,
             usd_total_price=total_usd_price,
         )
 
         self.db_session.add(transaction)
+        self.db_session.flush()
+        self.purchase_engine.add_lines(transaction, lines)
+        self.purchase_engine.record_purchases(customer, quantities)
         self.db_session.commit()
         logger.info('Transaction added successfully')
         return transaction.to_dict()
 
+    def bulk_purchase(self, data, caller_username):
+        logger.debug('Enter bulk purchase')
+        orders = data.get('orders', [])
+        max_orders = current_app.config.get('BULK_PURCHASE_MAX_ORDERS', 1000)
+        if len(orders) > max_orders:
+            logger.info('Bulk purchase of %s orders exceeds the limit of %s', len(orders), max_orders)
+            raise BadRequest(f'A bulk purchase holds at most {max_orders} orders, got {len(orders)}')
+        chunk_size = current_app.config.get('BULK_PURCHASE_CHUNK_SIZE', 100)
+
+        results = [None] * len(orders)
+        pending = self.validate_bulk_orders(orders, caller_username, results)
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            try:
+                chunk_results = self.purchase_engine.run(lambda: self._purchase_chunk(chunk))
+            except ConcurrentUpdate as e:
+                logger.info('Bulk purchase chunk of %s orders failed: %s', len(chunk), e)
+                chunk_results = {order.index: bulk_failure(order.index, 409, str(e)) for order in chunk}
+            for index, result in chunk_results.items():
+                results[index] = result
+
+        completed = sum(result['status'] == 'completed' for result in results)
+        logger.info('Bulk purchase completed %s of %s orders', completed, len(orders))
+        return {'completed': completed, 'failed': len(orders) - completed, 'results': results}
+
+    def validate_bulk_orders(self, orders, caller_username, results):
+        accounts = current_app.config.get('BULK_PURCHASE_ACCOUNTS', ())
+        usernames = {order.get('customer_username') or caller_username for order in orders}
+        customers = {
+            row.username: row
+            for row in self.db_session.execute(
+                select(Customer.id, Customer.username, Customer.status).where(Customer.username.in_(usernames))
+            )
+        }
+        item_ids = {item_id for order in orders for item_id in order['item_ids']}
+        known_item_ids = set(self.db_session.scalars(select(Item.id).where(Item.id.in_(item_ids))))
+
+        pending = []
+        for index, order in enumerate(orders):
+            username = order.get('customer_username') or caller_username
+            customer = customers.get(username)
+            missing = [item_id for item_id in order['item_ids'] if item_id not in known_item_ids]
+            if username != caller_username and caller_username not in accounts:
+                results[index] = bulk_failure(index, 403, f'Customer {caller_username} cannot purchase for customer {username}')
+            elif not customer:
+                results[index] = bulk_failure(index, 404, f'Customer with username {username} not found')
+            elif customer.status != 'active':
+                results[index] = bulk_failure(index, 403, f'Customer with username {username} is {customer.status}')
+            elif missing:
+                results[index] = bulk_failure(index, 404, f'Item with id {missing[0]} or name None not found')
+            else:
+                quantities = self.merge_quantities(order['item_ids'], order['item_quantities'])
+                pending.append(BulkOrder(index, customer.id, quantities))
+        return pending
+
+    def _purchase_chunk(self, orders):
+        items_by_id = self.purchase_engine.lock_items({item_id for order in orders for item_id in order.quantities})
+        customers = self.purchase_engine.lock_customers({order.customer_id for order in orders})
+        stock = {item_id: item.quantity for item_id, item in items_by_id.items()}
+        balances = {
+            customer.id: SimpleNamespace(id=customer.id, lbp_balance=customer.lbp_balance, usd_balance=customer.usd_balance)
+            for customer in customers.values()
+        }
+
+        results = {}
+        accepted = []
+        for order in orders:
+            try:
+                lines, total_lbp_price, total_usd_price = self.price_bulk_order(order, items_by_id, stock, balances)
+            except NotFound as e:
+                results[order.index] = bulk_failure(order.index, 404, str(e))
+                continue
+            except InsufficientStock as e:
+                results[order.index] = bulk_failure(order.index, 409, str(e))
+                continue
+            except InsufficientBalance as e:
+                results[order.index] = bulk_failure(order.index, 410, str(e))
+                continue
+
+            for item_id, quantity in order.quantities.items():
+                stock[item_id] -= quantity
+            balances[order.customer_id].lbp_balance -= total_lbp_price
+            balances[order.customer_id].usd_balance -= total_usd_price
+            accepted.append((order, lines, total_lbp_price, total_usd_price))
+
+        if accepted:
+            self.apply_bulk_orders(accepted, results)
+        self.db_session.commit()
+        return results
+
+    @staticmethod
+    def price_bulk_order(order, items_by_id, stock, balances):
+        lines = []
+        total_lbp_price = 0
+        total_usd_price = 0
+        for item_id, quantity in order.quantities.items():
+            item = items_by_id.get(item_id)
+            if not item:
+                raise NotFound(f'Item with id {item_id} or name None not found')
+            if stock[item_id] < quantity:
+                raise InsufficientStock(f'Item {item.id} with name {item.name} has only {stock[item_id]} left in stock')
+
+            if item.currency == 'LBP':
+                total_lbp_price += item.price_per_unit * quantity
+            else:
+                total_usd_price += item.price_per_unit * quantity
+
+            lines.append({
+                'item_id': item.id,
+                'quantity': quantity,
+                'unit_price': item.price_per_unit,
+                'currency': item.currency,
+            })
+
+        balance = balances.get(order.customer_id)
+        if not balance:
+            raise NotFound(f'Customer with id {order.customer_id} not found')
+        check_balance(balance, total_lbp_price, total_usd_price)
+        return lines, total_lbp_price, total_usd_price
+
+    def apply_bulk_orders(self, accepted, results):
+        taken = {}
+        charged = {}
+        purchase_counts = {}
+        for order, lines, total_lbp_price, total_usd_price in accepted:
+            for item_id, quantity in order.quantities.items():
+                taken[item_id] = taken.get(item_id, 0) + quantity
+                key = (order.customer_id, item_id)
+                purchase_counts[key] = purchase_counts.get(key, 0) + 1
+            lbp, usd = charged.get(order.customer_id, (0, 0))
+            charged[order.customer_id] = (lbp + total_lbp_price, usd + total_usd_price)
+
+        self.purchase_engine.reserve_stock_many(taken)
+        self.purchase_engine.charge_customers(charged)
+        rows = self.purchase_engine.add_transactions([
+            {'customer_id': order.customer_id, 'lbp_total_price': total_lbp_price, 'usd_total_price': total_usd_price}
+            for order, _, total_lbp_price, total_usd_price in accepted
+        ])
+        self.purchase_engine.add_all_lines([
+            dict(line, transaction_id=row.id)
+            for (_, lines, _, _), row in zip(accepted, rows)
+            for line in lines
+        ])
+        self.purchase_engine.record_purchase_counts(purchase_counts)
+
+        for (order, lines, total_lbp_price, total_usd_price), row in zip(accepted, rows):
+            results[order.index] = {
+                'index': order.index,
+                'status': 'completed',
+                'transaction': {
+                    'id': row.id,
+                    'customer_id': order.customer_id,
+                    'lines': lines,
+                    'lbp_total_price': total_lbp_price,
+                    'usd_total_price': total_usd_price,
+                    'status': row.status,
+                    'created_at': row.created_at,
+                },
+            }
+
     def reverse_purchase(self, data, customer_username):
-        logger.info('Enter reverse purchase')
+        logger.debug('Enter reverse purchase')
         transaction_id = data.get('transaction_id')
+        return self.purchase_engine.run(lambda: self._reverse_purchase(transaction_id, customer_username))
+
+    def _reverse_purchase(self, transaction_id, customer_username):
         transaction = self.get_transaction(transaction_id)
         customer = self.get_customer(customer_username)
 
         if transaction.customer_id != customer.id:
-            logger.info(f'Transaction with id {transaction_id} does not belong to customer with username {customer_username}')
+            logger.info('Transaction with id %s does not belong to customer with username %s', transaction_id, customer_username)
             raise BadRequest(f'Transaction with id {transaction_id} does not belong to customer with username {customer_username}')
         
         if transaction.status != 'completed':
-            logger.info(f'Transaction with id {transaction_id} is already reversed')
+            logger.info('Transaction with id %s is already reversed', transaction_id)
             raise BadRequest(f'Transaction with id {transaction_id} is already reversed')
         
-        if transaction.created_at < datetime.now() - timedelta(days=10):
-            logger.info(f'Transaction with id {transaction_id} is older than 10 days and cannot be reversed')
+        if transaction.created_at.replace(tzinfo=None) < get_utc_now().replace(tzinfo=None) - timedelta(days=10):
+            logger.info('Transaction with id %s is older than 10 days and cannot be reversed', transaction_id)
             raise BadRequest(f'Transaction with id {transaction_id} is older than 10 days and cannot be reversed')
 
-        customer.lbp_balance += transaction.lbp_total_price
-        customer.usd_balance += transaction.usd_total_price
+        if not self.purchase_engine.mark_reversed(transaction):
+            logger.info('Transaction with id %s is already reversed', transaction_id)
+            raise BadRequest(f'Transaction with id {transaction_id} is already reversed')
 
-        for item, quantity in zip(transaction.items, transaction.items_quantities):
-            item.quantity += quantity
+        self.purchase_engine.restock_transaction(transaction)
+        self.purchase_engine.forget_purchases(transaction)
+        self.purchase_engine.refund_customer(customer, transaction.lbp_total_price, transaction.usd_total_price)
 
-        transaction.status = 'reversed'
         self.db_session.commit()
         logger.info('Transaction reversed successfully')
         return transaction.to_dict()
 
-    def get_customer_transactions(self, customer_username):
-        logger.info('Enter get customer transactions')
+    def get_customer_transactions(self, customer_username, limit, after=None):
+        logger.debug('Enter get customer transactions')
         customer = self.get_customer(customer_username)
-        transactions = Transaction.query.filter(Transaction.customer_id == customer.id).all()
-        logger.info(f'Transactions retrieved successfully')
-        return [transaction.to_dict() for transaction in transactions]
+        transactions = Transaction.query.filter(Transaction.customer_id == customer.id)
+        page = keyset_page(transactions, Transaction.id, limit, after)
+        logger.info('Transactions retrieved successfully')
+        return page
 
+    def stream_customer_transactions(self, customer_username, after=None):
+        logger.debug('Enter stream customer transactions')
+        customer = self.get_customer(customer_username)
+        transactions = Transaction.query.filter(Transaction.customer_id == customer.id)
+        return keyset_stream(transactions, Transaction.id, after)
+
+    @read_only
+    def get_item_version(self, item_id, name):
+        counter = self.get_catalog().version
+        return catalog_state(self.db_session, CatalogVersion, Item, or_(Item.id == item_id, Item.name == name), counter=counter)
+
+    @read_only
+    def get_items_version(self, after=None, limit=None, cached=True):
+        counter = self.get_catalog().version if cached else None
+        return catalog_state(self.db_session, CatalogVersion, Item, counter=counter, after=after, limit=limit)
+
+    @read_only
     def inquire_item(self, data):
-        logger.info('Enter inquire item')
+        logger.debug('Enter inquire item')
         item_id = data.get('item_id')
         name = data.get('name')
         item = self.get_item(item_id, name)
-        logger.info(f'Item retrieved successfully')
-        return item.to_dict()
-
-    def get_all_items(self):
-        logger.info('Enter get all items')
-        items = Item.query.all()
-        logger.info(f'Items retrieved successfully')
-        return [item.to_dict() for item in items]
+        stock = self.get_stock([item.id])
+        if item.id not in stock:
+            logger.info('Item with id %s or name %s not found', item_id, name)
+            raise NotFound(f'Item with id {item_id} or name {name} not found')
+        logger.info('Item retrieved successfully')
+        return self.item_to_dict(item, stock[item.id])
+
+    @read_only
+    def get_all_items(self, limit, after=None):
+        logger.debug('Enter get all items')
+        items, next_cursor = self.get_catalog().page(limit, after)
+        stock = self.get_stock([item.id for item in items])
+        rows = [self.item_to_dict(item, stock[item.id]) for item in items if item.id in stock]
+        logger.info('Items retrieved successfully')
+        return Page(rows, next_cursor)
+
+    @read_only
+    def stream_all_items(self, after=None):
+        logger.debug('Enter stream all items')
+        return keyset_stream(project(Item.query, Item), Item.id, after)
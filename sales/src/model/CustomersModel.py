@@ -1,9 +1,12 @@
+from sqlalchemy.orm import deferred
 from werkzeug.security import generate_password_hash, check_password_hash
-from src.extensions import db
-from src.utils.utils import get_utc_now
+from sales.src.extensions import db
+from shared.indexes import customer_indexes
+from sales.src.utils.utils import get_utc_now
 
 class Customer(db.Model):
     __tablename__ = 'customers'
+    __table_args__ = customer_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(255), nullable=False, unique=True)
@@ -19,7 +22,8 @@ class Customer(db.Model):
     usd_balance = db.Column(db.Float, nullable=False, default=0)
     status = db.Column(db.String(255), nullable=False, default='active')
     last_logout = db.Column(db.DateTime, nullable=True)
-    items = db.Column(db.JSON, nullable=False, default=[])
+    # Never returned, so it is only loaded when accessed.
+    items = deferred(db.Column(db.JSON, nullable=False, default=[]))
 
     created_at = db.Column(db.DateTime, default=get_utc_now, nullable=False)
 
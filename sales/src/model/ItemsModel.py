@@ -1,7 +1,9 @@
-from src.extensions import db
+from sales.src.extensions import db
+from shared.indexes import item_indexes
 
 class Item(db.Model):
     __tablename__ = 'items'
+    __table_args__ = item_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False, unique=True)
@@ -10,14 +12,17 @@ class Item(db.Model):
     currency = db.Column(db.String(255), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     description = db.Column(db.String(255), nullable=False)
+    stock_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    dict_fields = (
+        'id',
+        'name',
+        'category',
+        'price_per_unit',
+        'currency',
+        'quantity',
+        'description',
+    )
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'category': self.category,
-            'price_per_unit': self.price_per_unit,
-            'currency': self.currency,
-            'quantity': self.quantity,
-            'description': self.description
-        }
+        return {field: getattr(self, field) for field in self.dict_fields}
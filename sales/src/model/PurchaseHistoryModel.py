@@ -0,0 +1,8 @@
+from sales.src.extensions import db
+
+class PurchaseHistory(db.Model):
+    __tablename__ = 'purchase_history'
+
+    customer_id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True)
+    purchase_count = db.Column(db.Integer, nullable=False, default=0)
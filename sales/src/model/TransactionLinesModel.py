@@ -0,0 +1,21 @@
+from sales.src.extensions import db
+from shared.indexes import transaction_line_indexes
+
+class TransactionLine(db.Model):
+    __tablename__ = 'transaction_lines'
+    __table_args__ = transaction_line_indexes()
+
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id', ondelete='CASCADE'), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(255), nullable=False)
+
+    def to_dict(self):
+        return {
+            'item_id': self.item_id,
+            'quantity': self.quantity,
+            'unit_price': self.unit_price,
+            'currency': self.currency
+        }
@@ -1,23 +1,27 @@
-from src.extensions import db
+from sales.src.extensions import db
+from sales.src.model.TransactionLinesModel import TransactionLine
+from sales.src.utils.utils import get_utc_now
+from shared.indexes import transaction_indexes
 
 class Transaction(db.Model):
     __tablename__ = 'transactions'
+    __table_args__ = transaction_indexes()
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, nullable=False)
-    items = db.Column(db.JSON, nullable=False, default=[])
-    items_quantities = db.Column(db.JSON, nullable=False, default=[])
     lbp_total_price = db.Column(db.Float, nullable=False)
     usd_total_price = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(255), nullable=False, default='completed')
+    created_at = db.Column(db.DateTime, default=get_utc_now, nullable=False)
+    lines = db.relationship(TransactionLine, lazy='selectin', order_by=TransactionLine.id)
 
     def to_dict(self):
         return {
             'id': self.id,
-            'items': self.items,
             'customer_id': self.customer_id,
-            'items_quantities': self.items_quantities,
+            'lines': [line.to_dict() for line in self.lines],
             'lbp_total_price': self.lbp_total_price,
             'usd_total_price': self.usd_total_price,
-            'status': self.status
+            'status': self.status,
+            'created_at': self.created_at
         }
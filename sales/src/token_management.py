@@ -1,14 +1,30 @@
 from flask import jsonify
-from src.model.CustomersModel import Customer
-from src.extensions import jwt
+from sqlalchemy import or_
+from sales.src.model.CustomersModel import Customer
+from sales.src.extensions import db, jwt, revocation_bus, revocation_cache
+from shared.revocation_bus import RevocationState, to_timestamp
+
+
+def load_customer_state(customer_username):
+    customer = db.session.query(Customer.last_logout, Customer.status).filter(Customer.username == customer_username).first()
+    if customer:
+        return RevocationState(to_timestamp(customer.last_logout), customer.status)
+    return None
+
+@revocation_bus.bootstrap_loader
+def load_revoked_customers():
+    customers = db.session.query(Customer.username, Customer.last_logout, Customer.status).filter(
+        or_(Customer.last_logout.isnot(None), Customer.status != 'active')
+    )
+    return [(customer.username, RevocationState(to_timestamp(customer.last_logout), customer.status)) for customer in customers]
 
 @jwt.token_in_blocklist_loader
 def is_token_revoked(jwt_header, jwt_payload):
-    customer_username = jwt_payload['sub']
-    customer = Customer.query.filter(Customer.username == customer_username).first()
-    if customer and customer.last_logout and customer.status == 'active':
-        return jwt_payload['iat'] < customer.last_logout.timestamp()
-    return False
+    if revocation_bus.enabled:
+        state = revocation_bus.get(jwt_payload['sub'])
+    else:
+        state = revocation_cache.get_or_load(jwt_payload['sub'], load_customer_state)
+    return state is not None and state.revokes(jwt_payload['iat'])
 
 @jwt.revoked_token_loader
 def revoked_token_callback(jwt_header, jwt_payload):
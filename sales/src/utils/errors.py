@@ -5,3 +5,7 @@ class InsufficientStock(Exception):
 class InsufficientBalance(Exception):
     def __init__(self, message='Insufficient balance'):
         super().__init__(message)
+
+class ConcurrentUpdate(Exception):
+    def __init__(self, message='Rows changed concurrently, try again'):
+        super().__init__(message)
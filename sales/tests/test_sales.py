@@ -1,10 +1,18 @@
+import logging
+import os
+import subprocess
+import sys
 import pytest
+import threading
 from flask import Flask
 from sales.app import create_app
 from sales.src.extensions import db
 from sales.src.model.CustomersModel import Customer
 from sales.src.model.ItemsModel import Item
 from sales.src.model.TransactionsModel import Transaction
+from sales.src.model.TransactionLinesModel import TransactionLine
+from sales.src.model.PurchaseHistoryModel import PurchaseHistory
+from shared.logger import LOGGER_NAME
 
 @pytest.fixture
 def app():
@@ -17,10 +25,8 @@ def app():
         db.create_all()
         # Seed the database with mock data
         seed_database()
-
-    yield app
-
-    with app.app_context():
+        yield app
+        db.session.remove()
         db.drop_all()
 
 
@@ -90,6 +96,44 @@ def test_insufficient_purchase(client):
     print(response.json)
     assert response.status_code == 409
 
+def test_purchase_merges_duplicate_items(client):
+    """Test that repeated item ids in a basket are merged before the stock check."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    data = {
+        "item_ids": [1, 1],
+        "item_quantities": [2, 3],
+    }
+    response = client.put("/sales/purchase", json=data, headers=headers)
+    assert response.status_code == 200
+    assert response.json["lines"] == [{"item_id": 1, "quantity": 5, "unit_price": 1000, "currency": "USD"}]
+    assert response.json["usd_total_price"] == 5000
+    assert db.session.get(Item, 1).quantity == 5
+
+
+def test_purchase_duplicate_items_insufficient_stock(client):
+    """Test that merged quantities are checked against the stock as a whole."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    data = {
+        "item_ids": [1, 1],
+        "item_quantities": [6, 6],
+    }
+    response = client.put("/sales/purchase", json=data, headers=headers)
+    assert response.status_code == 409
+
+
+def test_purchase_unknown_item(client):
+    """Test that a basket referencing a missing item is rejected."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    data = {
+        "item_ids": [1, 42],
+        "item_quantities": [1, 1],
+    }
+    response = client.put("/sales/purchase", json=data, headers=headers)
+    assert response.status_code == 404
+    assert "Item with id 42" in response.json["error"]
+    assert db.session.get(Item, 1).quantity == 10
+
+
 def test_reverse_purchase(client):
     """Test the reverse purchase route."""
     headers = {"Authorization": f"Bearer {get_test_token()}"}
@@ -100,10 +144,137 @@ def test_reverse_purchase(client):
     assert response.status_code in [200, 404]  # Allowing for NotFound if transaction doesn't exist
 
 
+def test_reverse_purchase_restocks_lines(client):
+    """Test that reversing a purchase restocks every line and refunds the customer."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    data = {
+        "item_ids": [1, 1],
+        "item_quantities": [2, 1],
+    }
+    response = client.put("/sales/purchase", json=data, headers=headers)
+    assert response.status_code == 200
+    assert TransactionLine.query.filter_by(transaction_id=response.json["id"]).count() == 1
+    assert db.session.get(Item, 1).quantity == 7
+
+    response = client.put("/sales/reverse_purchase", json={"transaction_id": response.json["id"]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json["status"] == "reversed"
+    db.session.expire_all()
+    assert db.session.get(Item, 1).quantity == 10
+    assert Customer.query.filter_by(username="testuser").first().usd_balance == 5000
+
+
+def test_purchase_history_tracks_purchases_and_reversals(client):
+    """Test that the purchase history counts completed transactions per item."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    data = {"item_ids": [1], "item_quantities": [1]}
+    first = client.put("/sales/purchase", json=data, headers=headers).json["id"]
+    client.put("/sales/purchase", json=data, headers=headers)
+    assert db.session.get(PurchaseHistory, (1, 1)).purchase_count == 2
+
+    client.put("/sales/reverse_purchase", json={"transaction_id": first}, headers=headers)
+    db.session.expire_all()
+    assert db.session.get(PurchaseHistory, (1, 1)).purchase_count == 1
+
+
+def test_bulk_purchase_reports_each_order(app, client):
+    """Test that failed orders of a bulk purchase do not abort the others."""
+    app.config["BULK_PURCHASE_CHUNK_SIZE"] = 2
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    orders = [
+        {"item_ids": [1], "item_quantities": [2]},
+        {"item_ids": [1], "item_quantities": [200]},
+        {"item_ids": [42], "item_quantities": [1]},
+        {"item_ids": [1, 1], "item_quantities": [1, 2]},
+        {"item_ids": [1], "item_quantities": [1], "customer_username": "otheruser"},
+    ]
+    response = client.put("/sales/bulk_purchase", json={"orders": orders}, headers=headers)
+    assert response.status_code == 200
+    assert response.json["completed"] == 2
+    assert response.json["failed"] == 3
+    results = response.json["results"]
+    assert [result["status"] for result in results] == ["completed", "failed", "failed", "completed", "failed"]
+    assert [result.get("code") for result in results] == [None, 409, 404, None, 403]
+    assert results[3]["transaction"]["lines"] == [{"item_id": 1, "quantity": 3, "unit_price": 1000, "currency": "USD"}]
+
+    db.session.expire_all()
+    assert db.session.get(Item, 1).quantity == 5
+    assert Customer.query.filter_by(username="testuser").first().usd_balance == 0
+    assert db.session.get(PurchaseHistory, (1, 1)).purchase_count == 2
+    assert TransactionLine.query.count() == 2
+
+
+def test_bulk_purchase_checks_balances_across_orders(app, client):
+    """Test that orders of one chunk are charged against the remaining balance."""
+    app.config["BULK_PURCHASE_ACCOUNTS"] = ["testuser"]
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    orders = [{"item_ids": [1], "item_quantities": [3]}, {"item_ids": [1], "item_quantities": [3]}]
+    response = client.put("/sales/bulk_purchase", json={"orders": orders}, headers=headers)
+    assert [result.get("code") for result in response.json["results"]] == [None, 410]
+
+    orders = [{"item_ids": [1], "item_quantities": [1], "customer_username": "otheruser"}]
+    response = client.put("/sales/bulk_purchase", json={"orders": orders}, headers=headers)
+    assert response.json["results"][0]["code"] == 404
+
+
+def take_stock_before_reserve(monkeypatch, times):
+    """Empty the stock of item 1 right before the next `times` chunks reserve it."""
+    from sqlalchemy import update
+    from sales.src.api.v1.purchase_engine import PurchaseEngine
+
+    reserve_stock_many = PurchaseEngine.reserve_stock_many
+    calls = []
+
+    def reserve_after_concurrent_sale(self, quantities):
+        calls.append(quantities)
+        if len(calls) <= times:
+            self.db_session.execute(update(Item).where(Item.id == 1).values(quantity=0))
+        return reserve_stock_many(self, quantities)
+
+    monkeypatch.setattr(PurchaseEngine, "reserve_stock_many", reserve_after_concurrent_sale)
+    return calls
+
+
+def test_bulk_purchase_retries_concurrent_updates(app, client, monkeypatch):
+    """Test that a chunk whose stock changed after it was priced is run again."""
+    app.config["PURCHASE_RETRY_BACKOFF"] = 0
+    calls = take_stock_before_reserve(monkeypatch, times=1)
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    orders = [{"item_ids": [1], "item_quantities": [2]}]
+    response = client.put("/sales/bulk_purchase", json={"orders": orders}, headers=headers)
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert response.json["results"][0]["status"] == "completed"
+
+    db.session.expire_all()
+    assert db.session.get(Item, 1).quantity == 8
+
+
+def test_bulk_purchase_reports_chunks_that_keep_conflicting(app, client, monkeypatch):
+    """Test that a chunk failing every retry fails its orders without aborting the batch."""
+    app.config["PURCHASE_MAX_RETRIES"] = 1
+    app.config["PURCHASE_RETRY_BACKOFF"] = 0
+    app.config["BULK_PURCHASE_CHUNK_SIZE"] = 1
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    orders = [{"item_ids": [1], "item_quantities": [1]}, {"item_ids": [1], "item_quantities": [2]}]
+    calls = take_stock_before_reserve(monkeypatch, times=2)
+    response = client.put("/sales/bulk_purchase", json={"orders": orders}, headers=headers)
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert response.json["completed"] == 1
+    results = response.json["results"]
+    assert [result["status"] for result in results] == ["failed", "completed"]
+    assert results[0]["code"] == 409
+    assert results[0]["error"] == "Stock changed while the orders were placed"
+
+    db.session.expire_all()
+    assert db.session.get(Item, 1).quantity == 8
+
+
 def test_get_customer_transactions(client):
     """Test the get customer transactions route."""
     headers = {"Authorization": f"Bearer {get_test_token()}"}
-    response = client.post("/sales/get_customer_transactions", headers=headers)
+    response = client.get("/sales/get_customer_transactions", headers=headers)
     assert response.status_code == 200
     assert isinstance(response.json, list)
 
@@ -113,13 +284,277 @@ def test_inquire_item(client):
     data = {
         "item_id": 1,
     }
-    response = client.get("/sales/inquire_item", json=data)
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.post("/sales/inquire_item", json=data, headers=headers)
     assert response.status_code == 200
     assert response.json["name"] == "Laptop"
 
 
 def test_get_all_items(client):
     """Test the get all items route."""
-    response = client.get("/sales/get_all_items")
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.get("/sales/get_all_items", headers=headers)
+    assert response.status_code == 200
+    assert isinstance(response.json, list)
+
+
+def test_purchase_invalidates_item_etags(client):
+    """Test that a purchase changes the ETag of the items it sold."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.post("/sales/inquire_item", json={"item_id": 1}, headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    response = client.post("/sales/inquire_item", json={"item_id": 1}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.put("/sales/purchase", json={"item_ids": [1], "item_quantities": [1]}, headers=headers)
+    response = client.post("/sales/inquire_item", json={"item_id": 1}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json["quantity"] == 9
+
+
+def follow_cursor(client, url, headers):
+    """Fetch every page of a list endpoint, returning the ids of its rows."""
+    ids = []
+    separator = "&" if "?" in url else "?"
+    next_url = url
+    while next_url:
+        response = client.get(next_url, headers=headers)
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json]
+        cursor = response.headers.get("X-Next-Cursor")
+        next_url = cursor and f"{url}{separator}after={cursor}"
+    return ids
+
+
+def test_list_endpoints_follow_the_cursor(client):
+    """Test that pages chain through X-Next-Cursor and that no limit returns every row."""
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    for index in range(2, 6):
+        db.session.add(Item(name=f"Item {index}", category="electronics", price_per_unit=1, currency="USD", quantity=10, description="An item"))
+    db.session.commit()
+    for _ in range(3):
+        client.put("/sales/purchase", json={"item_ids": [1], "item_quantities": [1]}, headers=headers)
+
+    assert follow_cursor(client, "/sales/get_all_items?limit=2", headers) == [1, 2, 3, 4, 5]
+    assert follow_cursor(client, "/sales/get_customer_transactions?limit=2", headers) == [1, 2, 3]
+
+    response = client.get("/sales/get_all_items", headers=headers)
+    assert [item["id"] for item in response.json] == [1, 2, 3, 4, 5]
+    assert "X-Next-Cursor" not in response.headers
+    response = client.get("/sales/get_customer_transactions?after=1", headers=headers)
+    assert [transaction["id"] for transaction in response.json] == [2, 3]
+
+
+def test_purchases_change_list_etags_without_the_catalog_counter(client):
+    """Test that purchases version the stock of their items, not the shared catalog row."""
+    from sales.src.model.CatalogVersionModel import CatalogVersion
+    from shared.catalog import catalog_version
+
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    etag = client.get("/sales/get_all_items?limit=10", headers=headers).headers["ETag"]
+    counter = catalog_version(db.session, CatalogVersion)
+
+    client.put("/sales/purchase", json={"item_ids": [1], "item_quantities": [1]}, headers=headers)
+    orders = [{"item_ids": [1], "item_quantities": [1]}]
+    client.put("/sales/bulk_purchase", json={"orders": orders}, headers=headers)
+    response = client.get("/sales/get_all_items?limit=10", headers={**headers, "If-None-Match": etag})
     assert response.status_code == 200
-    assert isinstance(response.json, list)
\ No newline at end of file
+    assert response.json[0]["quantity"] == 8
+    assert catalog_version(db.session, CatalogVersion) == counter
+
+    etag = response.headers["ETag"]
+    response = client.get("/sales/get_all_items?limit=10", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_catalog_cache_serves_fields_and_reads_stock(app, client):
+    """Test that purchases keep the cached catalog while quantities stay current."""
+    from sales.src.extensions import catalog_cache
+    from sales.src.model.CatalogVersionModel import CatalogVersion
+    from shared.catalog import bump_catalog_version
+
+    catalog_cache.check_interval = 0
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.post("/sales/inquire_item", json={"item_id": 1}, headers=headers)
+    assert response.json["quantity"] == 10
+
+    client.put("/sales/purchase", json={"item_ids": [1], "item_quantities": [3]}, headers=headers)
+    response = client.post("/sales/inquire_item", json={"name": "Laptop"}, headers=headers)
+    assert response.json["quantity"] == 7
+    assert catalog_cache.stats()["loads"] == 1
+
+    db.session.get(Item, 1).price_per_unit = 900
+    bump_catalog_version(db.session, CatalogVersion)
+    db.session.commit()
+    response = client.get("/sales/get_all_items", headers=headers)
+    assert [(item["price_per_unit"], item["quantity"]) for item in response.json] == [(900, 7)]
+    assert catalog_cache.stats()["loads"] == 2
+
+
+def test_catalog_etag_follows_the_cached_snapshot(app, client):
+    """Test that a stale cached catalog is never served under the tag of a newer one."""
+    from sales.src.extensions import catalog_cache
+    from sales.src.model.CatalogVersionModel import CatalogVersion
+    from shared.catalog import bump_catalog_version
+
+    catalog_cache.check_interval = 60
+    headers = {"Authorization": f"Bearer {get_test_token()}"}
+    response = client.get("/sales/get_all_items", headers=headers)
+    old_etag = response.headers["ETag"]
+
+    db.session.get(Item, 1).price_per_unit = 900
+    bump_catalog_version(db.session, CatalogVersion)
+    db.session.commit()
+    response = client.get("/sales/get_all_items", headers=headers)
+    assert response.json[0]["price_per_unit"] != 900
+    stale_etag = response.headers["ETag"]
+    assert stale_etag == old_etag
+
+    catalog_cache.invalidate()
+    response = client.get("/sales/get_all_items", headers={**headers, "If-None-Match": stale_etag})
+    assert response.status_code == 200
+    assert response.json[0]["price_per_unit"] == 900
+
+
+def run_concurrent_purchases(app, token, workers):
+    """Fire one single-unit purchase per thread, all released at the same time."""
+    barrier = threading.Barrier(workers)
+    status_codes = []
+    lock = threading.Lock()
+
+    def buy():
+        client = app.test_client()
+        barrier.wait()
+        response = client.put(
+            "/sales/purchase",
+            json={"item_ids": [1], "item_quantities": [1]},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        with lock:
+            status_codes.append(response.status_code)
+
+    threads = [threading.Thread(target=buy) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return status_codes
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """An app backed by an SQLite file so every worker thread gets its own connection."""
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI_TEST", f"sqlite:///{tmp_path / 'sales.db'}")
+    monkeypatch.setenv("PURCHASE_MAX_RETRIES", "50")
+    monkeypatch.setenv("PURCHASE_RETRY_BACKOFF", "0.005")
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        seed_database()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_concurrent_purchases_do_not_oversell(file_app):
+    """Concurrent buyers can never take more units than are in stock."""
+    customer = Customer.query.filter_by(username="testuser").first()
+    customer.usd_balance = 1000000
+    db.session.commit()
+
+    status_codes = run_concurrent_purchases(file_app, get_test_token(), workers=25)
+
+    db.session.expire_all()
+    item = db.session.get(Item, 1)
+    customer = Customer.query.filter_by(username="testuser").first()
+    assert set(status_codes) <= {200, 409}
+    assert status_codes.count(200) == 10
+    assert item.quantity == 0
+    assert customer.usd_balance == 1000000 - 10 * 1000
+    assert Transaction.query.count() == 10
+
+
+def test_concurrent_purchases_do_not_double_spend(file_app):
+    """Concurrent purchases can never spend more than the customer's balance."""
+    status_codes = run_concurrent_purchases(file_app, get_test_token(), workers=10)
+
+    db.session.expire_all()
+    item = db.session.get(Item, 1)
+    customer = Customer.query.filter_by(username="testuser").first()
+    assert set(status_codes) <= {200, 410}
+    assert status_codes.count(200) == 5
+    assert customer.usd_balance == 0
+    assert item.quantity == 5
+
+
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+def test_importing_the_app_module_is_cheap():
+    """Importing sales.app builds no app, opens no database and stays within budget."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import sales.app\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(elapsed, 'sales.src.extensions' in sys.modules, hasattr(sales.app, 'app'))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    elapsed, extensions_loaded, module_app = output.split()
+    assert extensions_loaded == "False"
+    assert module_app == "False"
+    assert float(elapsed) < IMPORT_BUDGET_SECONDS
+
+
+@pytest.fixture
+def empty_database(tmp_path, monkeypatch):
+    """An app on an SQLite file that holds no tables yet."""
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URI_TEST", f"sqlite:///{tmp_path / 'sales.db'}")
+    app = create_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def test_setup_db_creates_a_new_schema_at_the_latest_revision(empty_database):
+    """Test that setup-db creates the tables of an empty database and stamps them."""
+    from sqlalchemy import inspect, text
+
+    handlers = logging.getLogger().handlers[:]
+    result = empty_database.test_cli_runner().invoke(args=["setup-db"])
+    assert result.exit_code == 0, result.output
+    assert not logging.getLogger(LOGGER_NAME).disabled
+    assert logging.getLogger().handlers == handlers
+
+    inspector = inspect(db.engine)
+    assert {"transactions", "transaction_lines", "purchase_history"} <= set(inspector.get_table_names())
+    with db.engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version_sales")).scalar() == "9b3f7c2d5e18"
+
+    result = empty_database.test_cli_runner().invoke(args=["setup-db"])
+    assert result.exit_code == 0, result.output
+
+
+def test_setup_db_migrates_a_database_created_before_the_migrations(empty_database):
+    """Test that setup-db migrates tables created by the old import-time schema creation."""
+    from sqlalchemy import text
+
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE transactions (id INTEGER PRIMARY KEY, customer_id INTEGER NOT NULL, items JSON NOT NULL,"
+            " items_quantities JSON NOT NULL, lbp_total_price FLOAT, usd_total_price FLOAT, status VARCHAR(255))"
+        ))
+        connection.execute(text(
+            "INSERT INTO transactions VALUES (1, 1, '[{\"id\": 1, \"price_per_unit\": 1000, \"currency\": \"USD\"}]',"
+            " '[2]', 0, 2000, 'completed')"
+        ))
+
+    result = empty_database.test_cli_runner().invoke(args=["setup-db"])
+    assert result.exit_code == 0, result.output
+
+    assert [(line.item_id, line.quantity) for line in TransactionLine.query.all()] == [(1, 2)]
+    assert db.session.get(PurchaseHistory, (1, 1)).purchase_count == 1
+    assert db.session.get(Transaction, 1).created_at.year == 1970
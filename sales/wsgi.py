@@ -0,0 +1,3 @@
+from sales.app import create_app
+
+app = create_app()
@@ -0,0 +1,203 @@
+"""
+shared.catalog
+==============
+
+This module versions the item catalog and answers conditional requests on
+the catalog endpoints of the inventory and sales services.
+
+A catalog response depends on two kinds of writes, versioned separately:
+
+- Adding, updating and deleting items, which may change any field, increment
+  the `CATALOG_ROW` counter of the `catalog_version` table.
+- Purchases, reversals and restocks only change stock. They increment the
+  `stock_version` column of each item they change, in the same ``UPDATE``
+  that changes its quantity. The item rows are locked by that update
+  anyway, so concurrent purchases of different items never wait on a shared
+  row.
+
+Catalog responses carry a strong ``ETag`` derived from the counter, the sum
+of the stock versions of the items the response covers, and the request. A
+request whose ``If-None-Match`` matches it gets an empty ``304 Not Modified``
+before the catalog is read or serialized. Stock versions only grow, so
+every stock change moves the sum, and items are only added or removed along
+with the counter. The versions are read before the items, so a response is
+never older than its tag. A response built from a cached copy of the catalog
+is tagged with the counter of that copy rather than the stored one, so a
+stale copy never carries the tag of a newer catalog.
+
+Functions
+---------
+bump_catalog_version(session, model)
+    Increments the catalog counter in the session's transaction.
+catalog_version(session, model)
+    Returns the current catalog counter.
+stock_version(session, model, *criteria, after, limit)
+    Returns the sum of the stock versions of the matching items.
+catalog_state(session, catalog_model, item_model, *criteria, counter, after, limit)
+    Returns the version of a catalog response.
+catalog_etag(version)
+    Returns the entity tag of the current request at a catalog version.
+conditional_response(version, build)
+    Answers the current request with a 304 or the response built by `build`.
+"""
+
+import hashlib
+
+from flask import current_app, make_response, request
+from sqlalchemy import func, select
+
+from shared.sql import dialect_insert
+
+CATALOG_ROW = 1
+
+
+def bump_catalog_version(session, model):
+    """
+    Increments the catalog counter in the session's transaction.
+
+    Call it for writes that may change other item fields than the stock;
+    stock changes increment the `stock_version` of their items instead.
+
+    Parameters
+    ----------
+    session : Session
+        The session holding the write to `items`.
+    model : type
+        The service's `CatalogVersion` model.
+    """
+    statement = dialect_insert(session, model).values(id=CATALOG_ROW, version=1)
+    statement = statement.on_conflict_do_update(
+        index_elements=[model.id],
+        set_={'version': model.version + 1},
+    )
+    session.execute(statement)
+
+
+def catalog_version(session, model):
+    """
+    Returns the current catalog counter.
+
+    Parameters
+    ----------
+    session : Session
+        The session to read with.
+    model : type
+        The service's `CatalogVersion` model.
+
+    Returns
+    -------
+    int
+        The version, or 0 before the counter was first incremented.
+    """
+    return session.scalar(select(model.version).where(model.id == CATALOG_ROW)) or 0
+
+
+def stock_version(session, model, *criteria, after=None, limit=None):
+    """
+    Returns the sum of the stock versions of the matching items.
+
+    Parameters
+    ----------
+    session : Session
+        The session to read with.
+    model : type
+        The service's `Item` model.
+    *criteria
+        Conditions selecting the items, such as ``Item.id == 1``.
+    after : int, optional
+        Only count items with a greater id, as a keyset page does.
+    limit : int, optional
+        Only count the first `limit` items in id order.
+
+    Returns
+    -------
+    int
+        The sum, 0 when no item matches.
+    """
+    items = select(model.stock_version).where(*criteria)
+    if after is not None:
+        items = items.where(model.id > after)
+    if limit is not None:
+        items = items.order_by(model.id).limit(limit)
+    items = items.subquery()
+    return session.scalar(select(func.coalesce(func.sum(items.c.stock_version), 0)))
+
+
+def catalog_state(session, catalog_model, item_model, *criteria, counter=None, after=None, limit=None):
+    """
+    Returns the version of a catalog response.
+
+    Parameters
+    ----------
+    session : Session
+        The session to read with.
+    catalog_model : type
+        The service's `CatalogVersion` model.
+    item_model : type
+        The service's `Item` model.
+    *criteria, after, limit
+        The items the response covers, as for `stock_version`.
+    counter : int, optional
+        The catalog counter the response is built from, such as the version
+        of a cached `CatalogSnapshot`. Read from `catalog_model` by default.
+
+    Returns
+    -------
+    str
+        The catalog counter and the stock version of the items.
+    """
+    version = catalog_version(session, catalog_model) if counter is None else counter
+    return f'{version}.{stock_version(session, item_model, *criteria, after=after, limit=limit)}'
+
+
+def catalog_etag(version):
+    """
+    Returns the entity tag of the current request at a catalog version.
+
+    The tag covers the path, the query string and the body, so the same
+    endpoint asked for different items or pages gets different tags.
+
+    Parameters
+    ----------
+    version : str
+        The catalog version, from `catalog_state`.
+
+    Returns
+    -------
+    str
+        The unquoted tag.
+    """
+    digest = hashlib.sha1()
+    digest.update(request.full_path.encode())
+    digest.update(b'\0')
+    digest.update(request.get_data())
+    return f'{version}-{digest.hexdigest()[:20]}'
+
+
+def conditional_response(version, build):
+    """
+    Answers the current request with a 304 or the response built by `build`.
+
+    Parameters
+    ----------
+    version : str
+        The catalog version from `catalog_state`, read before any item.
+    build : callable
+        Returns the full response, as a view would.
+
+    Returns
+    -------
+    Response
+        A ``304 Not Modified`` if ``If-None-Match`` matches the tag, else the
+        built response, tagged when it is a 200.
+    """
+    tag = catalog_etag(version)
+    if request.if_none_match.contains(tag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
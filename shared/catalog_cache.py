@@ -0,0 +1,225 @@
+"""
+shared.catalog_cache
+====================
+
+This module defines the `CatalogCache` class, an in-process copy of the
+fields of every item that only change when the catalog is edited.
+
+Names, categories, prices, currencies and descriptions change when inventory
+adds, updates or deletes an item, which also increments the `CATALOG_ROW`
+counter of `catalog_version` (see `shared.catalog`). The cache keeps the
+items as an immutable `CatalogSnapshot` tagged with that counter. It checks
+the counter at most once per `check_interval` seconds and reloads the whole
+snapshot when the counter moved. Stock is never cached: purchases leave the
+counter alone, and callers read quantities from the database.
+
+Readers never take a lock. A reload swaps in a new snapshot, so a reader
+keeps a consistent view for as long as it holds one.
+
+Classes
+-------
+ItemRecord
+    The cached fields of one item.
+CatalogSnapshot
+    An immutable id map, name index and id order of the cached items.
+CatalogCache
+    A thread-safe, versioned holder of the current `CatalogSnapshot`.
+"""
+
+import bisect
+import threading
+import time
+from collections import namedtuple
+
+ItemRecord = namedtuple('ItemRecord', ['id', 'name', 'category', 'price_per_unit', 'currency', 'description'])
+
+
+class CatalogSnapshot:
+    """
+    An immutable id map, name index and id order of the cached items.
+
+    Parameters
+    ----------
+    version : int
+        The `CATALOG_ROW` counter read before the items were loaded.
+    records : iterable of ItemRecord
+        The items.
+    """
+
+    __slots__ = ('version', 'records', 'ids', 'by_name')
+
+    def __init__(self, version, records):
+        self.version = version
+        self.records = {record.id: record for record in records}
+        self.ids = sorted(self.records)
+        self.by_name = {record.name: record.id for record in self.records.values()}
+
+    def find(self, item_id=None, name=None):
+        """
+        Returns the record of an item by id, or else by name.
+
+        Parameters
+        ----------
+        item_id : int, optional
+            The item id.
+        name : str, optional
+            The item name, used when no item has the id.
+
+        Returns
+        -------
+        ItemRecord or None
+            The record, or None if neither identifies an item.
+        """
+        record = self.records.get(item_id)
+        if record is None and name is not None:
+            record = self.records.get(self.by_name.get(name))
+        return record
+
+    def page(self, limit, after=None):
+        """
+        Returns one page of records in id order, like `keyset_page`.
+
+        Parameters
+        ----------
+        limit : int or None
+            The maximum number of records in the page, or `None` for all.
+        after : int, optional
+            Only records with a greater id are returned.
+
+        Returns
+        -------
+        tuple of (list of ItemRecord, int or None)
+            The records and the cursor of the next page.
+        """
+        start = 0 if after is None else bisect.bisect_right(self.ids, after)
+        if limit is None:
+            return [self.records[item_id] for item_id in self.ids[start:]], None
+        ids = self.ids[start:start + limit + 1]
+        next_cursor = None
+        if len(ids) > limit:
+            ids = ids[:limit]
+            next_cursor = ids[-1]
+        return [self.records[item_id] for item_id in ids], next_cursor
+
+    def __len__(self):
+        return len(self.records)
+
+
+class CatalogCache:
+    """
+    A thread-safe, versioned holder of the current `CatalogSnapshot`.
+
+    Parameters
+    ----------
+    check_interval : float
+        Seconds during which a snapshot is used without checking the counter.
+        With 0 the counter is read on every call.
+    clock : callable, optional
+        Monotonic time source, overridable for tests.
+
+    Methods
+    -------
+    init_app(app)
+        Reads `CATALOG_CACHE_CHECK_INTERVAL` from the app config.
+    get(version_loader, loader)
+        Returns a snapshot at least as new as the counter.
+    invalidate()
+        Forces the next call to check the counter.
+    clear()
+        Drops the snapshot and resets the counters.
+    stats()
+        Returns the hit, check and load counters and the snapshot size.
+    """
+
+    def __init__(self, check_interval=1.0, clock=time.monotonic):
+        self.check_interval = check_interval
+        self.clock = clock
+        self.hits = 0
+        self.checks = 0
+        self.loads = 0
+        self._snapshot = None
+        self._checked_until = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configures the cache from a Flask application.
+
+        Parameters
+        ----------
+        app : Flask
+            The application whose config holds the cache settings.
+        """
+        self.check_interval = app.config.get('CATALOG_CACHE_CHECK_INTERVAL', self.check_interval)
+        self.clear()
+
+    def get(self, version_loader, loader):
+        """
+        Returns a snapshot at least as new as the counter.
+
+        Parameters
+        ----------
+        version_loader : callable
+            Returns the current `CATALOG_ROW` counter.
+        loader : callable
+            Returns every `ItemRecord`. It runs after `version_loader`, so
+            the items are never older than the version they are tagged with.
+
+        Returns
+        -------
+        CatalogSnapshot
+            The current snapshot.
+        """
+        now = self.clock()
+        snapshot = self._snapshot
+        if snapshot is not None and now < self._checked_until:
+            self.hits += 1
+            return snapshot
+
+        version = version_loader()
+        with self._lock:
+            self.checks += 1
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version != version:
+                snapshot = CatalogSnapshot(version, loader())
+                self._snapshot = snapshot
+                self.loads += 1
+            self._checked_until = now + self.check_interval
+        return snapshot
+
+    def invalidate(self):
+        """
+        Forces the next call to check the counter.
+        """
+        with self._lock:
+            self._checked_until = 0.0
+
+    def clear(self):
+        """
+        Drops the snapshot and resets the counters.
+        """
+        with self._lock:
+            self._snapshot = None
+            self._checked_until = 0.0
+            self.hits = 0
+            self.checks = 0
+            self.loads = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the hit, check and load counters and the snapshot size.
+
+        Returns
+        -------
+        dict
+            The cache counters and settings.
+        """
+        snapshot = self._snapshot
+        return {
+            'hits': self.hits,
+            'checks': self.checks,
+            'loads': self.loads,
+            'size': len(snapshot) if snapshot is not None else 0,
+            'version': snapshot.version if snapshot is not None else None,
+            'check_interval': self.check_interval,
+        }
@@ -0,0 +1,164 @@
+"""
+shared.engine
+=============
+
+This module builds the SQLAlchemy engine options of the services and
+measures how their connection pools are used.
+
+All services share one PostgreSQL server, so every connection a pool may
+open counts against its ``max_connections``. At most
+``services * workers * (pool_size + max_overflow)`` connections are open
+at once, and the pool settings of each service should be sized with that in
+mind. `TimedQueuePool` records how often and how long requests wait for a
+connection, so pool pressure shows up per service on ``/metrics``.
+
+Classes
+-------
+TimedQueuePool
+    A `QueuePool` that records checkout counts, waits and timeouts.
+
+Functions
+---------
+engine_options(uri, application_name, ...)
+    Returns the `SQLALCHEMY_ENGINE_OPTIONS` for a database URI.
+pool_stats(engine)
+    Returns the usage statistics of an engine's connection pool.
+"""
+
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    A `QueuePool` that records checkout counts, waits and timeouts.
+
+    A checkout waits when all `pool_size + max_overflow` connections are in
+    use. The wait ends when a connection is returned or after `pool_timeout`
+    seconds, when SQLAlchemy raises a `TimeoutError`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def stats(self):
+        """
+        Returns the pool usage statistics.
+
+        Returns
+        -------
+        dict
+            The pool capacity, the connections in use, and the checkout
+            count, timeouts and wait times since the pool was created.
+        """
+        with self._stats_lock:
+            checkouts = self.checkouts
+            return {
+                'pool_size': self.size(),
+                'max_overflow': self._max_overflow,
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': max(self.overflow(), 0),
+                'checkouts': checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds,
+                'wait_seconds_avg': self.wait_seconds / checkouts if checkouts else 0.0,
+                'wait_seconds_max': self.max_wait_seconds,
+            }
+
+
+def engine_options(uri, application_name, pool_size=5, max_overflow=10, pool_timeout=30,
+                   pool_recycle=1800, pool_pre_ping=True, statement_timeout=0):
+    """
+    Returns the `SQLALCHEMY_ENGINE_OPTIONS` for a database URI.
+
+    In-memory SQLite databases keep the single static connection that
+    Flask-SQLAlchemy gives them, so no pool options apply to them.
+
+    Parameters
+    ----------
+    uri : str
+        The database URI.
+    application_name : str
+        Name reported by PostgreSQL in ``pg_stat_activity``.
+    pool_size : int, optional
+        Connections kept open by each process.
+    max_overflow : int, optional
+        Extra connections opened under load and closed when returned.
+    pool_timeout : float, optional
+        Seconds to wait for a connection before giving up.
+    pool_recycle : int, optional
+        Seconds after which a connection is replaced, or -1 for never.
+    pool_pre_ping : bool, optional
+        Whether to test connections on checkout and replace dead ones.
+    statement_timeout : int, optional
+        PostgreSQL ``statement_timeout`` in milliseconds, or 0 for none.
+
+    Returns
+    -------
+    dict
+        Keyword arguments for `create_engine`.
+    """
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+    }
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {'application_name': application_name}
+        if statement_timeout:
+            connect_args['options'] = f'-c statement_timeout={int(statement_timeout)}'
+        options['connect_args'] = connect_args
+    return options
+
+
+def pool_stats(engine):
+    """
+    Returns the usage statistics of an engine's connection pool.
+
+    Parameters
+    ----------
+    engine : Engine
+        The engine to inspect.
+
+    Returns
+    -------
+    dict
+        The `TimedQueuePool` statistics, or the pool class and its status
+        line for other pools.
+    """
+    pool = engine.pool
+    if isinstance(pool, TimedQueuePool):
+        return pool.stats()
+    return {'pool': type(pool).__name__, 'status': pool.status()}
@@ -0,0 +1,117 @@
+"""
+shared.export
+=============
+
+This module encodes row streams as NDJSON or CSV and serves them as chunked
+responses.
+
+The encoders take an iterable of dictionaries, typically a generator fed by
+a server-side cursor, and yield the encoded document one row at a time.
+Neither the rows nor the document are ever held in memory whole, so exports
+of any size run in constant memory. The same encoders serve HTTP responses
+and write the files of the CLI commands.
+
+CSV values are written as JSON would encode them: datetimes in ISO 8601 with
+a UTC offset, and `None` as an empty cell.
+
+Functions
+---------
+iter_ndjson(rows)
+    Yields the rows as newline-delimited JSON.
+iter_csv(fieldnames, rows)
+    Yields the rows as CSV, after a header line.
+export_response(chunks, mimetype, filename)
+    Builds a chunked download response.
+"""
+
+import csv
+import io
+from datetime import date
+
+from flask import Response, current_app, stream_with_context
+
+from shared.json_provider import to_json_value
+
+
+def iter_ndjson(rows):
+    """
+    Yields the rows as newline-delimited JSON.
+
+    Rows are encoded with the app's JSON provider.
+
+    Parameters
+    ----------
+    rows : iterable of dict
+        The rows to encode.
+
+    Yields
+    ------
+    bytes
+        One JSON document and a newline per row.
+    """
+    provider = current_app.json
+    dumps = getattr(provider, 'dumps_bytes', None) or (lambda row: provider.dumps(row).encode())
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return to_json_value(value)
+    return value
+
+
+def iter_csv(fieldnames, rows):
+    """
+    Yields the rows as CSV, after a header line.
+
+    Parameters
+    ----------
+    fieldnames : sequence of str
+        The columns, in order.
+    rows : iterable of dict
+        The rows to encode; missing keys are written as empty cells.
+
+    Yields
+    ------
+    bytes
+        The UTF-8 encoded header, then one line per row.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(values):
+        writer.writerow(values)
+        line = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    yield encode(fieldnames)
+    for row in rows:
+        yield encode([csv_value(row.get(field)) for field in fieldnames])
+
+
+def export_response(chunks, mimetype, filename):
+    """
+    Builds a chunked download response.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The encoded document, from `iter_ndjson` or `iter_csv`.
+    mimetype : str
+        The mimetype of the document.
+    filename : str
+        The name offered to save the document under.
+
+    Returns
+    -------
+    Response
+        A streaming response sent with chunked transfer encoding.
+    """
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
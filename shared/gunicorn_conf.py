@@ -0,0 +1,111 @@
+"""
+shared.gunicorn_conf
+====================
+
+The gunicorn configuration shared by all services in production.
+
+Every service exposes its app in ``<service>/wsgi.py`` and is served with::
+
+    gunicorn --config python:shared.gunicorn_conf sales.wsgi:app
+
+Settings are read from the environment:
+
+- ``GUNICORN_WORKER_CLASS``: ``sync``, ``gthread`` (default) or ``gevent``.
+- ``GUNICORN_WORKERS``: worker processes. The default depends on the
+  worker class and the CPUs available to the process:
+
+  - ``sync``: ``2 * cpus + 1``. Each worker handles one request at a
+    time, so extra workers cover requests blocked on the database.
+  - ``gthread``: ``cpus + 1`` workers of ``GUNICORN_THREADS`` threads
+    (4 by default). This is the default because the services mostly
+    wait on the database and threads are cheaper than processes.
+  - ``gevent``: ``cpus`` workers of ``GUNICORN_WORKER_CONNECTIONS``
+    greenlets (1000 by default). This needs ``pip install gevent``, and
+    psycopg2 also needs ``psycogreen`` to cooperate with it.
+
+- ``GUNICORN_BIND``: listen address, ``0.0.0.0:$PORT`` by default.
+- ``GUNICORN_PRELOAD``: load the app once before forking, so that workers
+  share its memory and boot fast (``1`` by default, ``0`` for gevent,
+  whose monkey patching must precede the app imports).
+- ``GUNICORN_TIMEOUT``: seconds before a silent worker is restarted (30).
+- ``GUNICORN_GRACEFUL_TIMEOUT``: seconds workers get to finish in-flight
+  requests on restart or shutdown (30).
+- ``GUNICORN_KEEPALIVE``: seconds an idle keep-alive connection is kept
+  open (5). It should exceed the idle timeout of any load balancer in front.
+- ``GUNICORN_MAX_REQUESTS``: requests after which a worker is recycled,
+  with up to ``GUNICORN_MAX_REQUESTS_JITTER`` more (0, never).
+- ``GUNICORN_ACCESS_LOG``: ``-`` for standard output, a path, or unset
+  for no access log.
+- ``GUNICORN_LOG_LEVEL``: level of the gunicorn error log (``info``).
+
+With preloading, database connections opened while the app was loaded are
+dropped in each worker after fork, so that no two processes share a socket.
+"""
+
+import os
+from importlib.util import find_spec
+
+WORKER_CLASSES = ('sync', 'gthread', 'gevent')
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def default_workers(worker_class, cpus):
+    if worker_class == 'sync':
+        return 2 * cpus + 1
+    if worker_class == 'gthread':
+        return cpus + 1
+    return cpus
+
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in WORKER_CLASSES:
+    raise ValueError(f'GUNICORN_WORKER_CLASS must be one of {", ".join(WORKER_CLASSES)}, not {worker_class}')
+if worker_class == 'gevent' and find_spec('gevent') is None:
+    raise RuntimeError('GUNICORN_WORKER_CLASS=gevent needs the gevent package: pip install gevent')
+
+bind = os.getenv('GUNICORN_BIND', f'0.0.0.0:{os.getenv("PORT", "8000")}')
+workers = env_int('GUNICORN_WORKERS', default_workers(worker_class, available_cpus()))
+threads = env_int('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1)
+worker_connections = env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+preload_app = os.getenv('GUNICORN_PRELOAD', '0' if worker_class == 'gevent' else '1') == '1'
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 0)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 0)
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """
+    Drops the database connections a preloaded app inherited from the master.
+
+    Parameters
+    ----------
+    server : gunicorn.arbiter.Arbiter
+        The master process.
+    worker : gunicorn.workers.base.Worker
+        The new worker.
+    """
+    if not server.cfg.preload_app:
+        return
+    app = server.app.wsgi()
+    sqlalchemy = app.extensions.get('sqlalchemy')
+    if sqlalchemy is None:
+        return
+    with app.app_context():
+        for engine in sqlalchemy.engines.values():
+            # close=False leaves the sockets to the master instead of closing them from here.
+            engine.dispose(close=False)
@@ -0,0 +1,85 @@
+"""
+shared.identifiers
+==================
+
+This module resolves an account from a login identifier in one query.
+
+An identifier may be a username, an email, a phone number or an id. Trying
+each in turn costs up to four round trips for one login. `find_by_identifier`
+combines the lookups into a single query joined by OR, which the unique
+indexes of those columns serve with one index probe each.
+
+`identifier_predicates` first drops the lookups the identifier cannot match:
+emails contain ``@``, phone numbers only hold digits, ``+``, ``-`` and
+spaces, and ids are small positive integers. A plain username thus becomes
+one equality on `username`.
+
+Two accounts can match the same identifier, for instance when a username is
+another account's email. The match is then chosen in the order username,
+email, phone, id, as the sequential lookups did.
+
+Functions
+---------
+identifier_predicates(identifier)
+    Returns the columns an identifier can match, in order of precedence.
+find_by_identifier(query, model, identifier)
+    Returns the entity matched by an identifier, in one query.
+"""
+
+from sqlalchemy import or_
+
+MAX_ID = 2 ** 31 - 1
+PHONE_CHARACTERS = frozenset('0123456789+- ')
+
+
+def identifier_predicates(identifier):
+    """
+    Returns the columns an identifier can match, in order of precedence.
+
+    Parameters
+    ----------
+    identifier : str or int
+        A username, email, phone number or id.
+
+    Returns
+    -------
+    list of tuple
+        ``(column, value)`` pairs, with the value converted to the column's type.
+    """
+    text = str(identifier)
+    predicates = [('username', text)]
+    if '@' in text:
+        predicates.append(('email', text))
+    if any(c.isdigit() for c in text) and set(text) <= PHONE_CHARACTERS:
+        predicates.append(('phone', text))
+    if text.isascii() and text.isdigit() and 0 < int(text) <= MAX_ID:
+        predicates.append(('id', int(text)))
+    return predicates
+
+
+def find_by_identifier(query, model, identifier):
+    """
+    Returns the entity matched by an identifier, in one query.
+
+    Parameters
+    ----------
+    query : Query
+        The query on the model, such as ``Customer.query``.
+    model : type
+        A mapped class with `username`, `email`, `phone` and `id` columns.
+    identifier : str or int
+        A username, email, phone number or id.
+
+    Returns
+    -------
+    Model or None
+        The entity, or `None` if no column matches.
+    """
+    predicates = identifier_predicates(identifier)
+    condition = or_(*(getattr(model, column) == value for column, value in predicates))
+    matches = query.filter(condition).limit(len(predicates)).all()
+    for column, value in predicates:
+        for entity in matches:
+            if getattr(entity, column) == value:
+                return entity
+    return None
@@ -0,0 +1,87 @@
+"""
+shared.indexes
+==============
+
+This module declares the secondary indexes of the shared database tables.
+
+Every service keeps its own copy of the models it reads, so the indexes are
+declared once here and attached to each copy through `__table_args__`. An
+`Index` can only belong to one table, so each function returns new objects.
+
+The index names match the Alembic migrations of the service that owns the
+table (customers, inventory, sales and reviews).
+
+Functions
+---------
+customer_indexes()
+    Indexes of the `customers` table.
+item_indexes()
+    Indexes of the `items` table.
+transaction_indexes()
+    Indexes of the `transactions` table.
+review_indexes()
+    Indexes of the `reviews` table.
+transaction_line_indexes()
+    Indexes of the `transaction_lines` table.
+"""
+
+from sqlalchemy import Index
+
+
+def customer_indexes():
+    """
+    Returns the indexes of the `customers` table.
+
+    `status` backs the banned-customers listing.
+    """
+    return (
+        Index('ix_customers_status', 'status'),
+    )
+
+
+def item_indexes():
+    """
+    Returns the indexes of the `items` table.
+
+    `category` backs the items-by-category lookup.
+    """
+    return (
+        Index('ix_items_category', 'category'),
+    )
+
+
+def transaction_indexes():
+    """
+    Returns the indexes of the `transactions` table.
+
+    `(customer_id, id)` backs the customer transaction lookups and their
+    keyset pagination, which filters on `customer_id` and orders by `id`.
+    """
+    return (
+        Index('ix_transactions_customer_id', 'customer_id', 'id'),
+    )
+
+
+def review_indexes():
+    """
+    Returns the indexes of the `reviews` table.
+
+    `(customer_id, item_id)` is unique, since a customer reviews an item at
+    most once, and also backs the per-customer lookups. `item_id` backs the
+    per-item lookups.
+    """
+    return (
+        Index('uq_reviews_customer_id_item_id', 'customer_id', 'item_id', unique=True),
+        Index('ix_reviews_item_id', 'item_id'),
+    )
+
+
+def transaction_line_indexes():
+    """
+    Returns the indexes of the `transaction_lines` table.
+
+    `transaction_id` backs loading and restocking the lines of a transaction.
+    """
+    return (
+        Index('ix_transaction_lines_transaction_id', 'transaction_id'),
+    )
@@ -0,0 +1,140 @@
+"""
+shared.json_provider
+====================
+
+This module defines the JSON provider of every service, which replaces the
+standard library encoder of Flask with orjson when it is installed.
+
+`jsonify` and ``app.json`` keep working unchanged. Encoding a few thousand
+rows is several times faster with orjson, which matters on the list
+endpoints. Without orjson the provider falls back to the standard library
+and produces the same documents.
+
+Dates and datetimes are encoded as ISO 8601 strings. Naive datetimes are the
+UTC values written by `get_utc_now` with their timezone stripped by the
+database, so they are encoded with a ``+00:00`` offset. Keys keep the order
+of the dictionaries, as `to_dict` builds them, instead of being sorted.
+
+A payload serialized ahead of time, for example by a cache, is wrapped in
+`RawJSON` and returned by `jsonify` as is, without being parsed or encoded
+again.
+
+Classes
+-------
+RawJSON
+    Bytes holding an already serialized JSON document.
+FastJSONProvider
+    A Flask JSON provider using orjson, or the standard library without it.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime, timezone
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is missing
+    orjson = None
+
+
+class RawJSON(bytes):
+    """
+    Bytes holding an already serialized JSON document.
+    """
+
+
+def to_json_value(value):
+    """
+    Converts a value that JSON has no type for.
+
+    Parameters
+    ----------
+    value : object
+        A date, datetime, decimal, UUID or dataclass instance.
+
+    Returns
+    -------
+    object
+        A value JSON can encode.
+
+    Raises
+    ------
+    TypeError
+        If the value has no JSON form.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    A Flask JSON provider using orjson, or the standard library without it.
+
+    Attributes
+    ----------
+    backend : str
+        ``orjson`` or ``json``, the encoder in use. ``orjson`` by default
+        when it is installed.
+    mimetype : str
+        The mimetype of JSON responses.
+    """
+
+    mimetype = 'application/json'
+    backend = 'orjson' if orjson is not None else 'json'
+
+    def dumps_bytes(self, obj, **kwargs):
+        """
+        Serializes an object to UTF-8 encoded JSON.
+
+        Parameters
+        ----------
+        obj : object
+            The data to serialize.
+        **kwargs
+            ``indent`` pretty-prints the document; other arguments of
+            `json.dumps` are honoured by the standard library fallback only.
+
+        Returns
+        -------
+        bytes
+            The JSON document.
+        """
+        if isinstance(obj, RawJSON):
+            return bytes(obj)
+        if self.backend == 'orjson':
+            option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=to_json_value, option=option)
+        kwargs.setdefault('default', to_json_value)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def loads(self, s, **kwargs):
+        if self.backend == 'orjson' and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self._app.debug else None
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent), mimetype=self.mimetype)
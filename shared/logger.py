@@ -0,0 +1,189 @@
+"""
+shared.logger
+=============
+
+This module configures the logging pipeline shared by all services.
+
+Request threads never write to disk or to the console. The root logger has a
+single `QueueHandler` that puts records on an in-memory queue. A
+`QueueListener` thread takes records off that queue, formats them and writes
+them to the console and, when `LOG_FILE` is set, to a size-rotated log file.
+
+Messages are formatted lazily. Call sites pass ``%``-style arguments, such as
+``logger.info('Item %s not found', item_id)``. A record below the configured
+level is discarded before its message is built. An enabled record is
+interpolated once when it is queued. Timestamps and the rest of the line are
+formatted on the listener thread.
+
+The pipeline is configured from the environment:
+
+- ``LOG_LEVEL``: level name of the root logger (``INFO`` by default).
+- ``LOG_FILE``: path of the log file. Unset or empty, records only go to
+  the console, where container runtimes and gunicorn collect them.
+- ``LOG_MAX_BYTES``: size at which the log file rotates (10 MiB by default).
+- ``LOG_BACKUP_COUNT``: rotated files to keep (5 by default).
+- ``LOG_CONSOLE``: ``0`` disables console output.
+
+The listener thread is restarted in forked children, such as gunicorn
+workers. Rotation is not coordinated between processes, so when several
+processes share one host each should have its own ``LOG_FILE``.
+
+Functions
+---------
+configure_logging()
+    Installs the queue pipeline on the root logger once per process.
+get_logger(name)
+    Returns a logger, configuring the pipeline first if needed.
+stop_logging()
+    Flushes pending records and stops the listener thread.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOGGER_NAME = 'Ecomerce_Application'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_lock = threading.Lock()
+_queue_handler = None
+_listener = None
+
+
+def build_handlers(log_file, max_bytes, backup_count, console):
+    """
+    Builds the handlers run by the listener thread.
+
+    Parameters
+    ----------
+    log_file : str
+        Path of the rotating log file, or an empty string for none.
+    max_bytes : int
+        Size at which the log file rotates.
+    backup_count : int
+        Rotated files to keep.
+    console : bool
+        Whether to also write to standard error.
+
+    Returns
+    -------
+    list of logging.Handler
+        The formatted output handlers.
+    """
+    handlers = []
+    if console:
+        handlers.append(logging.StreamHandler(sys.stderr))
+    if log_file:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, delay=True))
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(level=None, log_file=None, max_bytes=None, backup_count=None, console=None):
+    """
+    Installs the queue pipeline on the root logger once per process.
+
+    Arguments left as None are read from the environment. Later calls return
+    the running listener unchanged.
+
+    Parameters
+    ----------
+    level : str or int, optional
+        Level of the root logger.
+    log_file : str, optional
+        Path of the rotating log file, or an empty string for none.
+    max_bytes : int, optional
+        Size at which the log file rotates.
+    backup_count : int, optional
+        Rotated files to keep.
+    console : bool, optional
+        Whether to also write to standard error.
+
+    Returns
+    -------
+    QueueListener
+        The listener writing the queued records.
+    """
+    global _queue_handler, _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        if level is None:
+            level = os.getenv('LOG_LEVEL', 'INFO').upper()
+        if log_file is None:
+            log_file = os.getenv('LOG_FILE', '')
+        if max_bytes is None:
+            max_bytes = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+        if backup_count is None:
+            backup_count = int(os.getenv('LOG_BACKUP_COUNT', 5))
+        if console is None:
+            console = os.getenv('LOG_CONSOLE', '1') != '0'
+
+        records = queue.SimpleQueue()
+        _queue_handler = QueueHandler(records)
+        handlers = build_handlers(log_file, max_bytes, backup_count, console)
+        _listener = QueueListener(records, *handlers, respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_queue_handler)
+        _listener.start()
+        return _listener
+
+
+def get_logger(name=LOGGER_NAME):
+    """
+    Returns a logger, configuring the pipeline first if needed.
+
+    Parameters
+    ----------
+    name : str, optional
+        Name of the logger.
+
+    Returns
+    -------
+    logging.Logger
+        A logger propagating to the queue pipeline.
+    """
+    configure_logging()
+    return logging.getLogger(name)
+
+
+def stop_logging():
+    """
+    Flushes pending records and stops the listener thread.
+
+    The root logger no longer queues records afterwards, and a later
+    `configure_logging` call installs a new pipeline.
+    """
+    global _queue_handler, _listener
+    with _lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _queue_handler = None
+        _listener = None
+
+
+def _restart_in_child():
+    # The listener thread does not survive fork, so the child starts its own.
+    global _lock, _listener
+    _lock = threading.Lock()
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_in_child)
@@ -0,0 +1,212 @@
+"""
+shared.pagination
+=================
+
+This module provides keyset (cursor) pagination and NDJSON streaming for the
+list endpoints of every service.
+
+Pages are selected with ``WHERE id > :after ORDER BY id LIMIT :limit``, so the
+cost of a page does not grow with its position in the table. The response body
+keeps the shape of the unpaginated endpoint; the cursor of the next page is
+returned in the ``X-Next-Cursor`` header and as a ``Link: <...>; rel="next"``
+header, and is absent on the last page.
+
+Pagination is opt-in: a request without ``limit`` gets every row after
+`after`, as the endpoints returned before they were paginated, unless
+`PAGINATION_DEFAULT_LIMIT` is set above 0.
+
+With ``format=ndjson`` the endpoint instead streams every row after `after`
+as one JSON document per line, fetched from a server-side cursor in chunks of
+`PAGINATION_STREAM_CHUNK_SIZE` rows.
+
+Classes
+-------
+PaginationSchema
+    Validates the ``limit``, ``after`` and ``format`` query parameters.
+Page
+    One page of serialized rows and the cursor of the next page.
+
+Functions
+---------
+load_pagination_args(args)
+    Validates query parameters and applies the configured limits.
+keyset_page(query, column, limit, after, serialize)
+    Fetches one page of a query ordered by a unique column.
+keyset_stream(query, column, after, serialize)
+    Lazily yields every row after the cursor using a server-side cursor.
+page_response(body, next_cursor)
+    Builds a JSON response carrying the next-page headers.
+ndjson_response(rows)
+    Builds a streaming newline-delimited JSON response.
+"""
+
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from marshmallow import EXCLUDE, Schema, fields, validate
+
+from shared.export import iter_ndjson
+from shared.projection import row_to_dict
+
+Page = namedtuple('Page', ['rows', 'next_cursor'])
+
+
+class PaginationSchema(Schema):
+    """
+    Validates the ``limit``, ``after`` and ``format`` query parameters.
+    """
+
+    class Meta:
+        unknown = EXCLUDE
+
+    limit = fields.Integer(validate=validate.Range(min=1))
+    after = fields.Integer(validate=validate.Range(min=0))
+    format = fields.String(load_default='json', validate=validate.OneOf(['json', 'ndjson']))
+
+
+def load_pagination_args(args):
+    """
+    Validates query parameters and applies the configured limits.
+
+    A missing `limit` defaults to `PAGINATION_DEFAULT_LIMIT`, where 0 means no
+    limit, and other values are capped at `PAGINATION_MAX_LIMIT`.
+
+    Parameters
+    ----------
+    args : Mapping
+        The request query parameters.
+
+    Returns
+    -------
+    dict
+        The validated ``limit``, ``after`` and ``format`` values.
+
+    Raises
+    ------
+    ValidationError
+        If a parameter is not valid.
+    """
+    data = PaginationSchema().load(args)
+    limit = data.get('limit', current_app.config.get('PAGINATION_DEFAULT_LIMIT', 0))
+    data['limit'] = min(limit, current_app.config.get('PAGINATION_MAX_LIMIT', 1000)) if limit else None
+    data.setdefault('after', None)
+    return data
+
+
+def keyset_page(query, column, limit, after=None, serialize=None):
+    """
+    Fetches one page of a query ordered by a unique column.
+
+    One row more than `limit` is fetched to tell whether another page follows.
+
+    Parameters
+    ----------
+    query : Query
+        The query to paginate.
+    column : InstrumentedAttribute
+        The unique, indexed column to order and seek on, usually the primary key.
+    limit : int or None
+        The maximum number of rows in the page, or `None` for every row.
+    after : int, optional
+        Only rows whose `column` is greater than this value are returned.
+    serialize : callable, optional
+        Converts each row; defaults to `row_to_dict`, which also
+        accepts the rows of a `project`-ed query.
+
+    Returns
+    -------
+    Page
+        The serialized rows and the cursor of the next page, or `None`.
+    """
+    serialize = serialize or row_to_dict
+    if after is not None:
+        query = query.filter(column > after)
+    query = query.order_by(column)
+    if limit is None:
+        return Page([serialize(row) for row in query.all()], None)
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = getattr(rows[-1], column.key)
+    return Page([serialize(row) for row in rows], next_cursor)
+
+
+def keyset_stream(query, column, after=None, serialize=None):
+    """
+    Lazily yields every row after the cursor using a server-side cursor.
+
+    Rows are fetched `PAGINATION_STREAM_CHUNK_SIZE` at a time, so memory use
+    does not depend on the size of the table. The query only runs once the
+    returned generator is iterated, which must happen inside an app context.
+
+    Parameters
+    ----------
+    query : Query
+        The query to stream.
+    column : InstrumentedAttribute
+        The unique column to order and seek on.
+    after : int, optional
+        Only rows whose `column` is greater than this value are returned.
+    serialize : callable, optional
+        Converts each row; defaults to `row_to_dict`, which also
+        accepts the rows of a `project`-ed query.
+
+    Returns
+    -------
+    generator of dict
+        The serialized rows.
+    """
+    serialize = serialize or row_to_dict
+    if after is not None:
+        query = query.filter(column > after)
+
+    def generate():
+        chunk_size = current_app.config.get('PAGINATION_STREAM_CHUNK_SIZE', 1000)
+        for row in query.order_by(column).yield_per(chunk_size):
+            yield serialize(row)
+
+    return generate()
+
+
+def page_response(body, next_cursor):
+    """
+    Builds a JSON response carrying the next-page headers.
+
+    Parameters
+    ----------
+    body : dict or list
+        The response body.
+    next_cursor : int or None
+        The cursor of the next page, or `None` on the last page.
+
+    Returns
+    -------
+    Response
+        The JSON response.
+    """
+    response = jsonify(body)
+    if next_cursor is not None:
+        args = request.args.to_dict()
+        args['after'] = next_cursor
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
+
+
+def ndjson_response(rows):
+    """
+    Builds a streaming newline-delimited JSON response.
+
+    Parameters
+    ----------
+    rows : iterable of dict
+        The rows to stream, typically from `keyset_stream`.
+
+    Returns
+    -------
+    Response
+        A response streaming one JSON document per line.
+    """
+    return Response(stream_with_context(iter_ndjson(rows)), mimetype='application/x-ndjson')
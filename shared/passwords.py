@@ -0,0 +1,419 @@
+"""
+shared.passwords
+================
+
+This module hashes and verifies passwords away from the request threads and
+limits login attempts per identifier.
+
+Password hashes are deliberately expensive: the default scrypt parameters
+take tens of milliseconds of CPU per call. On the request thread, a burst of
+logins holds the GIL for that long and stalls every other request of the
+worker. `PasswordHasher` runs the hashing in a small process pool, so the
+request thread only waits on a future and the other threads keep running.
+
+The pool is bounded: at most `workers * PASSWORD_HASH_QUEUE_FACTOR` calls are
+queued or running. A caller that cannot get a slot within
+`PASSWORD_HASH_QUEUE_TIMEOUT` seconds gets `HasherBusy` instead of queuing
+forever. With ``PASSWORD_HASH_WORKERS=0`` hashing runs inline.
+
+The cost is set by `PASSWORD_HASH_METHOD`, in werkzeug's format, for
+example ``scrypt:32768:8:1`` or ``pbkdf2:sha256:1000000``. Hashes record
+their parameters, so a hash made with other parameters still verifies. It
+is replaced on the next successful login (`needs_rehash`), which moves
+accounts to a new cost without a migration.
+
+`LoginRateLimiter` counts the login attempts per identifier in a fixed
+window and refuses further attempts once `LOGIN_RATE_LIMIT` is reached,
+until the window ends. A successful login clears the count. The counts are
+kept per process, so with several workers the effective limit is at most
+``workers * LOGIN_RATE_LIMIT``.
+
+Classes
+-------
+HasherBusy
+    Raised when the hashing pool has no free slot in time.
+TooManyAttempts
+    Raised when an identifier exceeded its login attempts.
+PasswordHasher
+    Hashes and verifies passwords in a bounded process pool.
+LoginRateLimiter
+    Counts login attempts per identifier in a fixed window.
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class HasherBusy(Exception):
+    def __init__(self, message='Password hashing is overloaded, try again later'):
+        super().__init__(message)
+
+
+class TooManyAttempts(Exception):
+    def __init__(self, retry_after, message='Too many login attempts, try again later'):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def normalize_method(method):
+    """
+    Spells out the default parameters of a werkzeug hash method.
+
+    Parameters
+    ----------
+    method : str
+        A method such as ``scrypt`` or ``pbkdf2:sha256``.
+
+    Returns
+    -------
+    str
+        The method as it is recorded in the hashes it produces.
+    """
+    parts = method.split(':')
+    if parts[0] == 'scrypt':
+        defaults = ['scrypt', str(2 ** 15), '8', '1']
+    elif parts[0] == 'pbkdf2':
+        defaults = ['pbkdf2', 'sha256', str(DEFAULT_PBKDF2_ITERATIONS)]
+    else:
+        return method
+    return ':'.join(parts + defaults[len(parts):])
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored, password):
+    return check_password_hash(stored, password)
+
+
+class Timer:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self):
+        return {
+            'count': self.count,
+            'seconds_total': self.seconds,
+            'seconds_avg': self.seconds / self.count if self.count else 0.0,
+            'seconds_max': self.max_seconds,
+        }
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords in a bounded process pool.
+
+    Parameters
+    ----------
+    method : str
+        The werkzeug hash method and its cost parameters.
+    workers : int
+        Processes of the pool, or 0 to hash on the calling thread.
+    queue_factor : int
+        Calls allowed per worker, running or queued.
+    queue_timeout : float
+        Seconds to wait for a slot before raising `HasherBusy`.
+
+    Methods
+    -------
+    init_app(app)
+        Reads the `PASSWORD_HASH_*` settings from the app config.
+    hash(password)
+        Returns a new hash of a password.
+    verify(stored, password)
+        Tells whether a password matches a stored hash.
+    needs_rehash(stored)
+        Tells whether a stored hash was made with other parameters.
+    shutdown()
+        Stops the pool processes.
+    stats()
+        Returns the hashing timings and counters.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=0, queue_factor=4, queue_timeout=5.0):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.configure(method, workers, queue_factor, queue_timeout)
+        atexit.register(self.shutdown)
+
+    def configure(self, method, workers, queue_factor, queue_timeout):
+        self.shutdown()
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max(workers, 1) * queue_factor)
+        self.timers = {'hash': Timer(), 'verify': Timer()}
+        self.rehashes = 0
+        self.busy = 0
+
+    def init_app(self, app):
+        """
+        Configures the hasher from a Flask application.
+
+        Parameters
+        ----------
+        app : Flask
+            The application whose config holds the hashing settings.
+        """
+        self.configure(
+            app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD),
+            app.config.get('PASSWORD_HASH_WORKERS', 0),
+            app.config.get('PASSWORD_HASH_QUEUE_FACTOR', 4),
+            app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5.0),
+        )
+
+    def _get_executor(self):
+        with self._lock:
+            # A forked process cannot use the pool of its parent.
+            if self._executor is None or self._pid != os.getpid():
+                context = multiprocessing.get_context('spawn')
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, kind, function, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.busy += 1
+            raise HasherBusy()
+        start = time.perf_counter()
+        try:
+            if self.workers:
+                result = self._get_executor().submit(function, *args).result()
+            else:
+                result = function(*args)
+        finally:
+            self._slots.release()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.timers[kind].record(elapsed)
+        return result
+
+    def hash(self, password):
+        """
+        Returns a new hash of a password.
+
+        Parameters
+        ----------
+        password : str
+            The plain-text password.
+
+        Returns
+        -------
+        str
+            The hash, recording its method and parameters.
+
+        Raises
+        ------
+        HasherBusy
+            If no slot of the pool became free in time.
+        """
+        return self._run('hash', _hash, password, self.method)
+
+    def verify(self, stored, password):
+        """
+        Tells whether a password matches a stored hash.
+
+        Parameters
+        ----------
+        stored : str
+            The stored hash.
+        password : str
+            The plain-text password.
+
+        Returns
+        -------
+        bool
+            `True` if the password matches.
+
+        Raises
+        ------
+        HasherBusy
+            If no slot of the pool became free in time.
+        """
+        if not stored:
+            return False
+        return self._run('verify', _verify, stored, password)
+
+    def needs_rehash(self, stored):
+        """
+        Tells whether a stored hash was made with other parameters.
+
+        Parameters
+        ----------
+        stored : str
+            The stored hash.
+
+        Returns
+        -------
+        bool
+            `True` if the hash should be replaced by `hash` of the password.
+        """
+        return stored.split('$', 1)[0] != self.method
+
+    def record_rehash(self):
+        with self._lock:
+            self.rehashes += 1
+
+    def shutdown(self):
+        """
+        Stops the pool processes.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+            owned = self._pid == os.getpid()
+        if executor is not None and owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Returns the hashing timings and counters.
+
+        Returns
+        -------
+        dict
+            The method, pool size, timings of hashes and verifications in
+            seconds, rehashes on login and calls refused as busy.
+        """
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'hash': self.timers['hash'].stats(),
+                'verify': self.timers['verify'].stats(),
+                'rehashes': self.rehashes,
+                'busy': self.busy,
+            }
+
+
+class LoginRateLimiter:
+    """
+    Counts login attempts per identifier in a fixed window.
+
+    Parameters
+    ----------
+    limit : int
+        Attempts allowed per window, or 0 for no limit.
+    window : float
+        Length of the window in seconds.
+    maxsize : int
+        Identifiers tracked at most; the least recently seen are dropped.
+    clock : callable, optional
+        Monotonic time source, overridable for tests.
+
+    Methods
+    -------
+    init_app(app)
+        Reads `LOGIN_RATE_LIMIT` and `LOGIN_RATE_WINDOW` from the app config.
+    attempt(identifier)
+        Counts an attempt, or raises `TooManyAttempts`.
+    reset(identifier)
+        Clears the count of an identifier after a successful login.
+    stats()
+        Returns the refused attempts and the tracked identifiers.
+    """
+
+    def __init__(self, limit=10, window=60.0, maxsize=100000, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self.clock = clock
+        self.limited = 0
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Configures the limiter from a Flask application.
+
+        Parameters
+        ----------
+        app : Flask
+            The application whose config holds the limiter settings.
+        """
+        self.limit = app.config.get('LOGIN_RATE_LIMIT', self.limit)
+        self.window = app.config.get('LOGIN_RATE_WINDOW', self.window)
+        with self._lock:
+            self._windows.clear()
+            self.limited = 0
+
+    @staticmethod
+    def _key(identifier):
+        return str(identifier).strip().lower()
+
+    def attempt(self, identifier):
+        """
+        Counts an attempt, or raises `TooManyAttempts`.
+
+        Parameters
+        ----------
+        identifier : str
+            The username or email the login is for.
+
+        Raises
+        ------
+        TooManyAttempts
+            If the identifier used up its attempts in the current window.
+        """
+        if not self.limit:
+            return
+        key = self._key(identifier)
+        now = self.clock()
+        with self._lock:
+            started, count = self._windows.get(key, (now, 0))
+            if now - started >= self.window:
+                started, count = now, 0
+            if count >= self.limit:
+                self.limited += 1
+                raise TooManyAttempts(retry_after=max(int(started + self.window - now + 0.999), 1))
+            self._windows[key] = (started, count + 1)
+            self._windows.move_to_end(key)
+            while len(self._windows) > self.maxsize:
+                self._windows.popitem(last=False)
+
+    def reset(self, identifier):
+        """
+        Clears the count of an identifier after a successful login.
+
+        Parameters
+        ----------
+        identifier : str
+            The username or email the login was for.
+        """
+        with self._lock:
+            self._windows.pop(self._key(identifier), None)
+
+    def stats(self) -> dict:
+        """
+        Returns the refused attempts and the tracked identifiers.
+
+        Returns
+        -------
+        dict
+            The limiter counters and settings.
+        """
+        with self._lock:
+            return {
+                'limited': self.limited,
+                'tracked': len(self._windows),
+                'limit': self.limit,
+                'window': self.window,
+            }
@@ -0,0 +1,81 @@
+"""
+shared.projection
+=================
+
+This module restricts read queries to the columns their responses need.
+
+Loading full entities costs a transfer of every column, such as password
+hashes and JSON blobs that are never returned, plus an ORM object and an
+identity-map entry per row. A projected query selects only the columns a
+model serializes and returns plain `Row` tuples, which the list endpoints
+turn into dictionaries directly.
+
+A model opts in by declaring `dict_fields`, the keys of its `to_dict`, in
+order. `project(query, model)` then yields rows whose `_asdict()` equals
+`to_dict()` of the entity.
+
+Functions
+---------
+projection(model)
+    Returns the columns serialized by a model.
+project(query, model)
+    Restricts a query to the columns serialized by a model.
+row_to_dict(row)
+    Converts an entity or a projected row to a dictionary.
+"""
+
+
+def projection(model):
+    """
+    Returns the columns serialized by a model.
+
+    Parameters
+    ----------
+    model : type
+        A mapped class declaring `dict_fields`.
+
+    Returns
+    -------
+    list of InstrumentedAttribute
+        The columns, in `to_dict` order.
+    """
+    return [getattr(model, field) for field in model.dict_fields]
+
+
+def project(query, model):
+    """
+    Restricts a query to the columns serialized by a model.
+
+    Parameters
+    ----------
+    query : Query
+        A query on the model, with its filters.
+    model : type
+        A mapped class declaring `dict_fields`.
+
+    Returns
+    -------
+    Query
+        The query returning `Row` tuples instead of entities.
+    """
+    return query.with_entities(*projection(model))
+
+
+def row_to_dict(row):
+    """
+    Converts an entity or a projected row to a dictionary.
+
+    Parameters
+    ----------
+    row : Model or Row
+        An entity with `to_dict`, or a row returned by a projected query.
+
+    Returns
+    -------
+    dict
+        The serialized row.
+    """
+    to_dict = getattr(row, 'to_dict', None)
+    if to_dict is not None:
+        return to_dict()
+    return row._asdict()
@@ -0,0 +1,498 @@
+"""
+shared.revocation_bus
+=====================
+
+This module broadcasts token revocations (logouts and bans) between services
+and keeps an in-memory revocation set current in every process, so that JWT
+revocation checks never touch the database.
+
+A service that writes `last_logout` or `status` publishes a `RevocationEvent`
+after committing. Every service subscribes to the channel for the subjects it
+authenticates and applies events to its `RevocationRegistry`. The registry is
+loaded once per process from the database through a bootstrap loader and then
+kept current by events. When a backend loses its connection, events published
+meanwhile are lost, so after reconnecting the registry is loaded again and
+replaced by the database state. Events that arrive while a load runs are
+applied again on top of it.
+
+The transport is pluggable through the `REVOCATION_BACKEND` setting:
+
+- ``none``: no broadcast; services fall back to cached database lookups.
+- ``inprocess``: subscribers in the same process, for tests.
+- ``unix``: datagrams over UNIX sockets in `REVOCATION_SOCKET_DIR`, for
+  several processes on one host.
+- ``postgres``: PostgreSQL ``LISTEN``/``NOTIFY`` on the service database.
+
+Classes
+-------
+RevocationState
+    The revocation-relevant state of a subject.
+RevocationRegistry
+    A thread-safe in-memory map of subject to `RevocationState`.
+InProcessBackend
+    Delivers events to subscribers in the same process.
+UnixSocketBackend
+    Delivers events to every subscriber socket in a shared directory.
+PostgresBackend
+    Delivers events through PostgreSQL ``LISTEN``/``NOTIFY``.
+RevocationBus
+    A Flask extension tying a channel, a backend and a registry together.
+"""
+
+import json
+import logging
+import os
+import select
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import timezone
+
+from sqlalchemy import text
+
+logger = logging.getLogger('Ecomerce_Application')
+
+
+def to_timestamp(value):
+    """
+    Converts a stored datetime to a POSIX timestamp.
+
+    Naive datetimes are the UTC values written by `get_utc_now` with their
+    timezone stripped by the database, so they are read back as UTC.
+
+    Parameters
+    ----------
+    value : datetime or None
+        The datetime to convert.
+
+    Returns
+    -------
+    float or None
+        The timestamp, or `None` if no datetime was given.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationState(namedtuple('RevocationState', ['revoked_before', 'status'])):
+    """
+    The revocation-relevant state of a subject.
+
+    Attributes
+    ----------
+    revoked_before : float or None
+        Tokens issued before this timestamp are revoked.
+    status : str
+        The account status; any status other than 'active' revokes every token.
+    """
+
+    __slots__ = ()
+
+    def revokes(self, issued_at) -> bool:
+        """
+        Tells whether a token issued at the given time is revoked.
+
+        Parameters
+        ----------
+        issued_at : float
+            The token's `iat` claim.
+
+        Returns
+        -------
+        bool
+            `True` if the token is revoked.
+        """
+        if self.status != 'active':
+            return True
+        return self.revoked_before is not None and issued_at < self.revoked_before
+
+    def to_json(self, subject) -> str:
+        return json.dumps({'subject': subject, 'revoked_before': self.revoked_before, 'status': self.status})
+
+    @classmethod
+    def from_json(cls, payload):
+        data = json.loads(payload)
+        return data['subject'], cls(data['revoked_before'], data['status'])
+
+
+class RevocationRegistry:
+    """
+    A thread-safe in-memory map of subject to `RevocationState`.
+
+    Only subjects that ever logged out or were banned are stored; every other
+    subject is implicitly not revoked.
+    """
+
+    def __init__(self):
+        self._states = {}
+        self._replay = None
+        self._lock = threading.Lock()
+
+    def apply(self, subject, state):
+        """
+        Applies a published event, keeping the latest logout time.
+        """
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append((subject, state))
+            self._apply(subject, state)
+
+    def _apply(self, subject, state):
+        current = self._states.get(subject)
+        if current is not None and current.revoked_before is not None:
+            if state.revoked_before is None or state.revoked_before < current.revoked_before:
+                state = state._replace(revoked_before=current.revoked_before)
+        self._states[subject] = state
+
+    def begin_load(self):
+        """
+        Starts recording events, to replay them over the state being loaded.
+        """
+        with self._lock:
+            self._replay = []
+
+    def finish_load(self, states):
+        """
+        Replaces every state by the loaded ones, then replays the recorded events.
+
+        Parameters
+        ----------
+        states : iterable of tuple
+            ``(subject, RevocationState)`` pairs read from the database after
+            `begin_load`; subjects missing from it are no longer revoked.
+        """
+        with self._lock:
+            replay, self._replay = self._replay or [], None
+            self._states = dict(states)
+            for subject, state in replay:
+                self._apply(subject, state)
+
+    def abort_load(self):
+        with self._lock:
+            self._replay = None
+
+    def get(self, subject):
+        return self._states.get(subject)
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    def __len__(self):
+        return len(self._states)
+
+
+class InProcessBackend:
+    """
+    Delivers events to subscribers in the same process.
+
+    Subscribers of the same channel share a hub, so several apps created in one
+    test process see each other's events.
+    """
+
+    _hubs = {}
+    _hubs_lock = threading.Lock()
+
+    def __init__(self, channel):
+        self.channel = channel
+        with self._hubs_lock:
+            self._subscribers = self._hubs.setdefault(channel, [])
+        self._own = []
+
+    def publish(self, payload):
+        for callback in list(self._subscribers):
+            callback(payload)
+
+    def subscribe(self, callback, on_reconnect=None):
+        self._own.append(callback)
+        self._subscribers.append(callback)
+
+    def close(self):
+        for callback in self._own:
+            self._subscribers.remove(callback)
+        self._own.clear()
+
+
+class UnixSocketBackend:
+    """
+    Delivers events to every subscriber socket in a shared directory.
+
+    Each subscribing process binds a datagram socket in
+    ``<directory>/<channel>/``; publishing sends the payload to every socket
+    found there and removes sockets whose process is gone.
+    """
+
+    def __init__(self, directory, channel):
+        self.directory = os.path.join(directory, channel)
+        os.makedirs(self.directory, exist_ok=True)
+        self._sockets = []
+        self._closed = threading.Event()
+
+    def publish(self, payload):
+        data = payload.encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sender:
+            sender.setblocking(False)
+            for name in os.listdir(self.directory):
+                if not name.endswith('.sock'):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    sender.sendto(data, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    self._unlink(path)
+                except BlockingIOError:
+                    logger.warning('Revocation subscriber %s is not draining its socket', path)
+
+    def subscribe(self, callback, on_reconnect=None):
+        path = os.path.join(self.directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(path)
+        receiver.settimeout(0.5)
+        self._sockets.append((receiver, path))
+        thread = threading.Thread(target=self._listen, args=(receiver, callback), daemon=True)
+        thread.start()
+
+    def _listen(self, receiver, callback):
+        while not self._closed.is_set():
+            try:
+                data = receiver.recv(65536)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            try:
+                callback(data.decode())
+            except Exception:
+                logger.exception('Failed to apply revocation event')
+
+    def close(self):
+        self._closed.set()
+        for receiver, path in self._sockets:
+            receiver.close()
+            self._unlink(path)
+        self._sockets.clear()
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class PostgresBackend:
+    """
+    Delivers events through PostgreSQL ``LISTEN``/``NOTIFY``.
+
+    Publishing runs ``pg_notify`` on the service engine. Subscribing keeps one
+    dedicated autocommit connection per process in a background thread; after
+    the connection is lost and re-established, `on_reconnect` is called so the
+    caller can reload any events it may have missed.
+    """
+
+    def __init__(self, engine, channel, poll_interval=5.0, reconnect_delay=1.0):
+        self.engine = engine
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self._closed = threading.Event()
+
+    def publish(self, payload):
+        with self.engine.begin() as connection:
+            connection.execute(text('SELECT pg_notify(:channel, :payload)'), {'channel': self.channel, 'payload': payload})
+
+    def subscribe(self, callback, on_reconnect=None):
+        thread = threading.Thread(target=self._listen, args=(callback, on_reconnect), daemon=True)
+        thread.start()
+
+    def _listen(self, callback, on_reconnect):
+        first = True
+        while not self._closed.is_set():
+            try:
+                raw = self.engine.raw_connection()
+            except Exception:
+                logger.exception('Cannot connect to listen for revocation events')
+                time.sleep(self.reconnect_delay)
+                continue
+            try:
+                connection = raw.driver_connection
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                if not first and on_reconnect is not None:
+                    on_reconnect()
+                first = False
+                while not self._closed.is_set():
+                    if select.select([connection], [], [], self.poll_interval) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        callback(notify.payload)
+            except Exception:
+                logger.exception('Lost the revocation event connection')
+                time.sleep(self.reconnect_delay)
+            finally:
+                raw.invalidate()
+
+    def close(self):
+        self._closed.set()
+
+
+class RevocationBus:
+    """
+    A Flask extension tying a channel, a backend and a registry together.
+
+    Parameters
+    ----------
+    channel : str
+        The channel name, shared by publishers and subscribers of the same
+        kind of subject (for example ``customer_revocations``).
+
+    Methods
+    -------
+    init_app(app, listen=True)
+        Configures the backend from `REVOCATION_BACKEND`.
+    bootstrap_loader(callback)
+        Decorator registering the function that loads the registry.
+    publish(subject, revoked_before, status)
+        Broadcasts the new state of a subject.
+    get(subject)
+        Returns the subject's `RevocationState` from memory, or `None`.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.registry = RevocationRegistry()
+        self.backend = None
+        self.enabled = False
+        self._app = None
+        self._listen = True
+        self._bootstrap = None
+        self._bootstrapped = False
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, listen=True):
+        """
+        Configures the backend from the app config.
+
+        Parameters
+        ----------
+        app : Flask
+            The application whose config holds `REVOCATION_BACKEND` and
+            `REVOCATION_SOCKET_DIR`.
+        listen : bool
+            Whether this service authenticates the channel's subjects and
+            therefore keeps a registry; publish-only services pass `False`.
+        """
+        if self.backend is not None:
+            self.backend.close()
+        self._app = app
+        self._listen = listen
+        self._pid = None
+        self._bootstrapped = False
+        self.registry.clear()
+        self.backend = None
+        self.enabled = app.config.get('REVOCATION_BACKEND', 'none') != 'none'
+
+    def bootstrap_loader(self, callback):
+        """
+        Registers the function that loads the registry from the database.
+
+        The callback takes no arguments and returns an iterable of
+        ``(subject, RevocationState)`` pairs.
+        """
+        self._bootstrap = callback
+        return callback
+
+    def publish(self, subject, revoked_before, status):
+        """
+        Broadcasts the new state of a subject after it was committed.
+
+        Parameters
+        ----------
+        subject : str
+            The JWT subject.
+        revoked_before : float or None
+            The subject's last logout timestamp.
+        status : str
+            The subject's account status.
+        """
+        if not self.enabled:
+            return
+        self._ensure_started()
+        state = RevocationState(revoked_before, status)
+        if self._listen:
+            self.registry.apply(subject, state)
+        self.backend.publish(state.to_json(subject))
+
+    def get(self, subject):
+        """
+        Returns the subject's `RevocationState` from memory, or `None`.
+        """
+        self._ensure_started()
+        if not self._bootstrapped:
+            self._load_bootstrap()
+        return self.registry.get(subject)
+
+    def _ensure_started(self):
+        # Listener threads do not survive a fork, so every worker starts its own.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.backend = self._create_backend()
+            if self._listen:
+                self.backend.subscribe(self._on_message, on_reconnect=self._on_reconnect)
+            self._bootstrapped = False
+            self._pid = os.getpid()
+
+    def _create_backend(self):
+        config = self._app.config
+        kind = config.get('REVOCATION_BACKEND', 'none')
+        if kind == 'inprocess':
+            return InProcessBackend(self.channel)
+        if kind == 'unix':
+            directory = config.get('REVOCATION_SOCKET_DIR') or os.path.join(tempfile.gettempdir(), 'ecommerce-revocations')
+            return UnixSocketBackend(directory, self.channel)
+        if kind == 'postgres':
+            with self._app.app_context():
+                return PostgresBackend(self._app.extensions['sqlalchemy'].engine, self.channel)
+        raise ValueError(f'Unknown revocation backend {kind}')
+
+    def _load_bootstrap(self):
+        with self._lock:
+            if self._bootstrapped:
+                return
+            if self._bootstrap is not None:
+                self.registry.begin_load()
+                try:
+                    states = list(self._bootstrap())
+                except Exception:
+                    self.registry.abort_load()
+                    raise
+                self.registry.finish_load(states)
+            self._bootstrapped = True
+
+    def _on_message(self, payload):
+        subject, state = RevocationState.from_json(payload)
+        self.registry.apply(subject, state)
+
+    def _on_reconnect(self):
+        # Events published while disconnected were missed; reload on next use.
+        self._bootstrapped = False
+
+    def stats(self) -> dict:
+        return {
+            'backend': self._app.config.get('REVOCATION_BACKEND', 'none') if self._app else 'none',
+            'channel': self.channel,
+            'subjects': len(self.registry),
+        }
@@ -0,0 +1,153 @@
+"""
+shared.revocation_cache
+=======================
+
+This module defines the `RevocationCache` class, a bounded in-process cache
+of the account state that JWT revocation checks depend on.
+
+Every authenticated request asks whether its token was issued before the
+subject's last logout. Caching the subject's `(last_logout, status)` pair for a
+short time removes that lookup from the hot path. Entries are evicted in LRU
+order once `maxsize` is reached and expire after `ttl` seconds, so a logout
+made by another process is picked up within one TTL. Writes made by this
+process invalidate their entry explicitly.
+
+Classes
+-------
+RevocationCache
+    A thread-safe LRU + TTL cache keyed by JWT subject.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class RevocationCache:
+    """
+    A thread-safe LRU + TTL cache keyed by JWT subject.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of subjects kept in the cache.
+    ttl : float
+        Number of seconds an entry stays valid.
+    clock : callable, optional
+        Monotonic time source, overridable for tests.
+
+    Methods
+    -------
+    init_app(app)
+        Reads `REVOCATION_CACHE_SIZE` and `REVOCATION_CACHE_TTL` from the app config.
+    get_or_load(subject, loader)
+        Returns the cached state for a subject, loading it on a miss.
+    invalidate(subject)
+        Drops the cached state of a subject.
+    clear()
+        Drops every entry.
+    stats()
+        Returns the hit and miss counters and the current size.
+    """
+
+    def __init__(self, maxsize=10000, ttl=30.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def init_app(self, app):
+        """
+        Configures the cache from a Flask application.
+
+        Parameters
+        ----------
+        app : Flask
+            The application whose config holds the cache settings.
+        """
+        self.maxsize = app.config.get('REVOCATION_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('REVOCATION_CACHE_TTL', self.ttl)
+        self.clear()
+
+    def get_or_load(self, subject, loader):
+        """
+        Returns the cached state for a subject, loading it on a miss.
+
+        Parameters
+        ----------
+        subject : str
+            The JWT subject.
+        loader : callable
+            Called with the subject to fetch its state when it is not cached.
+
+        Returns
+        -------
+        object
+            The cached or freshly loaded state.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(subject)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader(subject)
+
+        with self._lock:
+            # An invalidation raced this load, so the value may predate the write.
+            if generation != self._generation:
+                return value
+            self._entries[subject] = (now + self.ttl, value)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, subject):
+        """
+        Drops the cached state of a subject.
+
+        Parameters
+        ----------
+        subject : str
+            The JWT subject whose state changed.
+        """
+        with self._lock:
+            self._entries.pop(subject, None)
+            self._generation += 1
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the hit and miss counters and the current size.
+
+        Returns
+        -------
+        dict
+            The cache counters and settings.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,146 @@
+"""
+shared.routing
+==============
+
+This module routes the reads of read-only service methods to a replica
+database, so that they do not compete with writes on the primary.
+
+A service enables routing by creating its `SQLAlchemy` extension with
+``session_options={'class_': RoutingSession}`` and setting
+`SQLALCHEMY_REPLICA_URI`. Its config then declares the replica as the
+`REPLICA_BIND` engine. Without a replica every query goes to the primary.
+
+Service methods opt in with the `read_only` decorator. A query is sent to
+the replica only when all of the following hold:
+
+- it runs inside a `read_only` method, including while a generator
+  returned by one is iterated;
+- it is neither a write nor a ``SELECT ... FOR UPDATE``;
+- the session has not written yet.
+
+The last condition makes routing sticky. Once a session flushes or executes
+a write, all of its later reads go to the primary, so a request always
+reads its own writes. Flask-SQLAlchemy opens a new session per application
+context, which means per request.
+
+Classes
+-------
+RoutingSession
+    A Flask-SQLAlchemy session that sends read-only queries to the replica.
+
+Functions
+---------
+read_only(function)
+    Marks a function whose queries may be served by the replica.
+replica_binds(uri, **options)
+    Returns the `SQLALCHEMY_BINDS` declaring the replica engine.
+"""
+
+import functools
+import inspect
+from contextvars import ContextVar
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+from shared.engine import engine_options
+
+REPLICA_BIND = 'replica'
+WROTE = 'routing_wrote'
+
+_read_only = ContextVar('read_only', default=False)
+
+
+def is_write(clause):
+    if clause is None:
+        return False
+    return getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    """
+    A Flask-SQLAlchemy session that sends read-only queries to the replica.
+
+    The session remembers in `info` whether it has written, and stops
+    using the replica from then on.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if is_write(clause):
+                self.info[WROTE] = True
+            elif _read_only.get() and not self._flushing and not self.info.get(WROTE):
+                replica = self._db.engines.get(REPLICA_BIND)
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def mark_written(session, flush_context):
+    session.info[WROTE] = True
+
+
+def _iterate_read_only(iterator):
+    # A generator runs in its caller's context, so the flag is set for
+    # each step only, never while the caller holds the generator.
+    while True:
+        token = _read_only.set(True)
+        try:
+            value = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _read_only.reset(token)
+        yield value
+
+
+def read_only(function):
+    """
+    Marks a function whose queries may be served by the replica.
+
+    A generator returned by the function, such as a streamed listing, keeps
+    the mark while it is iterated.
+
+    Parameters
+    ----------
+    function : callable
+        A service method that does not write.
+
+    Returns
+    -------
+    callable
+        The wrapped function.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        token = _read_only.set(True)
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            _read_only.reset(token)
+        if inspect.isgenerator(result):
+            return _iterate_read_only(result)
+        return result
+    return wrapper
+
+
+def replica_binds(uri, **options):
+    """
+    Returns the `SQLALCHEMY_BINDS` declaring the replica engine.
+
+    Parameters
+    ----------
+    uri : str or None
+        The replica URI, or None when there is no replica.
+    **options
+        Pool settings passed to `engine_options`.
+
+    Returns
+    -------
+    dict
+        The bind configuration, empty when there is no replica.
+    """
+    if not uri:
+        return {}
+    return {REPLICA_BIND: {'url': uri, **engine_options(uri, **options)}}
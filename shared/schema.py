@@ -0,0 +1,87 @@
+"""
+shared.schema
+=============
+
+This module brings the schema of a service up to date when it is deployed.
+
+The Alembic migrations of each service start from the tables that the
+services used to create at import time, so they cannot build a schema from
+an empty database. `setup_schema` therefore picks one of two paths:
+
+- When the service's Alembic version table or its base table exists, the
+  database was deployed before: the pending migrations are applied.
+- Otherwise the database is new: the tables are created from the models and
+  the version table is stamped at the latest revision, so that later
+  deployments only apply the migrations written after this one.
+
+The services share one database and create some of the same tables. On
+PostgreSQL the setup of every service runs under one advisory lock, so
+containers started together do not create the same tables at the same time.
+
+Functions
+---------
+setup_schema(db, directory, base_table)
+    Creates the schema of a new database, or migrates an existing one.
+"""
+
+import os
+from contextlib import contextmanager
+
+from flask import current_app
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect, text
+
+SCHEMA_LOCK_ID = 4350001
+
+
+@contextmanager
+def schema_lock(engine):
+    if engine.dialect.name != 'postgresql':
+        yield
+        return
+    with engine.connect() as connection:
+        connection.execute(text('SELECT pg_advisory_lock(:id)'), {'id': SCHEMA_LOCK_ID})
+        connection.commit()
+        try:
+            yield
+        finally:
+            connection.execute(text('SELECT pg_advisory_unlock(:id)'), {'id': SCHEMA_LOCK_ID})
+            connection.commit()
+
+
+def has_revisions(directory):
+    versions = os.path.join(directory, 'versions')
+    return os.path.isdir(versions) and any(name.endswith('.py') for name in os.listdir(versions))
+
+
+def setup_schema(db, directory, base_table=None):
+    """
+    Creates the schema of a new database, or migrates an existing one.
+
+    Parameters
+    ----------
+    db : SQLAlchemy
+        The service's Flask-SQLAlchemy extension.
+    directory : str
+        The service's migrations directory.
+    base_table : str, optional
+        A table owned by the service that predates its migrations. When it
+        exists without a version table, the database was created before the
+        migrations and is migrated rather than stamped.
+
+    Returns
+    -------
+    str
+        ``upgraded`` or ``created``.
+    """
+    version_table = current_app.extensions['migrate'].configure_args.get('version_table', 'alembic_version')
+    with schema_lock(db.engine):
+        inspector = inspect(db.engine)
+        if inspector.has_table(version_table) or (base_table and inspector.has_table(base_table)):
+            if has_revisions(directory):
+                upgrade(directory)
+            return 'upgraded'
+        db.create_all()
+        if has_revisions(directory):
+            stamp(directory, 'head')
+        return 'created'
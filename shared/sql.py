@@ -0,0 +1,47 @@
+"""
+shared.sql
+==========
+
+This module holds SQL helpers that depend on the database dialect.
+
+Functions
+---------
+dialect_insert(bind, table)
+    Returns an ``INSERT`` construct supporting ``ON CONFLICT`` for the bind's dialect.
+"""
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(bind, table):
+    """
+    Returns an ``INSERT`` construct supporting ``ON CONFLICT`` for the bind's dialect.
+
+    Both PostgreSQL and SQLite (3.24+) provide `on_conflict_do_update` and
+    `on_conflict_do_nothing` with the same signature.
+
+    Parameters
+    ----------
+    bind : Session or Connection or Engine
+        Anything exposing the dialect in use, directly or through `get_bind()`.
+    table : Table or mapped class
+        The insert target.
+
+    Returns
+    -------
+    Insert
+        The dialect-specific insert construct.
+
+    Raises
+    ------
+    NotImplementedError
+        If the dialect has no ``ON CONFLICT`` support.
+    """
+    if hasattr(bind, 'get_bind'):
+        bind = bind.get_bind()
+    name = bind.dialect.name
+    if name == 'postgresql':
+        return postgresql.insert(table)
+    if name == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f'ON CONFLICT is not supported for the {name} dialect')
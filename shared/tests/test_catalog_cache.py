@@ -0,0 +1,67 @@
+from shared.catalog_cache import CatalogCache, CatalogSnapshot, ItemRecord
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(item_id, name):
+    return ItemRecord(item_id, name, 'furniture', 10.0, 'USD', f'A {name}')
+
+
+def test_snapshot_finds_items_by_id_or_name():
+    snapshot = CatalogSnapshot(1, [record(1, 'Chair'), record(2, 'Table')])
+    assert snapshot.find(2).name == 'Table'
+    assert snapshot.find(None, 'Chair').id == 1
+    assert snapshot.find(3, 'Chair').id == 1
+    assert snapshot.find(3, 'Lamp') is None
+
+
+def test_snapshot_pages_in_id_order():
+    snapshot = CatalogSnapshot(1, [record(item_id, f'Item {item_id}') for item_id in (5, 1, 3, 7)])
+    records, cursor = snapshot.page(2)
+    assert [r.id for r in records] == [1, 3]
+    assert cursor == 3
+    records, cursor = snapshot.page(2, after=cursor)
+    assert [r.id for r in records] == [5, 7]
+    assert cursor is None
+
+
+def test_snapshot_is_reloaded_only_when_the_version_moves():
+    clock = FakeClock()
+    cache = CatalogCache(check_interval=5, clock=clock)
+    version = [1]
+    loads = []
+
+    def loader():
+        loads.append(version[0])
+        return [record(1, f'Chair v{version[0]}')]
+
+    assert cache.get(lambda: version[0], loader).find(1).name == 'Chair v1'
+    clock.now = 6
+    cache.get(lambda: version[0], loader)
+    assert loads == [1]
+
+    version[0] = 2
+    clock.now = 7
+    assert cache.get(lambda: version[0], loader).find(1).name == 'Chair v1'
+    clock.now = 11
+    assert cache.get(lambda: version[0], loader).find(1).name == 'Chair v2'
+    assert loads == [1, 2]
+    assert cache.stats()['loads'] == 2
+    assert cache.stats()['hits'] == 1
+
+
+def test_invalidate_forces_a_version_check():
+    cache = CatalogCache(check_interval=60)
+    versions = []
+    version_loader = lambda: versions.append(1) or 1
+    cache.get(version_loader, lambda: [])
+    cache.get(version_loader, lambda: [])
+    cache.invalidate()
+    cache.get(version_loader, lambda: [])
+    assert len(versions) == 2
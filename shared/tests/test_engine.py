@@ -0,0 +1,37 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from shared.engine import TimedQueuePool, engine_options, pool_stats
+
+
+def test_in_memory_sqlite_keeps_its_static_pool():
+    assert engine_options('sqlite:///:memory:', 'sales') == {}
+
+
+def test_postgres_options_name_the_service_and_bound_statements():
+    options = engine_options(
+        'postgresql://user:secret@db/shop', 'sales', pool_size=3, max_overflow=2, statement_timeout=5000,
+    )
+    assert options['poolclass'] is TimedQueuePool
+    assert (options['pool_size'], options['max_overflow']) == (3, 2)
+    assert options['connect_args'] == {'application_name': 'sales', 'options': '-c statement_timeout=5000'}
+
+
+def test_pool_stats_record_checkouts_waits_and_timeouts(tmp_path):
+    options = engine_options(f'sqlite:///{tmp_path / "pool.db"}', 'sales', pool_size=1, max_overflow=0, pool_timeout=0.05)
+    engine = create_engine(f'sqlite:///{tmp_path / "pool.db"}', **options)
+
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+        stats = pool_stats(engine)
+        assert stats['checked_out'] == 1
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats['checked_out'] == 0
+    assert stats['checkouts'] == 2
+    assert stats['timeouts'] == 1
+    assert stats['wait_seconds_max'] >= 0.05
+    engine.dispose()
@@ -0,0 +1,40 @@
+import importlib
+
+import pytest
+
+import shared.gunicorn_conf
+
+
+def load(monkeypatch, **environ):
+    for name in ('GUNICORN_WORKER_CLASS', 'GUNICORN_WORKERS', 'GUNICORN_THREADS', 'GUNICORN_PRELOAD', 'PORT'):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(shared.gunicorn_conf.os, 'sched_getaffinity', lambda pid: {0, 1, 2, 3}, raising=False)
+    return importlib.reload(shared.gunicorn_conf)
+
+
+def test_gthread_is_the_default(monkeypatch):
+    config = load(monkeypatch, PORT='5009')
+    assert config.worker_class == 'gthread'
+    assert config.workers == 5
+    assert config.threads == 4
+    assert config.preload_app is True
+    assert config.bind == '0.0.0.0:5009'
+
+
+def test_sync_workers_scale_with_cpus(monkeypatch):
+    config = load(monkeypatch, GUNICORN_WORKER_CLASS='sync')
+    assert config.workers == 9
+    assert config.threads == 1
+
+
+def test_explicit_settings_win(monkeypatch):
+    config = load(monkeypatch, GUNICORN_WORKERS='2', GUNICORN_THREADS='8', GUNICORN_PRELOAD='0')
+    assert (config.workers, config.threads, config.preload_app) == (2, 8, False)
+
+
+def test_unknown_worker_class_is_rejected(monkeypatch):
+    with pytest.raises(ValueError):
+        load(monkeypatch, GUNICORN_WORKER_CLASS='eventlet')
+    load(monkeypatch)
@@ -0,0 +1,13 @@
+from shared.identifiers import identifier_predicates
+
+
+def test_usernames_only_match_usernames():
+    assert identifier_predicates('testuser') == [('username', 'testuser')]
+
+
+def test_impossible_lookups_are_skipped():
+    assert identifier_predicates('user@example.com') == [('username', 'user@example.com'), ('email', 'user@example.com')]
+    assert identifier_predicates('+961-71-000-000') == [('username', '+961-71-000-000'), ('phone', '+961-71-000-000')]
+    assert identifier_predicates(42) == [('username', '42'), ('phone', '42'), ('id', 42)]
+    assert ('id', 0) not in identifier_predicates('0')
+    assert identifier_predicates('99999999999')[-1][0] == 'phone'
@@ -0,0 +1,46 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify
+
+from shared.json_provider import FastJSONProvider, RawJSON, orjson
+
+BACKENDS = ['json'] + (['orjson'] if orjson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def app(request):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.json.backend = request.param
+    return app
+
+
+def test_datetimes_are_encoded_as_utc_iso_8601(app):
+    row = {
+        'created_at': datetime(2024, 5, 1, 12, 30, 15, 250000),
+        'updated_at': datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        'balance': Decimal('10.50'),
+    }
+    assert json.loads(app.json.dumps(row)) == {
+        'created_at': '2024-05-01T12:30:15.250000+00:00',
+        'updated_at': '2024-05-01T12:30:00+00:00',
+        'balance': '10.50',
+    }
+
+
+def test_backends_produce_the_same_documents(app):
+    rows = [{'id': 1, 'name': 'Café', 'price_per_unit': 9.5, 'tags': None, 'created_at': datetime(2024, 1, 2)}]
+    expected = '[{"id":1,"name":"Café","price_per_unit":9.5,"tags":null,"created_at":"2024-01-02T00:00:00+00:00"}]'
+    assert app.json.dumps(rows) == expected
+    assert app.json.loads(expected)[0]['name'] == 'Café'
+
+
+def test_jsonify_returns_pre_serialized_payloads_as_is(app):
+    with app.app_context():
+        response = jsonify(RawJSON(b'{"cached":true}'))
+        assert response.mimetype == 'application/json'
+        assert response.get_data() == b'{"cached":true}'
+        assert jsonify({'b': 1, 'a': 2}).get_data() == b'{"b":1,"a":2}'
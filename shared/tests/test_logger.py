@@ -0,0 +1,87 @@
+import logging
+import threading
+
+import pytest
+
+from shared.logger import LOGGER_NAME, configure_logging, get_logger, stop_logging
+
+
+class CountingArgument:
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'argument'
+
+
+@pytest.fixture(autouse=True)
+def isolated_logging():
+    # Start from a bare root logger and an enabled app logger, whatever earlier tests configured.
+    stop_logging()
+    root = logging.getLogger()
+    app_logger = logging.getLogger(LOGGER_NAME)
+    handlers, level, disabled = root.handlers[:], root.level, app_logger.disabled
+    root.handlers = []
+    app_logger.disabled = False
+    yield
+    stop_logging()
+    root.handlers = handlers
+    root.setLevel(level)
+    app_logger.disabled = disabled
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'app.log'
+    configure_logging(level='INFO', log_file=str(path), console=False)
+    yield path
+
+
+def test_records_are_written_by_the_listener_thread(log_file):
+    writers = []
+
+    class RecordingHandler(logging.Handler):
+        def emit(self, record):
+            writers.append(threading.current_thread())
+
+    listener = configure_logging()
+    recorder = RecordingHandler()
+    listener.handlers = listener.handlers + (recorder,)
+
+    get_logger().info('Item %s not found', 42)
+    stop_logging()
+
+    assert 'Ecomerce_Application - INFO - Item 42 not found' in log_file.read_text()
+    assert writers and threading.current_thread() not in writers
+
+
+def test_records_below_the_level_are_never_formatted(log_file):
+    skipped, written = CountingArgument(), CountingArgument()
+    logger = get_logger()
+
+    logger.debug('Enter service with %s', skipped)
+    logger.info('Service called with %s', written)
+    stop_logging()
+
+    assert skipped.formatted == 0
+    assert written.formatted >= 1
+    contents = log_file.read_text()
+    assert 'Enter service' not in contents
+    assert 'Service called with argument' in contents
+
+
+def test_configure_logging_is_idempotent(log_file):
+    assert configure_logging() is configure_logging(level='DEBUG')
+    assert logging.getLogger().level == logging.INFO
+
+
+def test_default_pipeline_writes_no_file(tmp_path, monkeypatch):
+    monkeypatch.delenv('LOG_FILE', raising=False)
+    monkeypatch.chdir(tmp_path)
+    listener = configure_logging()
+    get_logger().warning('Written to the console only')
+    stop_logging()
+
+    assert [type(handler) for handler in listener.handlers] == [logging.StreamHandler]
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,76 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from shared.passwords import HasherBusy, LoginRateLimiter, PasswordHasher, TooManyAttempts, normalize_method
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_methods_are_normalized_to_their_recorded_form():
+    assert normalize_method('scrypt') == 'scrypt:32768:8:1'
+    assert normalize_method('pbkdf2:sha256:1000') == 'pbkdf2:sha256:1000'
+    assert generate_password_hash('secret', method='scrypt').startswith(normalize_method('scrypt') + '$')
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_hashes_verify_and_are_timed(workers):
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=workers)
+    try:
+        stored = hasher.hash('secret')
+        assert hasher.verify(stored, 'secret')
+        assert not hasher.verify(stored, 'wrong')
+        assert not hasher.verify('', 'secret')
+        stats = hasher.stats()
+        assert stats['hash']['count'] == 1
+        assert stats['verify']['count'] == 2
+        assert stats['verify']['seconds_max'] > 0
+    finally:
+        hasher.shutdown()
+
+
+def test_hashes_with_other_parameters_need_a_rehash():
+    hasher = PasswordHasher(method='pbkdf2:sha256:2000')
+    old = generate_password_hash('secret', method='pbkdf2:sha256:1000')
+    assert hasher.verify(old, 'secret')
+    assert hasher.needs_rehash(old)
+    assert not hasher.needs_rehash(hasher.hash('secret'))
+
+
+def test_saturated_hasher_is_busy():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', queue_factor=1, queue_timeout=0)
+    hasher._slots.acquire()
+    with pytest.raises(HasherBusy):
+        hasher.hash('secret')
+    assert hasher.stats()['busy'] == 1
+
+
+def test_limiter_blocks_an_identifier_until_the_window_ends():
+    clock = FakeClock()
+    limiter = LoginRateLimiter(limit=2, window=60, clock=clock)
+    limiter.attempt('User')
+    limiter.attempt('user ')
+    clock.now = 45.5
+    with pytest.raises(TooManyAttempts) as error:
+        limiter.attempt('user')
+    assert error.value.retry_after == 15
+    limiter.attempt('other')
+    clock.now = 60
+    limiter.attempt('user')
+    assert limiter.stats()['limited'] == 1
+
+
+def test_limiter_forgets_an_identifier_after_a_success_and_stays_bounded():
+    limiter = LoginRateLimiter(limit=1, window=60, maxsize=2, clock=FakeClock())
+    limiter.attempt('user')
+    limiter.reset('user')
+    limiter.attempt('user')
+    limiter.attempt('a')
+    limiter.attempt('b')
+    assert limiter.stats()['tracked'] == 2
+    limiter.attempt('user')
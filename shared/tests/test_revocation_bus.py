@@ -0,0 +1,143 @@
+import os
+import shutil
+import socket
+import tempfile
+import time
+
+import pytest
+from flask import Flask
+
+from shared.revocation_bus import RevocationBus, RevocationRegistry, RevocationState, UnixSocketBackend
+
+
+def make_bus(config, channel='customer_revocations', listen=True, bootstrap=None):
+    app = Flask(__name__)
+    app.config.update(config)
+    bus = RevocationBus(channel)
+    bus.init_app(app, listen=listen)
+    if bootstrap is not None:
+        bus.bootstrap_loader(bootstrap)
+    return bus
+
+
+@pytest.fixture
+def socket_dir():
+    # pytest's tmp_path can exceed the 108 byte limit on UNIX socket paths.
+    directory = tempfile.mkdtemp(prefix='rb-')
+    yield directory
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_state_revokes_tokens_issued_before_logout_or_when_banned():
+    assert RevocationState(100.0, 'active').revokes(99.0)
+    assert not RevocationState(100.0, 'active').revokes(101.0)
+    assert not RevocationState(None, 'active').revokes(0.0)
+    assert RevocationState(None, 'banned').revokes(101.0)
+
+
+def test_registry_keeps_latest_logout():
+    registry = RevocationRegistry()
+    registry.apply('alice', RevocationState(200.0, 'active'))
+    registry.apply('alice', RevocationState(100.0, 'active'))
+    registry.apply('alice', RevocationState(None, 'banned'))
+
+    assert registry.get('alice') == RevocationState(200.0, 'banned')
+
+
+def test_registry_load_replaces_states_and_replays_events_during_load():
+    registry = RevocationRegistry()
+    registry.apply('alice', RevocationState(None, 'banned'))
+    registry.apply('bob', RevocationState(100.0, 'active'))
+
+    registry.begin_load()
+    registry.apply('carol', RevocationState(300.0, 'active'))
+    registry.finish_load([('bob', RevocationState(150.0, 'active'))])
+
+    assert registry.get('alice') is None
+    assert registry.get('bob') == RevocationState(150.0, 'active')
+    assert registry.get('carol') == RevocationState(300.0, 'active')
+
+
+def test_disabled_bus_does_not_publish():
+    bus = make_bus({'REVOCATION_BACKEND': 'none'})
+
+    bus.publish('alice', 100.0, 'active')
+
+    assert not bus.enabled
+    assert bus.backend is None
+
+
+def test_inprocess_events_reach_other_services():
+    config = {'REVOCATION_BACKEND': 'inprocess'}
+    publisher = make_bus(config, channel='test_inprocess', listen=False)
+    subscriber = make_bus(config, channel='test_inprocess', bootstrap=lambda: [('bob', RevocationState(50.0, 'active'))])
+
+    assert subscriber.get('alice') is None
+    publisher.publish('alice', None, 'banned')
+
+    assert subscriber.get('alice') == RevocationState(None, 'banned')
+    assert subscriber.get('bob') == RevocationState(50.0, 'active')
+    assert publisher.registry.get('alice') is None
+
+
+def test_reconnect_reloads_events_missed_while_disconnected():
+    config = {'REVOCATION_BACKEND': 'inprocess'}
+    database = {'alice': RevocationState(None, 'banned'), 'bob': RevocationState(50.0, 'active')}
+    publisher = make_bus(config, channel='test_reconnect', listen=False)
+    subscriber = make_bus(config, channel='test_reconnect', bootstrap=lambda: list(database.items()))
+    assert subscriber.get('alice') == RevocationState(None, 'banned')
+
+    subscriber.backend.close()
+    del database['alice']
+    publisher.publish('alice', None, 'active')
+    database['bob'] = RevocationState(90.0, 'active')
+    publisher.publish('bob', 90.0, 'active')
+    database['carol'] = RevocationState(None, 'banned')
+    publisher.publish('carol', None, 'banned')
+    assert subscriber.get('alice') == RevocationState(None, 'banned')
+
+    subscriber.backend.subscribe(subscriber._on_message, on_reconnect=subscriber._on_reconnect)
+    subscriber._on_reconnect()
+
+    assert subscriber.get('alice') is None
+    assert subscriber.get('bob') == RevocationState(90.0, 'active')
+    assert subscriber.get('carol') == RevocationState(None, 'banned')
+    subscriber.backend.close()
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='UNIX sockets are not available')
+def test_unix_socket_events_reach_every_subscriber(socket_dir):
+    config = {'REVOCATION_BACKEND': 'unix', 'REVOCATION_SOCKET_DIR': socket_dir}
+    publisher = make_bus(config, listen=False)
+    first = make_bus(config)
+    second = make_bus(config)
+    first.get('alice')
+    second.get('alice')
+
+    publisher.publish('alice', 100.0, 'active')
+
+    assert wait_for(lambda: first.registry.get('alice') == RevocationState(100.0, 'active'))
+    assert wait_for(lambda: second.registry.get('alice') == RevocationState(100.0, 'active'))
+    for bus in (publisher, first, second):
+        bus.backend.close()
+
+
+def test_unix_socket_publish_removes_stale_sockets(socket_dir):
+    backend = UnixSocketBackend(socket_dir, 'stale')
+    backend.subscribe(lambda payload: None)
+    live = os.listdir(backend.directory)
+    open(os.path.join(backend.directory, 'gone.sock'), 'w').close()
+
+    backend.publish(RevocationState(1.0, 'active').to_json('alice'))
+
+    assert os.listdir(backend.directory) == live
+    backend.close()
@@ -0,0 +1,73 @@
+from shared.revocation_cache import RevocationCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss_counters():
+    cache = RevocationCache(maxsize=10, ttl=30)
+    loads = []
+    loader = lambda subject: loads.append(subject) or {'subject': subject}
+
+    assert cache.get_or_load('alice', loader) == {'subject': 'alice'}
+    assert cache.get_or_load('alice', loader) == {'subject': 'alice'}
+    assert loads == ['alice']
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = RevocationCache(maxsize=10, ttl=5, clock=clock)
+    loads = []
+    loader = lambda subject: loads.append(subject)
+
+    cache.get_or_load('alice', loader)
+    clock.now = 4.9
+    cache.get_or_load('alice', loader)
+    clock.now = 5.0
+    cache.get_or_load('alice', loader)
+    assert loads == ['alice', 'alice']
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RevocationCache(maxsize=2, ttl=30)
+    loads = []
+    loader = lambda subject: loads.append(subject)
+
+    cache.get_or_load('alice', loader)
+    cache.get_or_load('bob', loader)
+    cache.get_or_load('alice', loader)
+    cache.get_or_load('carol', loader)
+    cache.get_or_load('alice', loader)
+    cache.get_or_load('bob', loader)
+    assert loads == ['alice', 'bob', 'carol', 'bob']
+    assert cache.stats()['size'] == 2
+
+
+def test_invalidate_forces_a_reload():
+    cache = RevocationCache(maxsize=10, ttl=30)
+    state = {'alice': 'active'}
+    loader = lambda subject: state[subject]
+
+    assert cache.get_or_load('alice', loader) == 'active'
+    state['alice'] = 'banned'
+    assert cache.get_or_load('alice', loader) == 'active'
+    cache.invalidate('alice')
+    assert cache.get_or_load('alice', loader) == 'banned'
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    cache = RevocationCache(maxsize=10, ttl=30)
+
+    def loader(subject):
+        cache.invalidate(subject)
+        return 'stale'
+
+    assert cache.get_or_load('alice', loader) == 'stale'
+    assert cache.get_or_load('alice', lambda subject: 'fresh') == 'fresh'
@@ -0,0 +1,79 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select
+
+from shared.routing import REPLICA_BIND, RoutingSession, read_only, replica_binds
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+class Note(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.String(50), nullable=False)
+
+
+@read_only
+def all_notes():
+    return [note.text for note in db.session.scalars(select(Note).order_by(Note.id))]
+
+
+@read_only
+def stream_notes():
+    return (note.text for note in db.session.scalars(select(Note).order_by(Note.id)))
+
+
+def all_notes_from_primary():
+    return [note.text for note in db.session.scalars(select(Note).order_by(Note.id))]
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "primary.db"}'
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(f'sqlite:///{tmp_path / "replica.db"}', application_name='test')
+    db.init_app(app)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        Note.metadata.create_all(db.engines[REPLICA_BIND])
+        with db.engines[REPLICA_BIND].begin() as connection:
+            connection.execute(Note.__table__.insert(), [{'text': 'replica'}])
+        db.session.add(Note(text='primary'))
+        db.session.commit()
+        db.session.remove()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_read_only_functions_read_the_replica(app):
+    with app.app_context():
+        assert all_notes() == ['replica']
+        assert list(stream_notes()) == ['replica']
+        assert all_notes_from_primary() == ['primary']
+
+
+def test_reads_after_a_write_stick_to_the_primary(app):
+    with app.app_context():
+        assert all_notes() == ['replica']
+        db.session.add(Note(text='written'))
+        db.session.commit()
+        assert all_notes() == ['primary', 'written']
+
+    with app.app_context():
+        assert all_notes() == ['replica']
+
+
+def test_without_a_replica_everything_reads_the_primary(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "primary.db"}'
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(None)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        db.session.add(Note(text='primary'))
+        db.session.commit()
+        db.session.remove()
+        assert all_notes() == ['primary']
+        db.engine.dispose()
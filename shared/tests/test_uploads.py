@@ -0,0 +1,57 @@
+import io
+
+import pytest
+from marshmallow import Schema, ValidationError, fields, validates_schema
+
+from shared.uploads import UploadError, batched, iter_records, validate_batch
+
+
+class TrickleStream(io.BytesIO):
+    """Returns a few bytes per read, splitting lines and characters."""
+
+    def read(self, size=-1):
+        return super().read(3)
+
+
+class RestockSchema(Schema):
+    item_id = fields.Integer()
+    name = fields.String()
+    quantity = fields.Integer(required=True)
+
+    @validates_schema
+    def validate_identifier(self, data, **kwargs):
+        if not data.get('item_id') and not data.get('name'):
+            raise ValidationError('Either item id or name must be provided')
+
+
+def test_csv_records_survive_chunk_boundaries():
+    upload = 'name,quantity,note\r\nCafé,2,\r\n"Multi\nline",3,"a, b"\r\n'.encode('utf-8-sig')
+    records = list(iter_records(TrickleStream(upload), 'csv'))
+    assert records == [
+        (1, {'name': 'Café', 'quantity': '2'}, None),
+        (2, {'name': 'Multi\nline', 'quantity': '3', 'note': 'a, b'}, None),
+    ]
+
+
+def test_ndjson_records_report_invalid_lines():
+    upload = b'{"name": "Chair"}\n\n[1]\n{broken\n{"name": "Lamp"}'
+    records = list(iter_records(TrickleStream(upload), 'ndjson'))
+    assert [(row, record) for row, record, _ in records] == [(1, {'name': 'Chair'}), (2, None), (3, None), (4, {'name': 'Lamp'})]
+    assert records[2][2].startswith('Invalid JSON')
+
+
+def test_invalid_utf8_stops_the_upload():
+    with pytest.raises(UploadError):
+        list(iter_records(io.BytesIO(b'name\n\xff\n'), 'csv'))
+
+
+def test_batches_are_validated_together_or_row_by_row():
+    assert [len(batch) for batch in batched(range(5), 2)] == [2, 2, 1]
+
+    valid, errors = validate_batch(RestockSchema(), [(1, {'name': 'Chair', 'quantity': '2'}), (2, {'item_id': 3, 'quantity': 1})])
+    assert valid == [(1, {'name': 'Chair', 'quantity': 2}), (2, {'item_id': 3, 'quantity': 1})]
+    assert errors == []
+
+    valid, errors = validate_batch(RestockSchema(), [(1, {'quantity': 'x'}), (2, {'quantity': 1}), (3, {'name': 'Lamp', 'quantity': 1})])
+    assert valid == [(3, {'name': 'Lamp', 'quantity': 1})]
+    assert [error['row'] for error in errors] == [1, 2]
@@ -0,0 +1,260 @@
+"""
+shared.uploads
+==============
+
+This module reads bulk uploads as a stream of records and validates them in
+batches.
+
+Uploads are read from the request stream as they arrive, so a feed of tens
+of thousands of rows is never held in memory at once. Two formats are
+accepted, chosen by the ``Content-Type`` of the request:
+
+- ``text/csv``: a header line naming the fields, then one record per line.
+  Empty cells are treated as missing fields.
+- ``application/x-ndjson`` (or ``application/jsonl``): one JSON object per
+  line. Blank lines are skipped.
+
+Records are numbered from 1 in upload order, without the CSV header, and
+errors refer to them by that number.
+
+`validate_batch` loads a whole batch with one `Schema.load(many=True)` call.
+When a batch holds invalid rows, marshmallow skips the schema-level
+validators of every row, so the batch is then validated row by row to report
+each error accurately.
+
+Classes
+-------
+UploadError
+    Raised when an upload cannot be read any further.
+UploadReport
+    Counts the processed records of an upload and collects its errors.
+
+Functions
+---------
+upload_format(mimetype)
+    Returns the format of an upload from its mimetype.
+iter_records(stream, fmt)
+    Yields the numbered records of an upload.
+batched(records, size)
+    Groups records into lists of at most `size`.
+validate_batch(schema, batch)
+    Loads a batch of records with a schema.
+"""
+
+import codecs
+import csv
+import json
+from itertools import islice
+
+from marshmallow import ValidationError
+
+CSV_MIMETYPES = {'text/csv'}
+NDJSON_MIMETYPES = {'application/x-ndjson', 'application/jsonl', 'application/ndjson'}
+
+
+class UploadError(Exception):
+    def __init__(self, message='The upload could not be read'):
+        super().__init__(message)
+
+
+class UploadReport:
+    """
+    Counts the processed records of an upload and collects its errors.
+
+    Parameters
+    ----------
+    max_errors : int
+        Errors listed at most; further errors are only counted.
+
+    Methods
+    -------
+    readable(batch)
+        Returns the records of a batch that could be parsed.
+    add_errors(errors)
+        Records errors of rejected records.
+    add_processed(count)
+        Counts records written to the database.
+    abort(message)
+        Records why reading stopped early.
+    to_dict()
+        Returns the report as a response body.
+    """
+
+    def __init__(self, max_errors=1000):
+        self.max_errors = max_errors
+        self.processed = 0
+        self.failed = 0
+        self.errors = []
+        self.aborted = None
+
+    def readable(self, batch):
+        """
+        Returns the records of a batch that could be parsed.
+
+        Parameters
+        ----------
+        batch : list of tuple
+            ``(row, record, error)`` triples from `iter_records`.
+
+        Returns
+        -------
+        list of tuple
+            ``(row, record)`` pairs; the others are recorded as errors.
+        """
+        self.add_errors({'row': row, 'error': error} for row, _, error in batch if error)
+        return [(row, record) for row, record, error in batch if not error]
+
+    def add_errors(self, errors):
+        for error in errors:
+            self.failed += 1
+            if len(self.errors) < self.max_errors:
+                self.errors.append(error)
+
+    def add_processed(self, count):
+        self.processed += count
+
+    def abort(self, message):
+        self.aborted = message
+
+    def to_dict(self):
+        errors = sorted(self.errors, key=lambda error: error['row'])
+        result = {'processed': self.processed, 'failed': self.failed, 'errors': errors}
+        if self.aborted:
+            result['error'] = self.aborted
+        return result
+
+
+def upload_format(mimetype):
+    """
+    Returns the format of an upload from its mimetype.
+
+    Parameters
+    ----------
+    mimetype : str
+        The mimetype of the request, without parameters.
+
+    Returns
+    -------
+    str or None
+        ``csv``, ``ndjson``, or `None` for an unsupported mimetype.
+    """
+    if mimetype in CSV_MIMETYPES:
+        return 'csv'
+    if mimetype in NDJSON_MIMETYPES:
+        return 'ndjson'
+    return None
+
+
+def iter_lines(stream):
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        *lines, pending = (pending + decoder.decode(chunk)).split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_records(stream, fmt):
+    """
+    Yields the numbered records of an upload.
+
+    Parameters
+    ----------
+    stream : file-like
+        The binary request stream.
+    fmt : str
+        ``csv`` or ``ndjson``.
+
+    Yields
+    ------
+    tuple
+        ``(row, record, error)``: the record number, the record as a
+        dictionary, and `None`; or the record number, `None` and a message
+        when the record is not valid JSON.
+
+    Raises
+    ------
+    UploadError
+        If the stream is not UTF-8, or the CSV is malformed.
+    """
+    lines = iter_lines(stream)
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(lines)
+            for row, record in enumerate(reader, start=1):
+                yield row, {key: value for key, value in record.items() if key and value not in ('', None)}, None
+            return
+        row = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row, None, f'Invalid JSON: {e}'
+                continue
+            if not isinstance(record, dict):
+                yield row, None, 'Invalid JSON: expected an object'
+                continue
+            yield row, record, None
+    except UnicodeDecodeError as e:
+        raise UploadError(f'The upload is not valid UTF-8: {e}')
+    except csv.Error as e:
+        raise UploadError(f'The upload is not valid CSV: {e}')
+
+
+def batched(records, size):
+    """
+    Groups records into lists of at most `size`.
+
+    Parameters
+    ----------
+    records : iterable
+        The records to group.
+    size : int
+        The largest batch.
+
+    Yields
+    ------
+    list
+        The next batch.
+    """
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def validate_batch(schema, batch):
+    """
+    Loads a batch of records with a schema.
+
+    Parameters
+    ----------
+    schema : Schema
+        The marshmallow schema of one record.
+    batch : list of tuple
+        ``(row, record)`` pairs.
+
+    Returns
+    -------
+    tuple of list
+        ``(valid, errors)``: ``(row, data)`` pairs of the loaded records and
+        ``{'row': row, 'error': messages}`` entries for the others.
+    """
+    try:
+        loaded = schema.load([record for _, record in batch], many=True)
+        return [(row, data) for (row, _), data in zip(batch, loaded)], []
+    except ValidationError:
+        pass
+
+    valid, errors = [], []
+    for row, record in batch:
+        try:
+            valid.append((row, schema.load(record)))
+        except ValidationError as e:
+            errors.append({'row': row, 'error': e.messages})
+    return valid, errors